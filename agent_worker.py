@@ -0,0 +1,226 @@
+import atexit
+import hashlib
+import os
+import socket
+import sys
+import threading
+import uuid
+from datetime import datetime, timedelta
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.blocking import BlockingScheduler
+from sqlalchemy.exc import IntegrityError
+from base_models import AgentLease, db
+from chain_scheduler import ChainScheduler
+from metrics import serve_metrics
+from tracing import TraceExporter
+from work_queue import CycleQueue, CycleWorker
+
+class LeaderLease:
+    def __init__(self, app, name='agent-cycle', ttl=30):
+        """Initialize leader lease so only one agent process runs cycles
+
+        PostgreSQL uses a session advisory lock, released as soon as the
+        holder's connection dies. Other databases use a row in agent_lease
+        that the holder renews and others may take over once it expires.
+        """
+        self.app = app
+        self.name = name
+        self.ttl = ttl
+        self.holder = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.is_leader = False
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Become or stay leader; returns whether this process holds the lease"""
+        with self._lock:
+            with self.app.app_context():
+                try:
+                    if db.engine.dialect.name == 'postgresql':
+                        self.is_leader = self._acquire_advisory_lock()
+                    else:
+                        self.is_leader = self._acquire_lease_row()
+                except Exception as e:
+                    print(f"Error acquiring leader lease: {str(e)}")
+                    self.is_leader = False
+            return self.is_leader
+
+    def release(self):
+        """Give up leadership so another process can take over immediately"""
+        with self._lock:
+            with self.app.app_context():
+                try:
+                    if self._connection is not None:
+                        self._connection.close()
+                        self._connection = None
+                    elif self.is_leader:
+                        AgentLease.query.filter_by(name=self.name, holder=self.holder).update(
+                            {'expires_at': datetime.utcnow()}
+                        )
+                        db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error releasing leader lease: {str(e)}")
+            self.is_leader = False
+
+    def _acquire_advisory_lock(self):
+        if self._connection is not None:
+            try:
+                # The lock lives as long as this connection does
+                self._connection.execute(db.text('SELECT 1'))
+                return True
+            except Exception:
+                self._connection.close()
+                self._connection = None
+
+        key = int.from_bytes(hashlib.sha256(self.name.encode()).digest()[:8], 'big', signed=True)
+        connection = db.engine.connect()
+        locked = connection.execute(db.text('SELECT pg_try_advisory_lock(:key)'), {'key': key}).scalar()
+        connection.commit()
+        if locked:
+            self._connection = connection
+            return True
+        connection.close()
+        return False
+
+    def _acquire_lease_row(self):
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        try:
+            renewed = AgentLease.query.filter(
+                AgentLease.name == self.name,
+                db.or_(AgentLease.holder == self.holder, AgentLease.expires_at < now)
+            ).update({'holder': self.holder, 'expires_at': expires_at}, synchronize_session=False)
+            if not renewed:
+                db.session.add(AgentLease(name=self.name, holder=self.holder, expires_at=expires_at))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            # Another process created the lease row first
+            db.session.rollback()
+            return False
+        except Exception:
+            db.session.rollback()
+            raise
+
+class AgentWorker:
+    def __init__(self, app, interval_minutes=None, lease=None, mode=None):
+        """Initialize the agent worker that runs AI cycles while it holds the leader lease
+
+        The adaptive mode (default) gives each chain its own cadence around
+        AGENT_CYCLE_MINUTES; the fixed mode runs every chain together on it.
+        The queue mode schedules adaptively too, but the leader only enqueues
+        chain cycles and every worker process, leader or not, runs them.
+        """
+        self.app = app
+        self.interval_minutes = interval_minutes or int(os.environ.get('AGENT_CYCLE_MINUTES', 5))
+        self.mode = mode or os.environ.get('AGENT_SCHEDULER', 'adaptive')
+        self.lease = lease or LeaderLease(app)
+        self.trace_exporter = TraceExporter(app, interval=int(os.environ.get('TRACE_EXPORT_SECONDS', 10)))
+        # Cycles run here rather than in the web tier, so this process serves its own metrics
+        self.metrics_port = int(os.environ.get('METRICS_PORT', 9200))
+        self.metrics_server = None
+        self.scheduler = None
+        self.chain_scheduler = None
+        self.cycle_queue = None
+        self.cycle_worker = None
+        if self.mode == 'queue':
+            self.cycle_queue = CycleQueue(
+                lease_seconds=int(os.environ.get('CYCLE_TASK_LEASE_SECONDS', 300)),
+                max_attempts=int(os.environ.get('CYCLE_TASK_MAX_ATTEMPTS', 3))
+            )
+            self.cycle_worker = CycleWorker(
+                app, self.cycle_queue, self.lease.holder,
+                threads=int(os.environ.get('CYCLE_WORKER_THREADS', 4))
+            )
+        if self.mode in ('adaptive', 'queue'):
+            base_interval = self.interval_minutes * 60
+            # Queued cycles are bounded by the workers' threads rather than by this process
+            default_concurrency = os.environ.get('AI_CYCLE_MAX_WORKERS', 4) if self.mode == 'adaptive' else 1000
+            self.chain_scheduler = ChainScheduler(
+                app,
+                base_interval=base_interval,
+                min_interval=int(os.environ.get('CHAIN_MIN_INTERVAL_SECONDS', 30)),
+                max_interval=int(os.environ.get('CHAIN_MAX_INTERVAL_SECONDS', base_interval * 4)),
+                max_concurrency=int(os.environ.get('AGENT_MAX_CONCURRENT_CHAINS', default_concurrency)),
+                queue=self.cycle_queue
+            )
+
+    def run_cycle(self):
+        """Run one AI cycle if this process is the leader"""
+        if not self.lease.acquire():
+            return False
+        from app import run_ai_cycle
+        run_ai_cycle(self.app)
+        return True
+
+    def run_due_chains(self):
+        """Start due chain cycles if this process is the leader; renewal runs on its own job"""
+        if not self.lease.is_leader:
+            return 0
+        return self.chain_scheduler.tick()
+
+    def start(self, blocking=False):
+        """Schedule lease renewal and AI cycles; blocking mode runs until interrupted"""
+        self.scheduler = BlockingScheduler() if blocking else BackgroundScheduler()
+        # Renewing well within the TTL keeps the lease and lets a standby take over quickly
+        self.scheduler.add_job(self.lease.acquire, 'interval', seconds=max(self.lease.ttl // 3, 1))
+        if self.chain_scheduler:
+            self.lease.acquire()
+            self.scheduler.add_job(
+                self.run_due_chains, 'interval', seconds=float(os.environ.get('SCHEDULER_TICK_SECONDS', 1)),
+                max_instances=1, coalesce=True
+            )
+            self.scheduler.add_job(self.record_portfolio, 'interval', minutes=self.interval_minutes, max_instances=1, coalesce=True)
+        if self.cycle_queue:
+            self.scheduler.add_job(self.prune_tasks, 'interval', hours=1, max_instances=1, coalesce=True)
+            self.cycle_worker.start()
+        if not self.chain_scheduler:
+            self.scheduler.add_job(self.run_cycle, 'interval', minutes=self.interval_minutes, max_instances=1, coalesce=True)
+        atexit.register(self.stop)
+        self.trace_exporter.start()
+        if self.metrics_port:
+            try:
+                self.metrics_server = serve_metrics(self.metrics_port)
+            except OSError as e:
+                print(f"Error serving metrics on port {self.metrics_port}: {str(e)}")
+        self.scheduler.start()
+
+    def record_portfolio(self):
+        if self.lease.is_leader:
+            self.chain_scheduler.record_portfolio()
+
+    def prune_tasks(self):
+        if self.lease.is_leader:
+            retention = timedelta(hours=int(os.environ.get('CYCLE_TASK_RETENTION_HOURS', 24)))
+            with self.app.app_context():
+                self.cycle_queue.prune(datetime.utcnow() - retention)
+
+    def stop(self):
+        if self.scheduler and self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+        if self.cycle_worker:
+            self.cycle_worker.stop()
+        if self.chain_scheduler:
+            self.chain_scheduler.shutdown()
+        self.trace_exporter.stop()
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+            self.metrics_server.server_close()
+            self.metrics_server = None
+        self.lease.release()
+
+if __name__ == '__main__':
+    from main import bootstrap
+    try:
+        app = bootstrap()
+    except Exception as e:
+        print(f"Error during initialization: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    worker = AgentWorker(app)
+    print(f"Agent worker {worker.lease.holder} running {worker.mode} cycles around every {worker.interval_minutes} minutes")
+    try:
+        worker.start(blocking=True)
+    except (KeyboardInterrupt, SystemExit):
+        worker.stop()
@@ -0,0 +1,150 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from base_models import AIDecision, DecisionRollup, PortfolioRollup, PortfolioSnapshot, Transaction, TransactionRollup, db
+
+PERIODS = ('hour', 'day')
+
+def bucket_start(timestamp, period):
+    """Truncate a timestamp to the start of its hourly or daily bucket"""
+    if period == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+class AnalyticsRollups:
+    """Incrementally maintained hourly and daily aggregates of ledger, decisions and portfolio"""
+
+    def apply_transactions(self, rows):
+        """Fold ledger rows into transaction rollups within the caller's DB transaction"""
+        groups = defaultdict(lambda: {'count': 0, 'amount_total': 0.0, 'gas_used_total': 0, 'gas_cost_total': 0.0})
+        for row in rows:
+            timestamp = row.get('timestamp') or datetime.utcnow()
+            gas_used = row.get('gas_used') or 0
+            gas_price = (row.get('details') or {}).get('effective_gas_price') or 0
+            for period in PERIODS:
+                totals = groups[(period, bucket_start(timestamp, period), row['chain_id'], row['type'], row['status'])]
+                totals['count'] += 1
+                totals['amount_total'] += row.get('amount') or 0.0
+                totals['gas_used_total'] += gas_used
+                totals['gas_cost_total'] += gas_used * gas_price / 10**18
+
+        for (period, start, chain_id, tx_type, status), totals in groups.items():
+            self._increment(
+                TransactionRollup,
+                {'period': period, 'bucket_start': start, 'chain_id': chain_id, 'type': tx_type, 'status': status},
+                totals
+            )
+
+    def record_decision(self, record):
+        """Decision listener: count a recorded decision and whether it was approved"""
+        try:
+            for period in PERIODS:
+                self._increment(
+                    DecisionRollup,
+                    {
+                        'period': period,
+                        'bucket_start': bucket_start(record['timestamp'] or datetime.utcnow(), period),
+                        'chain_id': record.get('chain_id') or 0,
+                        'decision_type': record['decision_type']
+                    },
+                    {
+                        'count': 1,
+                        'executed_count': 1 if record.get('should_execute') else 0,
+                        'confidence_total': record.get('confidence') or 0.0
+                    }
+                )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error updating decision rollups: {str(e)}")
+
+    def apply_snapshots(self, snapshots, timestamp):
+        """Fold portfolio snapshots into open/close/min/max rollups within the caller's DB transaction"""
+        for snapshot in snapshots:
+            usd = snapshot.get('usd_value')
+            balance = snapshot['balance']
+            for period in PERIODS:
+                keys = {
+                    'period': period,
+                    'bucket_start': bucket_start(timestamp, period),
+                    'chain_id': snapshot.get('chain_id') or 0
+                }
+                updates = {
+                    PortfolioRollup.close_balance: balance,
+                    PortfolioRollup.samples: PortfolioRollup.samples + 1
+                }
+                if usd is not None:
+                    updates.update({
+                        PortfolioRollup.open_usd: db.case((PortfolioRollup.open_usd.is_(None), usd), else_=PortfolioRollup.open_usd),
+                        PortfolioRollup.close_usd: usd,
+                        PortfolioRollup.min_usd: db.case(
+                            (db.or_(PortfolioRollup.min_usd.is_(None), PortfolioRollup.min_usd > usd), usd),
+                            else_=PortfolioRollup.min_usd
+                        ),
+                        PortfolioRollup.max_usd: db.case(
+                            (db.or_(PortfolioRollup.max_usd.is_(None), PortfolioRollup.max_usd < usd), usd),
+                            else_=PortfolioRollup.max_usd
+                        )
+                    })
+                self._upsert(PortfolioRollup, keys, updates, {
+                    'open_usd': usd, 'close_usd': usd, 'min_usd': usd, 'max_usd': usd,
+                    'open_balance': balance, 'close_balance': balance, 'samples': 1
+                })
+
+    def rebuild(self, batch_size=1000):
+        """Recompute every rollup from raw rows, e.g. after deploying this on an existing database"""
+        try:
+            for model in (TransactionRollup, DecisionRollup, PortfolioRollup):
+                model.query.delete()
+
+            batch = []
+            for tx in Transaction.query.order_by(Transaction.id).yield_per(batch_size):
+                batch.append({
+                    'timestamp': tx.timestamp, 'chain_id': tx.chain_id, 'type': tx.type, 'status': tx.status,
+                    'amount': tx.amount, 'gas_used': tx.gas_used, 'details': tx.details
+                })
+                if len(batch) >= batch_size:
+                    self.apply_transactions(batch)
+                    batch = []
+            self.apply_transactions(batch)
+
+            # Raw decisions don't record whether they were approved or their chain
+            for decision in AIDecision.query.order_by(AIDecision.id).yield_per(batch_size):
+                for period in PERIODS:
+                    self._increment(
+                        DecisionRollup,
+                        {'period': period, 'bucket_start': bucket_start(decision.timestamp, period),
+                         'chain_id': 0, 'decision_type': decision.decision_type},
+                        {'count': 1, 'executed_count': 0, 'confidence_total': decision.confidence}
+                    )
+
+            for snapshot in PortfolioSnapshot.query.order_by(PortfolioSnapshot.timestamp, PortfolioSnapshot.id).yield_per(batch_size):
+                self.apply_snapshots(
+                    [{'chain_id': snapshot.chain_id, 'balance': snapshot.balance, 'usd_value': snapshot.usd_value}],
+                    snapshot.timestamp
+                )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error rebuilding analytics rollups: {str(e)}")
+            raise
+
+    def _increment(self, model, keys, increments):
+        self._upsert(
+            model,
+            keys,
+            {getattr(model, column): getattr(model, column) + value for column, value in increments.items()},
+            increments
+        )
+
+    def _upsert(self, model, keys, updates, inserts):
+        """Update a rollup row in place, inserting it on first use"""
+        query = model.query.filter_by(**keys)
+        if query.update(updates, synchronize_session=False):
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.add(model(**keys, **inserts))
+        except IntegrityError:
+            # Another writer inserted the bucket first
+            query.update(updates, synchronize_session=False)
@@ -1,6 +1,15 @@
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, Response, jsonify, request, render_template, current_app
 from base_models import db, Chain, WalletConfig, Transaction, Memory, AIDecision, Contract, RiskParameter
-from apscheduler.schedulers.background import BackgroundScheduler
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from compilation_service import CompilationQueueFull, CompilationTimeout
+from database import database_health, replica_reads
+from response_cache import ResponseCache
+from metrics import CYCLE_STAGE_LATENCY, instrument_database, registry as metrics_registry
+from tracing import tracer
+from datetime import datetime, timedelta
+import base64
+import json
 import os
 
 # Global components
@@ -9,28 +18,228 @@ chain_scanner = None
 decision_engine = None
 transaction_executor = None
 contract_manager = None
+ledger_writer = None
+chain_registry = None
+job_manager = None
+event_broadcaster = None
+event_feed = None
+portfolio_history = None
+analytics = None
+component_registry = None
 
-def init_app_components():
-    """Initialize application components"""
-    global wallet_manager, chain_scanner, decision_engine, transaction_executor, contract_manager
+# Serialized bodies of read-mostly endpoints, invalidated by the writes that change them
+response_cache = ResponseCache()
+
+def init_app_components(lazy=None):
+    """Initialize application components
+
+    Components that import web3, solcx or eth_account, or that touch chains
+    when constructed, are registered as lazy components and built on first
+    use. Unless lazy (LAZY_INIT=1), they are all built here before returning.
+    """
+    global wallet_manager, chain_scanner, decision_engine, transaction_executor, contract_manager, ledger_writer, chain_registry, job_manager, event_broadcaster, event_feed, portfolio_history, analytics, component_registry
+    
+    if lazy is None:
+        lazy = os.environ.get('LAZY_INIT', '0') == '1'
     
     try:
-        from wallet_manager import WalletManager
-        from chain_scanner import ChainScanner
-        from decision_engine import DecisionEngine
-        from transaction_executor import TransactionExecutor
-        from contract_manager import ContractManager
-        
-        wallet_manager = WalletManager()
-        chain_scanner = ChainScanner()
-        decision_engine = DecisionEngine()
-        transaction_executor = TransactionExecutor(wallet_manager)
-        contract_manager = ContractManager(wallet_manager)
-        return True
+        from ledger_writer import LedgerWriter
+        from job_manager import JobManager
+        from event_broadcaster import EventBroadcaster, DatabaseEventFeed, record_stream_event
+        from portfolio_history import PortfolioHistory
+        from analytics import AnalyticsRollups
+        from components import ComponentRegistry, unwrap
+        
+        app = current_app._get_current_object()
+        instrument_database()
+        analytics = AnalyticsRollups()
+        ledger_writer = LedgerWriter(app, rollups=analytics)
+        job_manager = JobManager(app)
+        portfolio_history = PortfolioHistory(rollups=analytics)
+        
+        # Push ledger rows, pending transactions, decisions and job updates to dashboards.
+        # Ledger rows and decisions are tailed from the database, since cycles
+        # may run in a separate agent worker process.
+        # Each stream holds a server thread, so leave threads free for the API
+        web_threads = int(os.environ.get('WEB_THREADS', 32))
+        event_broadcaster = EventBroadcaster(
+            max_buffer=int(os.environ.get('SSE_CLIENT_BUFFER', 256)),
+            max_clients=min(int(os.environ.get('SSE_MAX_CLIENTS', web_threads // 2)), max(web_threads - 1, 1))
+        )
+        event_feed = DatabaseEventFeed(app, event_broadcaster)
+        event_feed.add_listener(lambda kind, batch: response_cache.invalidate(
+            'portfolio' if kind == 'portfolio' else 'transactions'
+        ))
+        event_feed.add_listener(lambda kind, batch: response_cache.invalidate('analytics'))
+        job_manager.add_listener(lambda event: event_broadcaster.publish('job', event))
+        job_manager.add_listener(lambda event: record_stream_event('job', event))
+        
+        def build_simulation_engine():
+            try:
+                from simulation_engine import SimulationEngine
+                return SimulationEngine()
+            except ImportError as e:
+                print(f"Transaction simulation disabled: {str(e)}")
+                return False
+        
+        def build_wallet_manager():
+            from wallet_manager import WalletManager
+            return WalletManager()
+        
+        def build_chain_registry():
+            from chain_context import ChainRegistry
+            return ChainRegistry(unwrap(wallet_manager))
+        
+        def build_chain_scanner():
+            from chain_scanner import ChainScanner
+            return ChainScanner()
+        
+        def build_decision_engine():
+            from decision_engine import DecisionEngine
+            engine = DecisionEngine()
+            engine.add_listener(analytics.record_decision)
+            return engine
+        
+        def build_transaction_executor():
+            from transaction_executor import TransactionExecutor
+            executor = TransactionExecutor(
+                unwrap(wallet_manager), ledger_writer, unwrap(simulation_engine) or None, unwrap(chain_registry)
+            )
+            executor.add_listener(lambda event: event_broadcaster.publish('transaction', event))
+            # Reaches web processes' feeds when the executor runs in an agent worker
+            executor.add_listener(lambda event: record_stream_event('transaction', event))
+            return executor
+        
+        def build_contract_manager():
+            from contract_manager import ContractManager
+            manager = ContractManager(unwrap(wallet_manager), unwrap(simulation_engine) or None, unwrap(chain_registry))
+            # Optionally warm compiler versions in the background; startup never waits on solc
+            prefetch_versions = [v for v in os.environ.get('SOLC_PREFETCH_VERSIONS', '').split(',') if v.strip()]
+            if prefetch_versions:
+                manager.toolchain.prefetch([v.strip() for v in prefetch_versions])
+            return manager
+        
+        component_registry = ComponentRegistry(app)
+        # A missing optional dependency builds as False, since None reads as "not built yet"
+        simulation_engine = component_registry.register('simulation_engine', build_simulation_engine)
+        wallet_manager = component_registry.register('wallet_manager', build_wallet_manager)
+        chain_registry = component_registry.register('chain_registry', build_chain_registry)
+        chain_scanner = component_registry.register('chain_scanner', build_chain_scanner)
+        decision_engine = component_registry.register('decision_engine', build_decision_engine)
+        transaction_executor = component_registry.register('transaction_executor', build_transaction_executor)
+        contract_manager = component_registry.register('contract_manager', build_contract_manager)
+        
+        if lazy:
+            return True
+        return component_registry.warm()
     except Exception as e:
         print(f"Error initializing components: {str(e)}")
         return False
 
+@contextmanager
+def cycle_stage(stage):
+    """Time an AI cycle stage as both a metric and a trace span"""
+    with CYCLE_STAGE_LATENCY.time(stage=stage), tracer.span(stage) as span:
+        yield span
+
+def run_chain_cycle(app, context, parent_span=None, observer=None, execution_guard=None):
+    """Scan, decide and execute for a single chain context, returning its portfolio snapshot
+
+    observer, if given, is called with the scanned chain data and the decision.
+    execution_guard, if given, is called before executing and may veto it.
+    """
+    with app.app_context():
+        try:
+            with tracer.span('chain', parent=parent_span, chain_id=context.chain_id, chain=context.name):
+                # Scan chain data
+                with cycle_stage('scan'):
+                    chain_data = chain_scanner.scan_latest_data(context)
+                tracer.tag(block_number=chain_data.get('block_number'))
+                
+                # Get AI decision
+                with cycle_stage('decide'):
+                    decision = decision_engine.make_decision(chain_data, context)
+                tracer.tag(decision_id=decision.decision_id, should_execute=decision.should_execute)
+                if observer:
+                    observer(chain_data, decision)
+                
+                # Execute approved actions that pass risk validation,
+                # bundling compatible ones into a single transaction
+                if decision.should_execute and execution_guard and not execution_guard():
+                    tracer.tag(execution_skipped=True)
+                elif decision.should_execute:
+                    with cycle_stage('execute'):
+                        transaction_executor.execute_actions(decision.actions, context)
+                
+                with cycle_stage('balance'):
+                    balance = wallet_manager.get_balance(context)
+                price = chain_data.get('market_data', {}).get('avalanche-2', {}).get('usd')
+                return {
+                    'chain_id': context.chain_id,
+                    'balance': balance,
+                    'usd_value': balance * price if price and context.symbol == 'AVAX' else None,
+                    'block_number': chain_data.get('block_number')
+                }
+                
+        except Exception as chain_error:
+            print(f"Error processing chain {context.name}: {str(chain_error)}")
+            return None
+
+def run_ai_cycle(app):
+    """Execute one cycle of the AI agent's decision-making process across all chains
+
+    Scheduled by agent_worker.AgentWorker with AGENT_SCHEDULER=fixed, which
+    only runs it in the process holding the leader lease. The default
+    adaptive scheduler runs run_chain_cycle per chain instead.
+    """
+    with app.app_context():
+        if not all([chain_scanner, decision_engine, transaction_executor]):
+            print("Components not initialized")
+            return
+
+        try:
+            # Each chain runs on its own immutable context, so chains
+            # are processed in parallel without sharing mutable state
+            contexts = chain_registry.active_contexts()
+            if not contexts:
+                return
+            max_workers = int(os.environ.get('AI_CYCLE_MAX_WORKERS', 4))
+            with tracer.trace('ai_cycle', chains=len(contexts)):
+                with cycle_stage('chains') as chains_span:
+                    with ThreadPoolExecutor(max_workers=min(max_workers, len(contexts))) as pool:
+                        snapshots = list(pool.map(
+                            lambda context: run_chain_cycle(app, context, chains_span), contexts
+                        ))
+                
+                with cycle_stage('record'):
+                    portfolio_history.record(snapshots)
+                
+        except Exception as e:
+            print(f"Error in AI cycle: {str(e)}")
+
+def start_web_services(app):
+    """Start background services the web tier needs, independent of the agent worker"""
+    # Ledger rows and decisions may be written by another process
+    if event_feed:
+        event_feed.start()
+    # Lazily initialized components are built in the background so readiness
+    # turns green without waiting for the first request to need them
+    if component_registry:
+        component_registry.warm_in_background()
+
+def encode_cursor(timestamp, row_id):
+    """Encode a (timestamp, id) keyset position as an opaque cursor"""
+    payload = json.dumps([timestamp.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+def decode_cursor(cursor):
+    """Decode a cursor from encode_cursor, raising ValueError if malformed"""
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
 def configure_routes(app):
     @app.route('/')
     def index():
@@ -48,6 +257,78 @@ def configure_routes(app):
     def risk_parameters():
         return render_template('risk_parameters.html')
 
+    @app.route('/healthz')
+    def healthz():
+        """Liveness: the process is up and serving requests"""
+        return jsonify({"status": "ok"})
+
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus text-format metrics for this process"""
+        return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/api/cycles')
+    def get_cycles():
+        """Recent AI cycle timelines with the slowest stages across them"""
+        from base_models import CycleTrace
+        
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), 200)
+            traces = CycleTrace.query.order_by(CycleTrace.started_at.desc(), CycleTrace.id.desc()).limit(limit).all()
+            
+            durations = {}
+            spans = []
+            def collect(span, trace_id):
+                for child in span['children']:
+                    durations.setdefault(child['name'], []).append(child['duration_ms'])
+                    spans.append({'trace_id': trace_id, **{k: v for k, v in child.items() if k != 'children'}})
+                    collect(child, trace_id)
+            for trace in traces:
+                collect(trace.spans, trace.trace_id)
+            
+            stages = []
+            for name, values in durations.items():
+                values.sort()
+                stages.append({
+                    'name': name,
+                    'count': len(values),
+                    'avg_ms': round(sum(values) / len(values), 3),
+                    'p95_ms': values[min(int(len(values) * 0.95), len(values) - 1)],
+                    'max_ms': values[-1]
+                })
+            stages.sort(key=lambda stage: stage['avg_ms'], reverse=True)
+            
+            return jsonify({
+                'cycles': [{
+                    'trace_id': trace.trace_id,
+                    'name': trace.name,
+                    'started_at': trace.started_at.isoformat(),
+                    'duration_ms': trace.duration_ms,
+                    'status': trace.status,
+                    'spans': trace.spans
+                } for trace in traces],
+                'slowest_stages': stages,
+                'slowest_spans': sorted(spans, key=lambda span: span['duration_ms'], reverse=True)[:10]
+            })
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/readyz')
+    def readyz():
+        """Readiness: the primary database answers and every component has been built
+
+        A failing read replica is reported but doesn't make the process unready.
+        """
+        database = database_health()
+        components = component_registry.status() if component_registry else {}
+        ready = database['primary']['status'] == 'ok' and bool(component_registry) and component_registry.all_warm()
+        return jsonify({
+            "ready": ready,
+            "database": database,
+            "components": components,
+            "startup": current_app.config.get('STARTUP_PROFILE', {})
+        }), 200 if ready else 503
+
     @app.route('/api/contracts/compile', methods=['POST'])
     def compile_contract():
         if not contract_manager:
@@ -55,7 +336,7 @@ def configure_routes(app):
         
         try:
             data = request.get_json()
-            if not data or 'source_code' not in data or 'contract_name' not in data:
+            if not data or 'contract_name' not in data or not ('source_code' in data or 'sources' in data):
                 return jsonify({"error": "Missing required fields"}), 400
                 
             # Validate contract name
@@ -63,23 +344,31 @@ def configure_routes(app):
                 return jsonify({"error": "Contract name must be alphanumeric"}), 400
                 
             # Validate source code
-            if len(data['source_code'].strip()) < 10:
-                return jsonify({"error": "Source code is too short"}), 400
+            sources = data.get('sources')
+            if sources is not None:
+                if not isinstance(sources, dict) or not all(isinstance(v, str) for v in sources.values()):
+                    return jsonify({"error": "Sources must map file names to source code"}), 400
+                source_code = None
+            else:
+                source_code = data['source_code']
+                if len(source_code.strip()) < 10:
+                    return jsonify({"error": "Source code is too short"}), 400
                 
+            context = chain_registry.get(data.get('chain_id'))
             compiled = contract_manager.compile_contract(
-                data['source_code'],
-                data['contract_name']
+                source_code,
+                data['contract_name'],
+                sources=sources,
+                optimizer=data.get('optimizer')
             )
             
-            # Save contract details in database
+            # Save contract details in database, sharing identical artifacts
+            artifact = contract_manager.store_artifact(compiled)
             contract = Contract(
                 name=data['contract_name'],
-                abi=compiled['abi'],
-                bytecode=compiled['bytecode'],
-                chain_id=wallet_manager.chain_id,
-                verified=False,
-                address='0x0000000000000000000000000000000000000000',  # Placeholder until deployed
-                transaction_hash='0x0000000000000000000000000000000000000000000000000000000000000000'  # Placeholder
+                artifact_id=artifact.id,
+                chain_id=context.chain_id,
+                verified=False
             )
             db.session.add(contract)
             db.session.commit()
@@ -87,8 +376,13 @@ def configure_routes(app):
             return jsonify({
                 "success": True,
                 "message": "Contract compiled successfully",
+                "contract_id": contract.id,
                 "data": compiled
             })
+        except CompilationQueueFull as e:
+            return jsonify({"error": "Compiler busy", "details": str(e)}), 429
+        except CompilationTimeout as e:
+            return jsonify({"error": "Compilation timed out", "details": str(e)}), 504
         except Exception as e:
             db.session.rollback()
             error_message = str(e)
@@ -103,27 +397,53 @@ def configure_routes(app):
         
         try:
             data = request.get_json()
-            if not data or 'compiled_contract' not in data:
+            if not data or ('compiled_contract' not in data and not data.get('contract_id')):
                 return jsonify({"error": "Missing required fields"}), 400
                 
-            constructor_args = data.get('constructor_args', [])
-            deployment = contract_manager.deploy_contract(
-                data['compiled_contract'],
-                constructor_args
-            )
-            
-            # Update contract in database
-            contract = Contract.query.filter_by(
-                chain_id=wallet_manager.chain_id,
-                address='0x0000000000000000000000000000000000000000'
-            ).first()
-            
-            if contract:
-                contract.address = deployment['contract_address']
-                contract.transaction_hash = deployment['transaction_hash']
+            # Deploy into the row created at compile time, or a fresh one
+            if data.get('contract_id'):
+                contract = db.session.get(Contract, data['contract_id'])
+                if not contract:
+                    return jsonify({"error": "Contract not found"}), 404
+                if contract.address:
+                    return jsonify({"error": "Contract already deployed"}), 409
+                # Deploy what the row records, so its artifact always matches the chain
+                compiled_contract = contract_manager.artifact_for(contract)
+                if not compiled_contract.get('bytecode'):
+                    return jsonify({"error": "Contract has no stored bytecode"}), 409
+                submitted = data.get('compiled_contract')
+                if submitted and (submitted.get('abi'), submitted.get('bytecode')) != (
+                    compiled_contract['abi'], compiled_contract['bytecode']
+                ):
+                    return jsonify({"error": "compiled_contract does not match the contract's stored artifact"}), 400
+                context = chain_registry.get(contract.chain_id)
+            else:
+                compiled_contract = data['compiled_contract']
+                context = chain_registry.get(data.get('chain_id'))
+                artifact = contract_manager.store_artifact(compiled_contract)
+                contract = Contract(
+                    name=data.get('contract_name', 'Contract'),
+                    artifact_id=artifact.id,
+                    chain_id=context.chain_id,
+                    verified=False
+                )
+                db.session.add(contract)
                 db.session.commit()
             
-            return jsonify(deployment)
+            job_id = job_manager.submit(
+                'deploy',
+                contract_manager.run_deploy_job,
+                contract.id,
+                compiled_contract,
+                data.get('constructor_args', []),
+                context,
+                contract_id=contract.id
+            )
+            return jsonify({
+                "job_id": job_id,
+                "contract_id": contract.id,
+                "status_url": f"/api/jobs/{job_id}"
+            }), 202
         except Exception as e:
             db.session.rollback()
             return jsonify({"error": str(e)}), 400
@@ -138,27 +458,91 @@ def configure_routes(app):
             if not data or 'contract_address' not in data or 'compiled_contract' not in data:
                 return jsonify({"error": "Missing required fields"}), 400
                 
-            is_verified = contract_manager.verify_contract(
+            context = chain_registry.get(data.get('chain_id'))
+            contract = Contract.query.filter_by(
+                address=data['contract_address'],
+                chain_id=context.chain_id
+            ).first()
+            contract_id = contract.id if contract else None
+            
+            job_id = job_manager.submit(
+                'verify',
+                contract_manager.run_verify_job,
+                contract_id,
                 data['contract_address'],
-                data['compiled_contract']
+                data['compiled_contract'],
+                context,
+                contract_id=contract_id
             )
+            return jsonify({
+                "job_id": job_id,
+                "contract_id": contract_id,
+                "status_url": f"/api/jobs/{job_id}"
+            }), 202
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 400
+
+    @app.route('/api/contracts/verify/batch', methods=['POST'])
+    def verify_contracts_batch():
+        if not contract_manager:
+            return jsonify({"error": "Contract manager not initialized"}), 500
+        
+        try:
+            data = request.get_json()
+            if not data or not isinstance(data.get('contracts'), list) or not data['contracts']:
+                return jsonify({"error": "Missing required fields"}), 400
+            if len(data['contracts']) > 500:
+                return jsonify({"error": "At most 500 contracts per batch"}), 400
             
-            if is_verified:
-                # Update contract verification status
-                contract = Contract.query.filter_by(
-                    address=data['contract_address'],
-                    chain_id=wallet_manager.chain_id
-                ).first()
-                
-                if contract:
-                    contract.verified = True
-                    db.session.commit()
+            # Each entry names a stored contract, or gives address, artifact and chain directly
+            items = []
+            for entry in data['contracts']:
+                if entry.get('contract_id'):
+                    contract = db.session.get(Contract, entry['contract_id'])
+                    if not contract or not contract.address:
+                        return jsonify({"error": f"Contract {entry['contract_id']} not found or not deployed"}), 404
+                    items.append((
+                        contract.id,
+                        chain_registry.get(contract.chain_id),
+                        contract.address,
+                        contract_manager.artifact_for(contract)
+                    ))
+                elif 'contract_address' in entry and 'compiled_contract' in entry:
+                    context = chain_registry.get(entry.get('chain_id'))
+                    contract = Contract.query.filter_by(
+                        address=entry['contract_address'],
+                        chain_id=context.chain_id
+                    ).first()
+                    items.append((
+                        contract.id if contract else None,
+                        context,
+                        entry['contract_address'],
+                        entry['compiled_contract']
+                    ))
+                else:
+                    return jsonify({"error": "Each contract needs contract_id or contract_address and compiled_contract"}), 400
             
-            return jsonify({"verified": is_verified})
+            job_id = job_manager.submit('verify_batch', contract_manager.run_batch_verify_job, items)
+            return jsonify({
+                "job_id": job_id,
+                "total": len(items),
+                "status_url": f"/api/jobs/{job_id}"
+            }), 202
         except Exception as e:
             db.session.rollback()
             return jsonify({"error": str(e)}), 400
 
+    @app.route('/api/jobs/<job_id>')
+    def get_job(job_id):
+        if not job_manager:
+            return jsonify({"error": "Job manager not initialized"}), 500
+        
+        status = job_manager.get_status(job_id)
+        if not status:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(status)
+
     @app.route('/api/wallet/balance')
     @app.route('/api/wallet/balance/<int:chain_id>')
     def get_balance(chain_id=None):
@@ -166,50 +550,264 @@ def configure_routes(app):
             return jsonify({"error": "Wallet manager not initialized"}), 500
         
         try:
-            original_chain_id = wallet_manager.chain_id
-            try:
-                if chain_id is not None:
-                    wallet_manager.switch_chain(chain_id)
-                balance = wallet_manager.get_balance()
-                current_chain = wallet_manager.chain
-                return jsonify({
-                    "balance": balance,
-                    "chain_id": current_chain.id,
-                    "symbol": current_chain.symbol,
-                    "network_id": current_chain.network_id
-                })
-            finally:
-                if chain_id is not None:
-                    wallet_manager.switch_chain(original_chain_id)
+            context = chain_registry.get(chain_id)
+            balance = wallet_manager.get_balance(context)
+            return jsonify({
+                "balance": balance,
+                "chain_id": context.chain_id,
+                "symbol": context.symbol,
+                "network_id": context.network_id
+            })
         except Exception as e:
             return jsonify({"error": str(e)}), 400
 
+    @app.route('/api/wallet/balances')
+    def get_all_balances():
+        if not wallet_manager:
+            return jsonify({"error": "Wallet manager not initialized"}), 500
+        
+        try:
+            return jsonify(wallet_manager.get_all_balances(chain_registry.active_contexts()))
+        except Exception as e:
+            return jsonify({"error": str(e)}), 400
+
+    @app.route('/api/events')
+    def stream_events():
+        """Server-Sent Events stream of transactions, balances, decisions and jobs"""
+        if not event_broadcaster:
+            return jsonify({"error": "Event broadcaster not initialized"}), 500
+        
+        subscription = event_broadcaster.subscribe(request.headers.get('Last-Event-ID', type=int))
+        if subscription is None:
+            return jsonify({"error": "Too many event stream clients"}), 503
+        return Response(
+            event_broadcaster.stream(subscription),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
     @app.route('/api/wallet/chains')
     def get_supported_chains():
         if not wallet_manager:
             return jsonify({"error": "Wallet manager not initialized"}), 500
         
-        chains = wallet_manager.get_supported_chains()
-        return jsonify(chains)
+        # Chains only change through offline setup scripts, so let clients reuse them briefly
+        return response_cache.respond(
+            'chains',
+            replica_reads()(wallet_manager.get_supported_chains),
+            ttl=300,
+            cache_control='public, max-age=60'
+        )
 
     @app.route('/api/transactions/recent')
     def get_recent_transactions():
-        transactions = Transaction.query.order_by(Transaction.timestamp.desc()).limit(10).all()
-        return jsonify([{
-            'hash': tx.hash,
-            'type': tx.type,
-            'amount': tx.amount,
-            'timestamp': tx.timestamp.isoformat(),
-            'status': tx.status,
-            'chain_id': tx.chain_id
-        } for tx in transactions])
+        @replica_reads()
+        def build():
+            transactions = Transaction.query.order_by(Transaction.timestamp.desc()).limit(10).all()
+            return [{
+                'hash': tx.hash,
+                'type': tx.type,
+                'amount': tx.amount,
+                'timestamp': tx.timestamp.isoformat(),
+                'status': tx.status,
+                'chain_id': tx.chain_id
+            } for tx in transactions]
+        
+        return response_cache.respond('transactions', build, ttl=30)
+
+    @app.route('/api/transactions/history')
+    def get_transaction_history():
+        """Page through the ledger newest first using a (timestamp, id) cursor"""
+        @replica_reads()
+        def build():
+            limit = min(max(int(request.args.get('limit', 50)), 1), 200)
+            query = Transaction.query
+        
+            chain_id = request.args.get('chain_id', type=int)
+            if chain_id is not None:
+                query = query.filter(Transaction.chain_id == chain_id)
+            if request.args.get('type'):
+                query = query.filter(Transaction.type == request.args['type'])
+            if request.args.get('status'):
+                query = query.filter(Transaction.status == request.args['status'])
+            if request.args.get('since'):
+                query = query.filter(Transaction.timestamp >= datetime.fromisoformat(request.args['since']))
+            if request.args.get('until'):
+                query = query.filter(Transaction.timestamp < datetime.fromisoformat(request.args['until']))
+        
+            # Seek past the last row of the previous page instead of using OFFSET
+            if request.args.get('cursor'):
+                timestamp, row_id = decode_cursor(request.args['cursor'])
+                query = query.filter(db.or_(
+                    Transaction.timestamp < timestamp,
+                    db.and_(Transaction.timestamp == timestamp, Transaction.id < row_id)
+                ))
+        
+            rows = query.order_by(Transaction.timestamp.desc(), Transaction.id.desc()).limit(limit + 1).all()
+            page = rows[:limit]
+            next_cursor = encode_cursor(page[-1].timestamp, page[-1].id) if len(rows) > limit else None
+        
+            return {
+                'transactions': [{
+                    'id': tx.id,
+                    'hash': tx.hash,
+                    'type': tx.type,
+                    'amount': tx.amount,
+                    'timestamp': tx.timestamp.isoformat(),
+                    'status': tx.status,
+                    'gas_used': tx.gas_used,
+                    'chain_id': tx.chain_id
+                } for tx in page],
+                'next_cursor': next_cursor
+            }
+        
+        try:
+            return response_cache.respond('transactions', build, ttl=30)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/api/portfolio/history')
+    def get_portfolio_history():
+        """Downsampled portfolio value over time, for the whole portfolio or one chain"""
+        if not portfolio_history:
+            return jsonify({"error": "Portfolio history not initialized"}), 500
+        
+        @replica_reads()
+        def build():
+            until = datetime.fromisoformat(request.args['until']) if request.args.get('until') else datetime.utcnow()
+            since = datetime.fromisoformat(request.args['since']) if request.args.get('since') else until - timedelta(days=7)
+            if since >= until:
+                raise ValueError("since must be before until")
+            field = request.args.get('field', 'usd_value')
+            if field not in ('usd_value', 'balance'):
+                raise ValueError("field must be usd_value or balance")
+            points = min(max(int(request.args.get('points', 300)), 10), 2000)
+            result = portfolio_history.series(
+                since, until, points,
+                chain_id=request.args.get('chain_id', type=int),
+                field=field
+            )
+            result.update({'since': since.isoformat(), 'until': until.isoformat(), 'field': field})
+            return result
+        
+        try:
+            return response_cache.respond('portfolio', build, ttl=60)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    def rollup_query(model):
+        """Filter a rollup table by the period, since, until and chain_id query parameters"""
+        period = request.args.get('period', 'day')
+        if period not in ('hour', 'day'):
+            raise ValueError("period must be hour or day")
+        until = datetime.fromisoformat(request.args['until']) if request.args.get('until') else datetime.utcnow()
+        since = datetime.fromisoformat(request.args['since']) if request.args.get('since') else until - timedelta(days=30)
+        query = model.query.filter(
+            model.period == period,
+            model.bucket_start >= since,
+            model.bucket_start < until
+        )
+        chain_id = request.args.get('chain_id', type=int)
+        if chain_id is not None:
+            query = query.filter(model.chain_id == chain_id)
+        return query.order_by(model.bucket_start)
+
+    @app.route('/api/analytics/transactions')
+    def get_transaction_analytics():
+        """Transaction counts, volume and gas spend per hour or day"""
+        from base_models import TransactionRollup
+        
+        @replica_reads()
+        def build():
+            query = rollup_query(TransactionRollup)
+            for field in ('type', 'status'):
+                if request.args.get(field):
+                    query = query.filter(getattr(TransactionRollup, field) == request.args[field])
+            return [{
+                'bucket_start': row.bucket_start.isoformat(),
+                'chain_id': row.chain_id,
+                'type': row.type,
+                'status': row.status,
+                'count': row.count,
+                'amount_total': row.amount_total,
+                'gas_used_total': row.gas_used_total,
+                'gas_cost_total': row.gas_cost_total
+            } for row in query.all()]
+        
+        try:
+            return response_cache.respond('analytics', build, ttl=60)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/api/analytics/decisions')
+    def get_decision_analytics():
+        """AI decision counts, execution rate and average confidence per hour or day"""
+        from base_models import DecisionRollup
+        
+        @replica_reads()
+        def build():
+            query = rollup_query(DecisionRollup)
+            if request.args.get('type'):
+                query = query.filter(DecisionRollup.decision_type == request.args['type'])
+            return [{
+                'bucket_start': row.bucket_start.isoformat(),
+                'chain_id': row.chain_id or None,
+                'decision_type': row.decision_type,
+                'count': row.count,
+                'executed_count': row.executed_count,
+                'execution_rate': row.executed_count / row.count if row.count else None,
+                'avg_confidence': row.confidence_total / row.count if row.count else None
+            } for row in query.all()]
+        
+        try:
+            return response_cache.respond('analytics', build, ttl=60)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/api/analytics/portfolio')
+    def get_portfolio_analytics():
+        """Portfolio open/close/min/max value and PnL per hour or day; omit chain_id for the total"""
+        from base_models import PortfolioRollup
+        
+        @replica_reads()
+        def build():
+            query = rollup_query(PortfolioRollup)
+            if request.args.get('chain_id') is None:
+                query = query.filter(PortfolioRollup.chain_id == 0)
+            return [{
+                'bucket_start': row.bucket_start.isoformat(),
+                'chain_id': row.chain_id or None,
+                'open_usd': row.open_usd,
+                'close_usd': row.close_usd,
+                'min_usd': row.min_usd,
+                'max_usd': row.max_usd,
+                'pnl_usd': row.close_usd - row.open_usd if row.open_usd is not None else None,
+                'open_balance': row.open_balance,
+                'close_balance': row.close_balance,
+                'samples': row.samples
+            } for row in query.all()]
+        
+        try:
+            return response_cache.respond('analytics', build, ttl=60)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
 
     @app.route('/api/risk-parameters', methods=['GET'])
     def get_risk_parameters():
         """Get all active risk parameters"""
-        try:
+        def build():
             params = RiskParameter.query.filter_by(active=True).all()
-            return jsonify([{
+            return [{
                 'id': param.id,
                 'parameter_type': param.parameter_type,
                 'value': param.value,
@@ -217,7 +815,10 @@ def configure_routes(app):
                 'max_value': param.max_value,
                 'default_value': param.default_value,
                 'description': param.description
-            } for param in params])
+            } for param in params]
+        
+        try:
+            return response_cache.respond('risk_parameters', build)
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
@@ -242,6 +843,7 @@ def configure_routes(app):
 
             param.value = new_value
             db.session.commit()
+            response_cache.invalidate('risk_parameters')
 
             return jsonify({
                 "success": True,
@@ -263,6 +865,7 @@ def configure_routes(app):
 
             param.value = param.default_value
             db.session.commit()
+            response_cache.invalidate('risk_parameters')
 
             return jsonify({
                 "success": True,
@@ -272,52 +875,11 @@ def configure_routes(app):
             db.session.rollback()
             return jsonify({"error": str(e)}), 500
 
-    def run_ai_cycle():
-        """Execute one cycle of the AI agent's decision-making process across all chains"""
-        with app.app_context():
-            if not all([chain_scanner, decision_engine, transaction_executor]):
-                print("Components not initialized")
-                return
-
-            try:
-                # Get all active chains
-                active_chains = Chain.query.filter_by(active=True).all()
-                
-                for chain in active_chains:
-                    try:
-                        # Switch to current chain
-                        chain_scanner.switch_chain(chain.id)
-                        transaction_executor.switch_chain(chain.id)
-                        
-                        # Scan chain data
-                        chain_data = chain_scanner.scan_latest_data()
-                        
-                        # Get AI decision
-                        decision = decision_engine.make_decision(chain_data)
-                        
-                        # Execute transaction if needed and passes risk validation
-                        if decision.should_execute:
-                            # Validate against risk parameters before execution
-                            if transaction_executor._validate_risk_parameters(decision.transaction_data):
-                                transaction_executor.execute_transaction(decision.transaction_data)
-                            else:
-                                print("Transaction rejected: Failed risk parameter validation")
-                            
-                    except Exception as chain_error:
-                        print(f"Error processing chain {chain.name}: {str(chain_error)}")
-                        continue
-                    
-            except Exception as e:
-                print(f"Error in AI cycle: {str(e)}")
-
-    # Initialize scheduler with app context
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(run_ai_cycle, 'interval', minutes=5)
-    scheduler.start()
-
     return app
 
 if __name__ == '__main__':
-    from main import create_app
-    app = create_app()
+    from main import bootstrap
+    app = bootstrap()
+    configure_routes(app)
+    start_web_services(app)
     app.run(host='0.0.0.0', port=5000)
@@ -1,14 +1,17 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from database import RoutingSession
 
 # Initialize SQLAlchemy
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 def init_db(app):
-    """Initialize database with app context"""
+    """Initialize database with app context, upgrading tables created by older versions"""
+    from schema_upgrades import upgrade_schema
     db.init_app(app)
     with app.app_context():
         db.create_all()
+        upgrade_schema()
 
 class Chain(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -37,6 +40,14 @@ class Transaction(db.Model):
     details = db.Column(db.JSON)
     chain_id = db.Column(db.Integer, db.ForeignKey('chain.id'), nullable=False)
 
+    # Support keyset pagination on (timestamp, id), alone or behind a filter
+    __table_args__ = (
+        db.Index('ix_transaction_timestamp_id', 'timestamp', 'id'),
+        db.Index('ix_transaction_chain_timestamp', 'chain_id', 'timestamp', 'id'),
+        db.Index('ix_transaction_status_timestamp', 'status', 'timestamp', 'id'),
+        db.Index('ix_transaction_type_timestamp', 'type', 'timestamp', 'id'),
+    )
+
 class Memory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     memory_type = db.Column(db.String(50), nullable=False)
@@ -54,14 +65,27 @@ class AIDecision(db.Model):
     reasoning = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
-class Contract(db.Model):
+class ContractArtifact(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    address = db.Column(db.String(42), nullable=False)
-    name = db.Column(db.String(255), nullable=False)
+    artifact_hash = db.Column(db.String(64), nullable=False, unique=True)
     abi = db.Column(db.JSON, nullable=False)
     bytecode = db.Column(db.Text, nullable=False)
+    # Runtime code and immutable offsets used for bytecode verification
+    deployed_bytecode = db.Column(db.Text)
+    immutable_references = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Contract(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    # Null until a deploy job sets it
+    address = db.Column(db.String(42))
+    name = db.Column(db.String(255), nullable=False)
+    # Legacy inline copies; new rows reference a shared ContractArtifact instead
+    abi = db.Column(db.JSON)
+    bytecode = db.Column(db.Text)
+    artifact_id = db.Column(db.Integer, db.ForeignKey('contract_artifact.id'))
     deployed_at = db.Column(db.DateTime, default=datetime.utcnow)
-    transaction_hash = db.Column(db.String(66), nullable=False)
+    transaction_hash = db.Column(db.String(66))
     chain_id = db.Column(db.Integer, db.ForeignKey('chain.id'), nullable=False)
     verified = db.Column(db.Boolean, default=False)
     
@@ -69,6 +93,119 @@ class Contract(db.Model):
         db.UniqueConstraint('address', 'chain_id', name='uq_contract_address_chain'),
     )
 
+class Job(db.Model):
+    id = db.Column(db.String(32), primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    contract_id = db.Column(db.Integer, db.ForeignKey('contract.id'))
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+class PortfolioSnapshot(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    # Null chain_id marks the all-chains total for a cycle
+    chain_id = db.Column(db.Integer, db.ForeignKey('chain.id'))
+    balance = db.Column(db.Float, nullable=False)
+    usd_value = db.Column(db.Float)
+    block_number = db.Column(db.BigInteger)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_portfolio_snapshot_chain_timestamp', 'chain_id', 'timestamp'),
+    )
+
+# Rollups store "no chain" (portfolio totals, decisions without a chain) as
+# chain_id 0 rather than NULL so their unique keys hold
+class TransactionRollup(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(8), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    chain_id = db.Column(db.Integer, nullable=False)
+    type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    amount_total = db.Column(db.Float, nullable=False, default=0)
+    gas_used_total = db.Column(db.BigInteger, nullable=False, default=0)
+    gas_cost_total = db.Column(db.Float, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('period', 'bucket_start', 'chain_id', 'type', 'status', name='uq_transaction_rollup'),
+    )
+
+class DecisionRollup(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(8), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    chain_id = db.Column(db.Integer, nullable=False)
+    decision_type = db.Column(db.String(50), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    executed_count = db.Column(db.Integer, nullable=False, default=0)
+    confidence_total = db.Column(db.Float, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('period', 'bucket_start', 'chain_id', 'decision_type', name='uq_decision_rollup'),
+    )
+
+class PortfolioRollup(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(8), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    chain_id = db.Column(db.Integer, nullable=False)
+    open_usd = db.Column(db.Float)
+    close_usd = db.Column(db.Float)
+    min_usd = db.Column(db.Float)
+    max_usd = db.Column(db.Float)
+    open_balance = db.Column(db.Float, nullable=False)
+    close_balance = db.Column(db.Float, nullable=False)
+    samples = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('period', 'bucket_start', 'chain_id', name='uq_portfolio_rollup'),
+    )
+
+class CycleTrace(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    trace_id = db.Column(db.String(32), unique=True, nullable=False)
+    name = db.Column(db.String(50), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False, index=True)
+    duration_ms = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    spans = db.Column(db.JSON, nullable=False)  # Span tree with offsets and durations in ms
+
+class StreamEvent(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(32), nullable=False)
+    data = db.Column(db.JSON, nullable=False)
+    source = db.Column(db.String(32), nullable=False)  # Publishing process, which already pushed it in-process
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+class CycleTask(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    chain_id = db.Column(db.Integer, db.ForeignKey('chain.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    worker = db.Column(db.String(255))
+    lease_expires_at = db.Column(db.DateTime)
+    # Set when the transaction step starts; retries of the task never execute again
+    execution_started_at = db.Column(db.DateTime)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_cycle_task_status_available', 'status', 'available_at'),
+    )
+
+class AgentLease(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(255), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
 class RiskParameter(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     parameter_type = db.Column(db.String(50), nullable=False)
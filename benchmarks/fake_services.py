@@ -0,0 +1,211 @@
+"""Local stand-ins for the JSON-RPC nodes, price API and decision API used by benchmarks"""
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+GAS_PRICE = 25 * 10**9
+BALANCE = 1000 * 10**18
+TRANSFER_GAS = 21000
+
+class FakeChain:
+    def __init__(self, network_id, block_time=0.0):
+        """Initialize an in-memory chain; with block_time 0 every transaction is mined immediately"""
+        self.network_id = network_id
+        self.block_time = block_time
+        self.block_number = 1
+        self.nonces = {}
+        self.receipts = {}
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def mine(self):
+        with self.lock:
+            self.block_number += 1
+            for tx_hash, sender, to in self.pending:
+                self.receipts[tx_hash] = self._receipt(tx_hash, sender, to)
+            self.pending = []
+
+    def send_raw_transaction(self, raw):
+        from eth_account import Account
+        raw_bytes = bytes.fromhex(raw[2:])
+        sender = Account.recover_transaction(raw_bytes)
+        tx_hash = '0x' + hashlib.sha3_256(raw_bytes).hexdigest()
+        with self.lock:
+            self.nonces[sender.lower()] = self.nonces.get(sender.lower(), 0) + 1
+            self.pending.append((tx_hash, sender, None))
+        if not self.block_time:
+            self.mine()
+        return tx_hash
+
+    def _receipt(self, tx_hash, sender, to):
+        return {
+            'transactionHash': tx_hash,
+            'transactionIndex': '0x0',
+            'blockHash': '0x' + hashlib.sha3_256(str(self.block_number).encode()).hexdigest(),
+            'blockNumber': hex(self.block_number),
+            'from': sender,
+            'to': to,
+            'cumulativeGasUsed': hex(TRANSFER_GAS),
+            'gasUsed': hex(TRANSFER_GAS),
+            'effectiveGasPrice': hex(GAS_PRICE),
+            'contractAddress': None,
+            'logs': [],
+            'logsBloom': '0x' + '00' * 256,
+            'status': '0x1',
+            'type': '0x0'
+        }
+
+    def block(self):
+        return {
+            'number': hex(self.block_number),
+            'hash': '0x' + hashlib.sha3_256(str(self.block_number).encode()).hexdigest(),
+            'parentHash': '0x' + '00' * 32,
+            'timestamp': hex(int(time.time())),
+            'gasLimit': hex(30_000_000),
+            'gasUsed': '0x0',
+            'baseFeePerGas': hex(GAS_PRICE),
+            'miner': '0x' + '00' * 20,
+            'difficulty': '0x0',
+            'transactions': []
+        }
+
+    def handle(self, method, params):
+        """Answer one JSON-RPC call, raising KeyError for unsupported methods"""
+        if method == 'eth_chainId':
+            return hex(self.network_id)
+        if method == 'net_version':
+            return str(self.network_id)
+        if method == 'eth_blockNumber':
+            return hex(self.block_number)
+        if method in ('eth_gasPrice', 'eth_maxPriorityFeePerGas'):
+            return hex(GAS_PRICE)
+        if method == 'eth_getBalance':
+            return hex(BALANCE)
+        if method == 'eth_getTransactionCount':
+            return hex(self.nonces.get(params[0].lower(), 0))
+        if method == 'eth_estimateGas':
+            return hex(TRANSFER_GAS)
+        if method == 'eth_getCode':
+            return '0x'
+        if method == 'eth_call':
+            return '0x' + '00' * 32
+        if method == 'eth_getBlockByNumber':
+            return self.block()
+        if method == 'eth_sendRawTransaction':
+            return self.send_raw_transaction(params[0])
+        if method == 'eth_getTransactionReceipt':
+            return self.receipts.get(params[0])
+        raise KeyError(method)
+
+class FakeServices:
+    def __init__(self, rpc_latency=0.0, block_time=0.0, price=30.0, execute_ratio=0.5, api_latency=0.0):
+        """Initialize fake RPC nodes (one per network id, at /rpc/<network_id>), price and decision APIs"""
+        self.rpc_latency = rpc_latency
+        self.block_time = block_time
+        self.price = price
+        self.execute_ratio = execute_ratio
+        self.api_latency = api_latency
+        self.chains = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(42)
+        self._stopped = threading.Event()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server.server_port}'
+
+    def rpc_url(self, network_id):
+        return f'{self.url}/rpc/{network_id}'
+
+    def chain(self, network_id):
+        with self._lock:
+            if network_id not in self.chains:
+                self.chains[network_id] = FakeChain(network_id, self.block_time)
+            return self.chains[network_id]
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name='fake-services', daemon=True).start()
+        if self.block_time:
+            threading.Thread(target=self._produce_blocks, name='fake-blocks', daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self.server.shutdown()
+
+    def _produce_blocks(self):
+        while not self._stopped.wait(self.block_time):
+            for chain in list(self.chains.values()):
+                chain.mine()
+
+    def decision(self):
+        should_execute = self._random.random() < self.execute_ratio
+        return {
+            'type': 'transfer',
+            'confidence': round(self._random.uniform(0.5, 1.0), 3),
+            'reasoning': 'benchmark decision',
+            'should_execute': should_execute,
+            'actions': [{
+                'type': 'transfer',
+                'to': '0x000000000000000000000000000000000000dEaD',
+                'value': 10**15
+            }] if should_execute else []
+        }
+
+    def _handler_class(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately; without this, keep-alive
+            # connections stall on delayed ACKs and skew every latency
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if self.path.startswith('/price'):
+                    time.sleep(services.api_latency)
+                    self._send({'avalanche-2': {'usd': services.price}})
+                else:
+                    self._send({'error': 'not found'}, 404)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.path.startswith('/decide'):
+                    time.sleep(services.api_latency)
+                    self._send(services.decision())
+                elif self.path.startswith('/rpc/'):
+                    with services._lock:
+                        services.requests += 1
+                    time.sleep(services.rpc_latency)
+                    chain = services.chain(int(self.path.rsplit('/', 1)[1]))
+                    request = json.loads(body)
+                    self._send([self._rpc(chain, item) for item in request] if isinstance(request, list) else self._rpc(chain, request))
+                else:
+                    self._send({'error': 'not found'}, 404)
+
+            def _rpc(self, chain, request):
+                try:
+                    result = chain.handle(request['method'], request.get('params') or [])
+                    return {'jsonrpc': '2.0', 'id': request.get('id'), 'result': result}
+                except KeyError:
+                    return {'jsonrpc': '2.0', 'id': request.get('id'),
+                            'error': {'code': -32601, 'message': f"Method {request['method']} not supported"}}
+
+            def _send(self, payload, status=200):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,355 @@
+"""Benchmark AI cycles, API endpoints and database throughput against local fake services
+
+    python benchmarks/run.py --chains 1,10,100 --output report.json
+    python benchmarks/run.py --baseline report.json   # exit 1 on regressions
+
+Runs on a temporary SQLite database unless --database-url points elsewhere
+(e.g. a local Postgres). Every number lands in the report's flat "metrics"
+map: keys ending in _ms are lower-is-better, keys ending in _per_sec are
+higher-is-better, and --baseline compares them with --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fake_services import FakeServices
+
+API_ENDPOINTS = [
+    '/healthz',
+    '/api/wallet/chains',
+    '/api/transactions/recent',
+    '/api/transactions/history?limit=50',
+    '/api/risk-parameters',
+    '/api/portfolio/history?points=200',
+    '/api/analytics/transactions?period=hour'
+]
+
+def summarize(durations):
+    """Latency percentiles in milliseconds"""
+    values = sorted(d * 1000 for d in durations)
+    if not values:
+        return {}
+    def percentile(p):
+        return round(values[min(int(len(values) * p), len(values) - 1)], 3)
+    return {
+        'count': len(values),
+        'mean_ms': round(statistics.fmean(values), 3),
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': round(values[-1], 3)
+    }
+
+def setup_app(services, max_chains):
+    """Bootstrap the app and point max_chains chains, each with a wallet, at the fake RPC server"""
+    from main import bootstrap
+    from base_models import Chain, db
+    import app as app_module
+
+    app = bootstrap(seed=True, lazy=False)
+    with app.app_context():
+        chains = Chain.query.order_by(Chain.id).all()
+        for i in range(len(chains), max_chains):
+            chains.append(Chain(
+                name=f'Benchmark Chain {i}',
+                network_id=900000 + i,
+                rpc_url='',
+                symbol='AVAX',
+                explorer_url='http://localhost'
+            ))
+            db.session.add(chains[-1])
+        for chain in chains:
+            chain.rpc_url = services.rpc_url(chain.network_id)
+        db.session.commit()
+        for chain in chains:
+            app_module.wallet_manager.create_wallet(chain.id)
+        app_module.chain_registry.invalidate()
+    return app, app_module
+
+def activate_chains(app, count):
+    from base_models import Chain, db
+    with app.app_context():
+        for index, chain in enumerate(Chain.query.order_by(Chain.id).all()):
+            chain.active = index < count
+        db.session.commit()
+
+def bench_cycles(app, app_module, chain_counts, cycles):
+    """Cycle latency and chain throughput for each number of active chains"""
+    results = {}
+    for count in chain_counts:
+        activate_chains(app, count)
+        app_module.run_ai_cycle(app)  # warm up contexts, wallets and connections
+        durations = []
+        for _ in range(cycles):
+            started = time.perf_counter()
+            app_module.run_ai_cycle(app)
+            durations.append(time.perf_counter() - started)
+        summary = summarize(durations)
+        summary['chains_per_sec'] = round(count * cycles / sum(durations), 3)
+        results[count] = summary
+        print(f"cycles: {count} chains, p50 {summary['p50_ms']}ms, {summary['chains_per_sec']} chains/s")
+    return results
+
+def seed_history(app, rows):
+    """Insert ledger rows and portfolio snapshots so read endpoints have data to page through"""
+    from base_models import Chain, PortfolioSnapshot, Transaction, db
+    with app.app_context():
+        chain_ids = [chain.id for chain in Chain.query.all()]
+        now = datetime.utcnow()
+        db.session.execute(db.insert(Transaction), [{
+            'hash': f'0xbench{i:060x}',
+            'type': 'transfer',
+            'amount': 0.001,
+            'status': 'success' if i % 10 else 'failed',
+            'gas_used': 21000,
+            'details': {},
+            'chain_id': chain_ids[i % len(chain_ids)],
+            'timestamp': now - timedelta(seconds=i)
+        } for i in range(rows)])
+        db.session.execute(db.insert(PortfolioSnapshot), [{
+            'chain_id': None,
+            'balance': 1000.0,
+            'usd_value': 30000.0 + i % 500,
+            'timestamp': now - timedelta(minutes=5 * i)
+        } for i in range(rows)])
+        db.session.commit()
+
+def uncached_path(path, index, cursors):
+    """A distinct URL per request, varying real filters and cursors, so ResponseCache never hits"""
+    base, _, query = path.partition('?')
+    params = [query] if query else []
+    if base == '/api/transactions/history':
+        params = [f'limit={10 + index % 91}']
+        if cursors and index % 2:
+            params.append(f'cursor={cursors[index % len(cursors)]}')
+        if index % 3 == 0:
+            params.append('status=success')
+    elif base == '/api/portfolio/history':
+        params = [f'points={50 + index % 451}']
+    elif base.startswith('/api/analytics/'):
+        params = [f"period={'hour' if index % 2 else 'day'}"]
+    # Cache keys are the full path, so this alone guarantees a miss
+    params.append(f'bench_miss={index}')
+    return f"{base}?{'&'.join(params)}"
+
+def bench_api(app, app_module, requests_per_endpoint, concurrency):
+    """Endpoint latency under concurrent load through a real threaded HTTP server
+
+    Each endpoint is measured twice: repeating one URL (served from
+    ResponseCache after the first request) and with a distinct URL per
+    request, which always builds the response from the database.
+    """
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    app_module.configure_routes(app)
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    def fetch(path):
+        started = time.perf_counter()
+        with urllib.request.urlopen(base_url + path, timeout=30) as response:
+            response.read()
+        return time.perf_counter() - started
+
+    def measure(pool, paths):
+        started = time.perf_counter()
+        durations = list(pool.map(fetch, paths))
+        summary = summarize(durations)
+        summary['requests_per_sec'] = round(len(durations) / (time.perf_counter() - started), 3)
+        return summary
+
+    # Real cursors from walking the ledger, so cursor pages seek like clients do
+    cursors = []
+    cursor = None
+    for _ in range(20):
+        with urllib.request.urlopen(base_url + '/api/transactions/history?limit=100' + (
+            f'&cursor={cursor}' if cursor else ''
+        ), timeout=30) as response:
+            cursor = json.load(response).get('next_cursor')
+        if not cursor:
+            break
+        cursors.append(cursor)
+
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for path in API_ENDPOINTS:
+                fetch(path)
+                cached = measure(pool, [path] * requests_per_endpoint)
+                uncached = measure(pool, [uncached_path(path, i, cursors) for i in range(requests_per_endpoint)])
+                results[path] = {'cached': cached, 'uncached': uncached}
+                print(f"api: {path} p95 cached {cached['p95_ms']}ms, uncached {uncached['p95_ms']}ms, "
+                      f"{uncached['requests_per_sec']} uncached req/s")
+    finally:
+        server.shutdown()
+    return results
+
+def bench_database(app, operations):
+    """MemoryManager and ledger write/read throughput"""
+    from memory_manager import MemoryManager
+    from ledger_writer import LedgerWriter
+    from analytics import AnalyticsRollups
+    from base_models import Chain
+
+    results = {}
+    with app.app_context():
+        memory_manager = MemoryManager()
+        chain_id = Chain.query.first().id
+
+        started = time.perf_counter()
+        for i in range(operations):
+            memory_manager.store_transaction_pattern(f'bench_{i % 50}', {'type': 'transfer', 'outcome': i})
+        results['memory_store_per_sec'] = round(operations / (time.perf_counter() - started), 3)
+
+        started = time.perf_counter()
+        for _ in range(operations):
+            memory_manager.retrieve_memory('transaction_pattern')
+        results['memory_retrieve_per_sec'] = round(operations / (time.perf_counter() - started), 3)
+
+        started = time.perf_counter()
+        for i in range(operations):
+            memory_manager.update_pattern_confidence('transaction_pattern', f'bench_{i % 50}', i % 3 != 0)
+        results['memory_update_confidence_per_sec'] = round(operations / (time.perf_counter() - started), 3)
+
+    rows = operations * 10
+    writer = LedgerWriter(app, rollups=AnalyticsRollups())
+    started = time.perf_counter()
+    for i in range(rows):
+        writer.record(
+            hash=LedgerWriter.new_failed_hash(), type='transfer', amount=0.001, status='success',
+            gas_used=21000, details={'effective_gas_price': 25 * 10**9}, chain_id=chain_id
+        )
+    writer.stop(timeout=300)
+    results['ledger_rows_per_sec'] = round(rows / (time.perf_counter() - started), 3)
+
+    for name, value in results.items():
+        print(f"db: {name} {value}")
+    return results
+
+def flatten(report):
+    """Flatten results into metric keys for baseline comparison"""
+    metrics = {}
+    for count, summary in report['cycles'].items():
+        for key in ('p50_ms', 'p95_ms', 'chains_per_sec'):
+            metrics[f'cycle.chains_{count}.{key}'] = summary[key]
+    for path, modes in report['api'].items():
+        for mode, summary in modes.items():
+            for key in ('p50_ms', 'p95_ms', 'requests_per_sec'):
+                metrics[f'api.{path}.{mode}.{key}'] = summary[key]
+    for key, value in report['database'].items():
+        metrics[f'database.{key}'] = value
+    return metrics
+
+def compare(metrics, baseline, tolerance):
+    """Return regressions beyond tolerance relative to a baseline report's metrics"""
+    regressions = []
+    for key, value in metrics.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        if key.endswith('_ms') and value > previous * (1 + tolerance):
+            regressions.append({'metric': key, 'baseline': previous, 'current': value})
+        elif key.endswith('_per_sec') and value < previous * (1 - tolerance):
+            regressions.append({'metric': key, 'baseline': previous, 'current': value})
+    return regressions
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chains', default='1,10,100', help='comma-separated active chain counts')
+    parser.add_argument('--cycles', type=int, default=5, help='measured cycles per chain count')
+    parser.add_argument('--cycle-workers', type=int, default=None, help='AI_CYCLE_MAX_WORKERS (default: app default)')
+    parser.add_argument('--rpc-latency-ms', type=float, default=5.0)
+    parser.add_argument('--api-latency-ms', type=float, default=20.0, help='price and decision API latency')
+    parser.add_argument('--block-time', type=float, default=0.0, help='seconds per block; 0 mines on send')
+    parser.add_argument('--execute-ratio', type=float, default=0.5, help='share of decisions that execute a transfer')
+    parser.add_argument('--requests', type=int, default=200, help='requests per API endpoint')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--history-rows', type=int, default=20000)
+    parser.add_argument('--db-operations', type=int, default=500)
+    parser.add_argument('--database-url', default=None, help='default: temporary SQLite file')
+    parser.add_argument('--output', default='benchmark-report.json')
+    parser.add_argument('--baseline', default=None, help='earlier report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    chain_counts = sorted({int(count) for count in args.chains.split(',')})
+    services = FakeServices(
+        rpc_latency=args.rpc_latency_ms / 1000,
+        api_latency=args.api_latency_ms / 1000,
+        block_time=args.block_time,
+        execute_ratio=args.execute_ratio
+    ).start()
+
+    workdir = tempfile.mkdtemp(prefix='agent-bench-')
+    if not os.environ.get('WALLET_ENCRYPTION_KEY'):
+        from cryptography.fernet import Fernet
+        os.environ['WALLET_ENCRYPTION_KEY'] = Fernet.generate_key().decode()
+    os.environ['DATABASE_URL'] = args.database_url or f'sqlite:///{workdir}/benchmark.db'
+    os.environ['PRICE_API_URL'] = f'{services.url}/price'
+    os.environ['DECISION_API_URL'] = f'{services.url}/decide'
+    os.environ['COMPILATION_CACHE_DIR'] = os.path.join(workdir, 'compilation-cache')
+    if args.cycle_workers:
+        os.environ['AI_CYCLE_MAX_WORKERS'] = str(args.cycle_workers)
+
+    app, app_module = setup_app(services, max(chain_counts))
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'database': os.environ['DATABASE_URL'].split(':', 1)[0],
+            'parameters': vars(args)
+        }
+    }
+    report['cycles'] = bench_cycles(app, app_module, chain_counts, args.cycles)
+    report['meta']['rpc_requests_during_cycles'] = services.requests
+    seed_history(app, args.history_rows)
+    report['api'] = bench_api(app, app_module, args.requests, args.concurrency)
+    report['database'] = bench_database(app, args.db_operations)
+    report['metrics'] = flatten(report)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('metrics', {})
+        report['regressions'] = compare(report['metrics'], baseline, args.tolerance)
+        for regression in report['regressions']:
+            print(f"REGRESSION {regression['metric']}: {regression['baseline']} -> {regression['current']}")
+        exit_code = 1 if report['regressions'] else 0
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"Report written to {args.output}")
+    services.stop()
+    return exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
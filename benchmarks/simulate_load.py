@@ -0,0 +1,156 @@
+"""Find how many chains one agent can serve per cycle interval using simulated chains
+
+    python benchmarks/simulate_load.py --chains 5,10,25,50,100 --interval 30
+    python benchmarks/simulate_load.py --block-time 1 --gas-spike-rate 0.2 --failure-rate 0.05
+
+Registers synthetic chains whose RPC URLs are sim:// (served in-process by
+chain_simulator), then runs the real run_ai_cycle pipeline at increasing
+chain counts. Cycles overlap once a cycle takes longer than the interval,
+so the saturation point is the largest chain count whose p95 cycle time
+still fits in it. The ramp stops at the first count that doesn't.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from run import git_commit, summarize
+from fake_services import FakeServices
+
+def setup_app(max_chains, chain_options):
+    """Bootstrap the app with only simulated chains active, each with a wallet and yield sources"""
+    from main import bootstrap
+    from base_models import Chain, db
+    from chain_simulator import register_simulated_chains
+    import app as app_module
+
+    app = bootstrap(seed=True, lazy=False)
+    with app.app_context():
+        Chain.query.update({Chain.active: False})
+        db.session.commit()
+        chains = register_simulated_chains(max_chains, **chain_options)
+        for chain in chains:
+            app_module.wallet_manager.create_wallet(chain.id)
+            # Simulated chains answer every eth_call with their current yield
+            app_module.chain_scanner.yield_contracts[chain.network_id] = {
+                'aave': '0x4F01AeD16D97E3aB5ab2B501154DC9bb0F1A5A2C',
+                'benqi': '0x486Af39519B4Dc9a7fCcd318217352830E8AD9b4',
+            }
+        chain_ids = [chain.id for chain in chains]
+        app_module.chain_registry.invalidate()
+    return app, app_module, chain_ids
+
+def activate_chains(app, chain_ids, count):
+    from base_models import Chain, db
+    with app.app_context():
+        for index, chain_id in enumerate(chain_ids):
+            db.session.get(Chain, chain_id).active = index < count
+        db.session.commit()
+
+def ramp(app, app_module, chain_ids, chain_counts, cycles, interval):
+    """Cycle times at each chain count until cycles no longer fit in the interval"""
+    results = {}
+    for count in chain_counts:
+        activate_chains(app, chain_ids, count)
+        app_module.chain_registry.invalidate()
+        durations = []
+        for _ in range(cycles):
+            started = time.perf_counter()
+            app_module.run_ai_cycle(app)
+            durations.append(time.perf_counter() - started)
+        summary = summarize(durations)
+        summary['chains_per_sec'] = round(count * cycles / sum(durations), 3)
+        summary['interval_utilization'] = round(summary['p95_ms'] / 1000 / interval, 3)
+        summary['overlaps'] = summary['p95_ms'] / 1000 > interval
+        results[count] = summary
+        print(f"{count} chains: p95 {summary['p95_ms']}ms, "
+              f"{summary['interval_utilization']:.0%} of interval, {summary['chains_per_sec']} chains/s")
+        if summary['overlaps']:
+            break
+    return results
+
+def saturation(results, interval):
+    """Largest measured chain count that fits the interval, and a throughput-based estimate"""
+    fitting = [count for count, summary in results.items() if not summary['overlaps']]
+    # Throughput at the largest measured load is the most pessimistic estimate
+    throughput = results[max(results)]['chains_per_sec']
+    return {
+        'interval_seconds': interval,
+        'max_measured_chains': max(fitting) if fitting else 0,
+        'estimated_chains_per_interval': int(throughput * interval),
+        'saturated': any(summary['overlaps'] for summary in results.values())
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chains', default='5,10,25,50,100', help='comma-separated active chain counts to ramp through')
+    parser.add_argument('--cycles', type=int, default=3, help='measured cycles per chain count')
+    parser.add_argument('--interval', type=float, default=None,
+                        help='cycle interval in seconds (default: AGENT_CYCLE_MINUTES, 5 minutes)')
+    parser.add_argument('--cycle-workers', type=int, default=None, help='AI_CYCLE_MAX_WORKERS (default: app default)')
+    parser.add_argument('--block-time', type=float, default=2.0, help='seconds per simulated block')
+    parser.add_argument('--yield-volatility', type=float, default=0.02, help='per-block relative yield std-dev')
+    parser.add_argument('--gas-spike-rate', type=float, default=0.05, help='share of blocks with a gas spike')
+    parser.add_argument('--gas-spike-multiplier', type=float, default=5.0)
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='share of RPC calls that fail')
+    parser.add_argument('--rpc-latency-ms', type=float, default=20.0)
+    parser.add_argument('--api-latency-ms', type=float, default=200.0, help='price and decision API latency')
+    parser.add_argument('--execute-ratio', type=float, default=0.3, help='share of decisions that execute a transfer')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--database-url', default=None, help='default: temporary SQLite file')
+    parser.add_argument('--output', default='simulation-report.json')
+    args = parser.parse_args()
+
+    interval = args.interval or int(os.environ.get('AGENT_CYCLE_MINUTES', 5)) * 60
+    chain_counts = sorted({int(count) for count in args.chains.split(',')})
+    services = FakeServices(api_latency=args.api_latency_ms / 1000, execute_ratio=args.execute_ratio).start()
+
+    workdir = tempfile.mkdtemp(prefix='agent-sim-')
+    if not os.environ.get('WALLET_ENCRYPTION_KEY'):
+        from cryptography.fernet import Fernet
+        os.environ['WALLET_ENCRYPTION_KEY'] = Fernet.generate_key().decode()
+    os.environ['DATABASE_URL'] = args.database_url or f'sqlite:///{workdir}/simulation.db'
+    os.environ['PRICE_API_URL'] = f'{services.url}/price'
+    os.environ['DECISION_API_URL'] = f'{services.url}/decide'
+    os.environ['COMPILATION_CACHE_DIR'] = os.path.join(workdir, 'compilation-cache')
+    if args.cycle_workers:
+        os.environ['AI_CYCLE_MAX_WORKERS'] = str(args.cycle_workers)
+
+    chain_options = {
+        'block_time': args.block_time,
+        'yield_volatility': args.yield_volatility,
+        'gas_spike_rate': args.gas_spike_rate,
+        'gas_spike_multiplier': args.gas_spike_multiplier,
+        'failure_rate': args.failure_rate,
+        'latency_ms': args.rpc_latency_ms,
+        'seed': args.seed
+    }
+    app, app_module, chain_ids = setup_app(max(chain_counts), chain_options)
+    results = ramp(app, app_module, chain_ids, chain_counts, args.cycles, interval)
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'database': os.environ['DATABASE_URL'].split(':', 1)[0],
+            'cycle_workers': int(os.environ.get('AI_CYCLE_MAX_WORKERS', 4)),
+            'parameters': vars(args)
+        },
+        'cycles': results,
+        'saturation': saturation(results, interval)
+    }
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"Saturation: {json.dumps(report['saturation'])}")
+    print(f"Report written to {args.output}")
+    services.stop()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
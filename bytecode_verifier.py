@@ -0,0 +1,100 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from web3 import Web3
+from metrics import CACHE_REQUESTS
+
+class BytecodeVerifier:
+    def __init__(self, max_cache_entries=4096):
+        """Initialize verifier with a cache of deployed code per (chain, address)"""
+        self.max_cache_entries = max_cache_entries
+        self._code_cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def strip_metadata(code: bytes):
+        """Remove the CBOR metadata trailer solc appends to runtime code
+
+        The last two bytes hold the big-endian length of the CBOR map before
+        them; code without a well-formed trailer is returned unchanged.
+        """
+        if len(code) < 2:
+            return code
+        metadata_length = int.from_bytes(code[-2:], 'big')
+        start = len(code) - 2 - metadata_length
+        # The trailer is a CBOR map (major type 5)
+        if metadata_length == 0 or start < 0 or code[start] >> 5 != 5:
+            return code
+        return code[:start]
+
+    @staticmethod
+    def mask_immutables(code: bytes, immutable_references):
+        """Zero out immutable slots, which are only filled in at construction"""
+        if not immutable_references:
+            return code
+        masked = bytearray(code)
+        for references in immutable_references.values():
+            for reference in references:
+                start = int(reference['start'])
+                end = min(start + int(reference['length']), len(masked))
+                if start < end:
+                    masked[start:end] = bytes(end - start)
+        return bytes(masked)
+
+    def get_code(self, context, address):
+        """Get deployed code, cached once non-empty since it cannot change"""
+        address = Web3.to_checksum_address(address)
+        key = (context.chain_id, address)
+        with self._lock:
+            code = self._code_cache.get(key)
+            if code is not None:
+                self._code_cache.move_to_end(key)
+                CACHE_REQUESTS.inc(cache='contract_code', result='hit')
+                return code
+
+        CACHE_REQUESTS.inc(cache='contract_code', result='miss')
+        code = bytes(context.w3.eth.get_code(address))
+        if code:
+            with self._lock:
+                self._code_cache[key] = code
+                while len(self._code_cache) > self.max_cache_entries:
+                    self._code_cache.popitem(last=False)
+        return code
+
+    def matches(self, deployed_code: bytes, compiled_contract: dict):
+        """Compare deployed runtime code against a compiled artifact"""
+        deployed = self.strip_metadata(deployed_code)
+        if not deployed:
+            return False
+
+        expected_hex = compiled_contract.get('deployed_bytecode')
+        if expected_hex:
+            expected = self.strip_metadata(bytes.fromhex(expected_hex.removeprefix('0x')))
+            references = compiled_contract.get('immutable_references')
+            return self.mask_immutables(deployed, references) == self.mask_immutables(expected, references)
+
+        # Older artifacts only carry creation code, which embeds the runtime code
+        creation = bytes.fromhex(compiled_contract['bytecode'].removeprefix('0x'))
+        return deployed in creation
+
+    def verify(self, context, address, compiled_contract: dict):
+        """Verify that the code at address was built from compiled_contract"""
+        return self.matches(self.get_code(context, address), compiled_contract)
+
+    def verify_many(self, items, max_workers=8):
+        """Verify (context, address, compiled_contract) items concurrently across chains"""
+        def verify_one(item):
+            context, address, compiled_contract = item
+            result = {'chain_id': context.chain_id, 'contract_address': address}
+            try:
+                result['verified'] = self.verify(context, address, compiled_contract)
+            except Exception as e:
+                print(f"Error verifying contract {address} on {context.name}: {str(e)}")
+                result['verified'] = False
+                result['error'] = str(e)
+            return result
+
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+            return list(pool.map(verify_one, items))
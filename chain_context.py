@@ -0,0 +1,192 @@
+import threading
+import time
+from dataclasses import dataclass
+from web3 import Web3
+from metrics import CACHE_REQUESTS, FAILURES, RPC_LATENCY
+
+# How long our own next nonce may run ahead of the node's pending count
+NONCE_CACHE_SECONDS = 30
+# Resends after another process took the nonce we picked
+NONCE_RETRIES = 3
+
+class InstrumentedHTTPProvider(Web3.HTTPProvider):
+    def __init__(self, endpoint_uri, chain_id, **kwargs):
+        """Initialize HTTP provider that records per-chain, per-method RPC latency"""
+        super().__init__(endpoint_uri, **kwargs)
+        self.metrics_chain_id = chain_id
+
+    def make_request(self, method, params):
+        started = time.perf_counter()
+        try:
+            return super().make_request(method, params)
+        except Exception:
+            FAILURES.inc(component='rpc', operation=method)
+            raise
+        finally:
+            RPC_LATENCY.observe(time.perf_counter() - started, chain_id=self.metrics_chain_id, method=method)
+
+def make_provider(rpc_url, chain_id):
+    """Build the web3 provider for a chain; sim:// URLs are served by the in-process chain simulator"""
+    if rpc_url.startswith('sim://'):
+        from chain_simulator import SimulatedProvider
+        return SimulatedProvider(rpc_url, chain_id)
+    return InstrumentedHTTPProvider(rpc_url, chain_id)
+
+class FeeOracle:
+    def __init__(self, w3, ttl=3.0):
+        """Initialize per-chain gas price oracle with a short TTL"""
+        self.w3 = w3
+        self.ttl = ttl
+        self._gas_price = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+
+    def gas_price(self):
+        """Get the current gas price, refreshed at most once per TTL"""
+        with self._lock:
+            if self._gas_price is not None and self._expires_at > time.monotonic():
+                CACHE_REQUESTS.inc(cache='gas_price', result='hit')
+                return self._gas_price
+        CACHE_REQUESTS.inc(cache='gas_price', result='miss')
+        gas_price = self.w3.eth.gas_price
+        with self._lock:
+            self._gas_price = gas_price
+            self._expires_at = time.monotonic() + self.ttl
+        return gas_price
+
+class ChainSigner:
+    def __init__(self, wallet_manager, chain_id):
+        """Initialize signer bound to one chain's wallet"""
+        self._wallet_manager = wallet_manager
+        self.chain_id = chain_id
+        self._next_nonces = {}
+        self._nonce_lock = threading.Lock()
+
+    def get_account(self):
+        """Get the wallet account for this chain, or None if no wallet exists"""
+        return self._wallet_manager.get_wallet(self.chain_id)
+
+    @property
+    def address(self):
+        account = self.get_account()
+        return account.address if account else None
+
+    def sign_transaction(self, transaction_data):
+        """Sign a transaction with this chain's wallet"""
+        return self._wallet_manager.sign_transaction(transaction_data, self.chain_id)
+
+    def send_transaction(self, w3, transaction_data):
+        """Assign the next nonce, sign and broadcast a transaction, returning its hash
+
+        Within a process, sends from the same wallet are serialized by a lock
+        and a local next nonce covers the node's pending count lagging behind
+        our own sends; it expires after NONCE_CACHE_SECONDS and is dropped when
+        a send fails, so a rejected transaction can't leave a gap. Other
+        processes (web deploy jobs, agent workers) take nonces from the same
+        pending count, so a send the node rejects as reusing a nonce is retried
+        with a fresh one, up to NONCE_RETRIES times.
+        """
+        with self._nonce_lock:
+            address = self.address
+            for attempt in range(NONCE_RETRIES + 1):
+                nonce = w3.eth.get_transaction_count(address, 'pending')
+                cached = self._next_nonces.get(address)
+                if cached and time.monotonic() - cached[1] < NONCE_CACHE_SECONDS:
+                    nonce = max(nonce, cached[0])
+                try:
+                    signed = self.sign_transaction(dict(transaction_data, nonce=nonce))
+                    tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
+                except Exception as e:
+                    self._next_nonces.pop(address, None)
+                    if attempt < NONCE_RETRIES and _is_nonce_conflict(e):
+                        print(f"Nonce {nonce} taken on chain {self.chain_id}, retrying: {str(e)}")
+                        continue
+                    raise
+                self._next_nonces[address] = (nonce + 1, time.monotonic())
+                return tx_hash
+
+def _is_nonce_conflict(error):
+    # Another sender used this nonce; "already known" is our own transaction, so never resent
+    message = str(error).lower()
+    return 'nonce too low' in message or 'replacement transaction underpriced' in message
+
+@dataclass(frozen=True)
+class ChainContext:
+    """Immutable snapshot of one chain and the clients bound to it"""
+    chain_id: int
+    name: str
+    network_id: int
+    symbol: str
+    rpc_url: str
+    explorer_url: str
+    w3: Web3
+    signer: ChainSigner
+    fee_oracle: FeeOracle
+
+class ChainRegistry:
+    def __init__(self, wallet_manager):
+        """Initialize registry that hands out one shared context per chain"""
+        self.wallet_manager = wallet_manager
+        self._contexts = {}
+        self._default_chain_id = None
+        self._lock = threading.Lock()
+
+    def get(self, chain_id=None):
+        """Get the context for a chain, loading it on first use"""
+        if chain_id is None:
+            return self.default()
+        context = self._contexts.get(chain_id)
+        if context is not None:
+            return context
+
+        from base_models import Chain
+        chain = Chain.query.get(chain_id)
+        if not chain:
+            raise ValueError(f"Chain with ID {chain_id} not found")
+        return self._register(chain)
+
+    def default(self):
+        """Get the context for the default chain (Avalanche C-Chain)"""
+        if self._default_chain_id is None:
+            from base_models import Chain
+            chain = Chain.query.filter_by(name='Avalanche C-Chain', active=True).first()
+            if not chain:
+                raise ValueError("Default chain (Avalanche C-Chain) not found or not active")
+            self._default_chain_id = chain.id
+            if chain.id not in self._contexts:
+                self._register(chain)
+        return self.get(self._default_chain_id)
+
+    def active_contexts(self):
+        """Get contexts for every active chain"""
+        from base_models import Chain
+        contexts = []
+        for chain in Chain.query.filter_by(active=True).all():
+            contexts.append(self._contexts.get(chain.id) or self._register(chain))
+        return contexts
+
+    def invalidate(self, chain_id=None):
+        """Drop cached contexts so they are rebuilt from the database"""
+        with self._lock:
+            if chain_id is None:
+                self._contexts.clear()
+                self._default_chain_id = None
+            else:
+                self._contexts.pop(chain_id, None)
+
+    def _register(self, chain):
+        """Build and cache a context from a chain row"""
+        w3 = Web3(make_provider(chain.rpc_url, chain.id))
+        context = ChainContext(
+            chain_id=chain.id,
+            name=chain.name,
+            network_id=chain.network_id,
+            symbol=chain.symbol,
+            rpc_url=chain.rpc_url,
+            explorer_url=chain.explorer_url,
+            w3=w3,
+            signer=ChainSigner(self.wallet_manager, chain.id),
+            fee_oracle=FeeOracle(w3)
+        )
+        with self._lock:
+            return self._contexts.setdefault(chain.id, context)
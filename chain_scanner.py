@@ -1,7 +1,13 @@
 from web3 import Web3
 import json
+import os
 import requests
+import time
 from flask import current_app
+from chain_context import make_provider
+from metrics import FAILURES, PRICE_FETCH_LATENCY
+
+DEFAULT_PRICE_API_URL = 'https://api.coingecko.com/api/v3/simple/price'
 
 class ChainScanner:
     def __init__(self, chain_id=None):
@@ -10,8 +16,9 @@ class ChainScanner:
         
         with current_app.app_context():
             self.chain_id = chain_id
+            self.price_api_url = os.environ.get('PRICE_API_URL', DEFAULT_PRICE_API_URL)
             self.chain = self._get_chain_info(chain_id)
-            self.w3 = Web3(Web3.HTTPProvider(self.chain.rpc_url))
+            self.w3 = Web3(make_provider(self.chain.rpc_url, self.chain.id))
             # Define yield contracts per chain
             self.yield_contracts = {
                 43114: {  # Avalanche C-Chain
@@ -28,10 +35,10 @@ class ChainScanner:
         """Initialize chain connection"""
         with current_app.app_context():
             self.chain = self._get_chain_info(self.chain_id)
-            self.w3 = Web3(Web3.HTTPProvider(self.chain.rpc_url))
+            self.w3 = Web3(make_provider(self.chain.rpc_url, self.chain.id))
         
     def switch_chain(self, chain_id):
-        """Switch to a different chain"""
+        """Switch the default chain scanned when no context is passed"""
         self.chain_id = chain_id
         self._initialize_chain()
         
@@ -47,48 +54,56 @@ class ChainScanner:
             raise ValueError("Chain not found")
         return chain
         
-    def scan_latest_data(self):
-        """Scan latest blockchain data for yield opportunities"""
+    def scan_latest_data(self, context=None):
+        """Scan latest blockchain data for yield opportunities on the given chain context"""
+        w3 = context.w3 if context else self.w3
+        network_id = context.network_id if context else self.chain.network_id
         data = {
-            'block_number': self.w3.eth.block_number,
-            'yields': self._get_yield_data(),
-            'gas_price': self.w3.eth.gas_price,
+            'block_number': w3.eth.block_number,
+            'yields': self._get_yield_data(w3, network_id),
+            'gas_price': context.fee_oracle.gas_price() if context else w3.eth.gas_price,
             'market_data': self._get_market_data()
         }
         return data
         
-    def _get_yield_data(self):
+    def _get_yield_data(self, w3, network_id):
         """Get current yield rates from various protocols"""
         yields = {}
         
-        chain_contracts = self.yield_contracts.get(self.chain.network_id, {})
+        chain_contracts = self.yield_contracts.get(network_id, {})
         for protocol, contract in chain_contracts.items():
             try:
                 # This is a simplified example - actual implementation would need
                 # protocol-specific ABI and logic
-                contract = self.w3.eth.contract(
+                contract = w3.eth.contract(
                     address=contract,
                     abi=self._get_protocol_abi(protocol)
                 )
                 yields[protocol] = contract.functions.getYield().call()
             except Exception as e:
                 print(f"Error getting yield for {protocol}: {str(e)}")
+                FAILURES.inc(component='chain_scanner', operation='get_yield')
                 yields[protocol] = 0
                 
         return yields
         
     def _get_market_data(self):
         """Get current market data from external API"""
+        started = time.perf_counter()
         try:
             response = requests.get(
-                'https://api.coingecko.com/api/v3/simple/price',
+                self.price_api_url,
                 params={
                     'ids': 'avalanche-2',
                     'vs_currencies': 'usd'
                 }
             )
-            return response.json()
+            market_data = response.json()
+            PRICE_FETCH_LATENCY.observe(time.perf_counter() - started, outcome='success')
+            return market_data
         except Exception as e:
+            PRICE_FETCH_LATENCY.observe(time.perf_counter() - started, outcome='error')
+            FAILURES.inc(component='chain_scanner', operation='get_market_data')
             print(f"Error getting market data: {str(e)}")
             return {'avalanche-2': {'usd': 0}}
             
@@ -0,0 +1,226 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from metrics import CHAIN_INTERVAL, SCHEDULER_SKIPS
+from tracing import tracer
+
+# Never scan more often than this many blocks; there's nothing new to see
+MIN_BLOCKS_BETWEEN_SCANS = 2
+# Relative yield change between scans that counts as fully volatile
+VOLATILITY_REFERENCE = 0.05
+# Interval growth per idle or failed run, up to the maximum interval
+IDLE_BACKOFF = 1.5
+OUTCOME_WINDOW = 10
+
+def run_observed_cycle(app, context, execution_guard=None):
+    """Run one chain's cycle as its own trace, returning what the scheduler adapts to
+
+    Returns None if the cycle failed, otherwise the portfolio snapshot plus
+    the block, yields and decision outcome, all JSON-serializable so work
+    queue tasks can store them.
+    """
+    from app import run_chain_cycle
+    observed = {}
+    def observer(chain_data, decision):
+        observed.update(
+            block_number=chain_data.get('block_number'),
+            yields=chain_data.get('yields') or {},
+            should_execute=bool(decision.should_execute)
+        )
+    with tracer.trace('chain_cycle', chain_id=context.chain_id) as root:
+        snapshot = run_chain_cycle(app, context, root, observer=observer, execution_guard=execution_guard)
+    if snapshot is None:
+        return None
+    return {'snapshot': snapshot, **observed}
+
+class ChainSchedule:
+    def __init__(self, chain_id, interval, now):
+        """Initialize the cadence of one chain, first due immediately"""
+        self.chain_id = chain_id
+        self.interval = interval
+        self.next_run = now
+        self.running = False
+        self.task_id = None
+        self.started_at = None
+        self.deferred = False
+        self.block_time = None
+        self.volatility = 0.0
+        self.outcomes = deque(maxlen=OUTCOME_WINDOW)
+        self._last_block = None
+        self._last_yields = None
+
+    def observe(self, result, now):
+        """Update block time, yield volatility and decision history from one run's result"""
+        block_number = result.get('block_number')
+        if block_number is not None:
+            if self._last_block and block_number > self._last_block[1]:
+                observed = (now - self._last_block[0]) / (block_number - self._last_block[1])
+                self.block_time = observed if self.block_time is None else 0.5 * self.block_time + 0.5 * observed
+            self._last_block = (now, block_number)
+
+        yields = result.get('yields') or {}
+        if self._last_yields:
+            changes = [
+                abs(value - self._last_yields[protocol]) / self._last_yields[protocol]
+                for protocol, value in yields.items() if self._last_yields.get(protocol)
+            ]
+            if changes:
+                self.volatility = 0.5 * self.volatility + 0.5 * max(changes)
+        self._last_yields = yields
+        if 'should_execute' in result:
+            self.outcomes.append(result['should_execute'])
+
+    def activity(self):
+        """0 for an idle chain, up to 1 for one that keeps executing or whose yields keep moving"""
+        execute_rate = sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+        return max(execute_rate, min(self.volatility / VOLATILITY_REFERENCE, 1.0))
+
+    def reschedule(self, succeeded, now, base_interval, min_interval, max_interval):
+        """Pick the next interval: busy chains approach min_interval, idle and failing ones back off"""
+        activity = self.activity() if succeeded else 0.0
+        if activity > 0:
+            interval = base_interval - (base_interval - min_interval) * activity
+        else:
+            interval = self.interval * IDLE_BACKOFF
+        if self.block_time:
+            interval = max(interval, self.block_time * MIN_BLOCKS_BETWEEN_SCANS)
+        self.interval = min(max(interval, min_interval), max_interval)
+        # Measured from completion, so a slow run never makes the next one due immediately
+        self.next_run = now + self.interval
+
+    def to_dict(self, now):
+        return {
+            'chain_id': self.chain_id,
+            'interval_seconds': round(self.interval, 3),
+            'due_in_seconds': round(self.next_run - now, 3),
+            'running': self.running,
+            'block_time': round(self.block_time, 3) if self.block_time else None,
+            'volatility': round(self.volatility, 5),
+            'activity': round(self.activity(), 3)
+        }
+
+class ChainScheduler:
+    def __init__(self, app, base_interval, min_interval, max_interval, max_concurrency, queue=None):
+        """Initialize scheduler giving each active chain its own adaptive cadence
+
+        tick() is called frequently (every second or so). It starts chains
+        that are due, never one that is still running, and never more than
+        max_concurrency at once; chains left waiting go first next tick.
+        Chains run on a local thread pool, or, given a work_queue.CycleQueue,
+        are enqueued as tasks for any worker process to claim.
+        """
+        self.app = app
+        self.queue = queue
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, base_interval)
+        self.max_concurrency = max_concurrency
+        self.schedules = {}
+        self.latest_snapshots = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='chain-cycle')
+        self._lock = threading.Lock()
+
+    def tick(self):
+        """Start every due chain the concurrency budget allows; returns how many started"""
+        import app as app_module
+        with self.app.app_context():
+            contexts = {context.chain_id: context for context in app_module.chain_registry.active_contexts()}
+            finished = self._finished_tasks()
+
+        now = time.monotonic()
+        started = 0
+        for schedule, result in finished:
+            self._finish(schedule, result, now)
+        with self._lock:
+            for chain_id in set(self.schedules) - set(contexts):
+                self.schedules.pop(chain_id)
+                self.latest_snapshots.pop(chain_id, None)
+            for chain_id in contexts:
+                if chain_id not in self.schedules:
+                    self.schedules[chain_id] = ChainSchedule(chain_id, self.base_interval, now)
+
+            due = sorted(
+                (schedule for schedule in self.schedules.values() if schedule.next_run <= now),
+                key=lambda schedule: schedule.next_run
+            )
+            in_flight = sum(1 for schedule in self.schedules.values() if schedule.running)
+            for schedule in due:
+                if schedule.running:
+                    continue
+                if in_flight >= self.max_concurrency:
+                    if not schedule.deferred:
+                        SCHEDULER_SKIPS.inc(reason='budget')
+                        schedule.deferred = True
+                    continue
+                missed = int((now - schedule.next_run) // schedule.interval)
+                if missed:
+                    # Runs missed while busy or stopped collapse into this one
+                    SCHEDULER_SKIPS.inc(missed, reason='coalesced')
+                if self.queue:
+                    try:
+                        with self.app.app_context():
+                            schedule.task_id = self.queue.enqueue(schedule.chain_id)
+                    except Exception as e:
+                        print(f"Error enqueuing cycle for chain {schedule.chain_id}: {str(e)}")
+                        continue
+                else:
+                    self._pool.submit(self._run, contexts[schedule.chain_id], schedule)
+                schedule.running = True
+                schedule.started_at = now
+                schedule.deferred = False
+                in_flight += 1
+                started += 1
+        return started
+
+    def _run(self, context, schedule):
+        result = None
+        try:
+            result = run_observed_cycle(self.app, context)
+        except Exception as e:
+            print(f"Error in scheduled cycle for chain {context.name}: {str(e)}")
+        finally:
+            self._finish(schedule, result, time.monotonic())
+
+    def _finished_tasks(self):
+        """Pair running schedules with their queued tasks that have finished"""
+        if not self.queue:
+            return []
+        with self._lock:
+            waiting = {s.task_id: s for s in self.schedules.values() if s.running and s.task_id}
+        if not waiting:
+            return []
+        try:
+            return [(waiting[task_id], result) for task_id, result in self.queue.finished(list(waiting))]
+        except Exception as e:
+            print(f"Error checking queued cycles: {str(e)}")
+            return []
+
+    def _finish(self, schedule, result, now):
+        if now - schedule.started_at > schedule.interval:
+            # A fixed schedule would have started the next run on top of this one
+            SCHEDULER_SKIPS.inc(reason='overlap')
+        with self._lock:
+            if result:
+                schedule.observe(result, now)
+                self.latest_snapshots[schedule.chain_id] = result['snapshot']
+            schedule.reschedule(result is not None, now, self.base_interval, self.min_interval, self.max_interval)
+            schedule.running = False
+            schedule.task_id = None
+        CHAIN_INTERVAL.set(schedule.interval, chain_id=schedule.chain_id)
+
+    def record_portfolio(self):
+        """Store the latest snapshot of every chain, so totals cover all chains whatever their cadence"""
+        import app as app_module
+        with self._lock:
+            snapshots = list(self.latest_snapshots.values())
+        with self.app.app_context():
+            app_module.portfolio_history.record(snapshots)
+
+    def status(self):
+        now = time.monotonic()
+        with self._lock:
+            return [schedule.to_dict(now) for schedule in sorted(self.schedules.values(), key=lambda s: s.next_run)]
+
+    def shutdown(self, wait=False):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
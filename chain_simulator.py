@@ -0,0 +1,213 @@
+import hashlib
+import random
+import threading
+import time
+from urllib.parse import parse_qs, urlencode, urlparse
+from web3.providers.base import BaseProvider
+from metrics import FAILURES, RPC_LATENCY
+
+DEFAULT_OPTIONS = {
+    'block_time': 2.0,            # seconds per block; 0 mines a block per transaction
+    'yield_volatility': 0.02,     # std-dev of the per-block relative yield change
+    'gas_spike_rate': 0.05,       # share of blocks whose gas price spikes
+    'gas_spike_multiplier': 5.0,
+    'failure_rate': 0.0,          # share of RPC calls that fail
+    'latency_ms': 0.0,            # added to every RPC call
+    'seed': 0
+}
+BASE_GAS_PRICE = 25 * 10**9
+BASE_YIELD = 0.05
+INITIAL_BALANCE = 1000 * 10**18
+TRANSFER_GAS = 21000
+
+# One emulator per sim:// URL, shared by every provider in the process
+_chains = {}
+_chains_lock = threading.Lock()
+
+def simulated_rpc_url(network_id, **options):
+    """Build a sim:// RPC URL; Chain rows store it so every process emulates the same chain"""
+    unknown = set(options) - set(DEFAULT_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown simulator options: {', '.join(sorted(unknown))}")
+    query = urlencode({key: value for key, value in options.items() if value != DEFAULT_OPTIONS[key]})
+    return f'sim://{network_id}' + (f'?{query}' if query else '')
+
+def get_simulated_chain(rpc_url):
+    with _chains_lock:
+        chain = _chains.get(rpc_url)
+        if chain is None:
+            parsed = urlparse(rpc_url)
+            options = dict(DEFAULT_OPTIONS)
+            for key, values in parse_qs(parsed.query).items():
+                if key not in DEFAULT_OPTIONS:
+                    raise ValueError(f"Unknown simulator option: {key}")
+                options[key] = type(DEFAULT_OPTIONS[key])(values[-1])
+            chain = _chains[rpc_url] = SimulatedChain(int(parsed.netloc), **options)
+        return chain
+
+def register_simulated_chains(count, name_prefix='Simulated Chain', first_network_id=990000, **options):
+    """Add count active chains backed by the simulator, returning their rows"""
+    from base_models import Chain, db
+    chains = []
+    for i in range(count):
+        network_id = first_network_id + i
+        chain = Chain(
+            name=f'{name_prefix} {i + 1}',
+            network_id=network_id,
+            rpc_url=simulated_rpc_url(network_id, **{**options, 'seed': options.get('seed', 0) + i}),
+            symbol='AVAX',
+            explorer_url='http://localhost',
+            active=True
+        )
+        db.session.add(chain)
+        chains.append(chain)
+    db.session.commit()
+    return chains
+
+class SimulatedChain:
+    def __init__(self, network_id, block_time, yield_volatility, gas_spike_rate, gas_spike_multiplier,
+                 failure_rate, latency_ms, seed):
+        """Initialize an in-process EVM chain emulator with time-driven blocks"""
+        self.network_id = network_id
+        self.block_time = block_time
+        self.yield_volatility = yield_volatility
+        self.gas_spike_rate = gas_spike_rate
+        self.gas_spike_multiplier = gas_spike_multiplier
+        self.failure_rate = failure_rate
+        self.latency = latency_ms / 1000
+        self.seed = seed
+        self._random = random.Random(seed)
+        self._genesis = time.monotonic()
+        self._mined = 0
+        self._yield = BASE_YIELD
+        self._yield_block = 1
+        self._nonces = {}
+        self._receipts = {}
+        self._lock = threading.Lock()
+
+    def block_number(self):
+        if self.block_time:
+            return 1 + int((time.monotonic() - self._genesis) / self.block_time)
+        return 1 + self._mined
+
+    def gas_price(self, block_number):
+        # Derived from the block so every call within a block agrees
+        block_random = random.Random(f'{self.seed}:{block_number}')
+        price = BASE_GAS_PRICE * (1 + block_random.uniform(-0.1, 0.1))
+        if block_random.random() < self.gas_spike_rate:
+            price *= self.gas_spike_multiplier
+        return int(price)
+
+    def current_yield(self, block_number):
+        """Random-walk yield advanced once per block since the last read"""
+        with self._lock:
+            while self._yield_block < block_number:
+                self._yield = max(self._yield * (1 + self._random.gauss(0, self.yield_volatility)), 0.0)
+                self._yield_block += 1
+            return self._yield
+
+    def request(self, method, params):
+        """Answer one JSON-RPC call, raising ValueError for simulated or unsupported failures"""
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise ValueError('Simulated RPC failure')
+
+        block_number = self.block_number()
+        if method == 'eth_chainId':
+            return hex(self.network_id)
+        if method == 'net_version':
+            return str(self.network_id)
+        if method == 'eth_blockNumber':
+            return hex(block_number)
+        if method in ('eth_gasPrice', 'eth_maxPriorityFeePerGas'):
+            return hex(self.gas_price(block_number))
+        if method == 'eth_getBalance':
+            return hex(INITIAL_BALANCE)
+        if method == 'eth_getTransactionCount':
+            return hex(self._nonces.get(params[0].lower(), 0))
+        if method == 'eth_estimateGas':
+            return hex(TRANSFER_GAS)
+        if method == 'eth_getCode':
+            return '0x'
+        if method == 'eth_call':
+            # Every contract answers like a yield source: uint256 APY scaled by 1e18
+            return '0x' + int(self.current_yield(block_number) * 10**18).to_bytes(32, 'big').hex()
+        if method == 'eth_getBlockByNumber':
+            return self._block(block_number)
+        if method == 'eth_sendRawTransaction':
+            return self._send_raw_transaction(params[0], block_number)
+        if method == 'eth_getTransactionReceipt':
+            receipt = self._receipts.get(params[0])
+            if receipt is None or int(receipt['blockNumber'], 16) > block_number:
+                return None
+            return receipt
+        raise ValueError(f'Method {method} not supported by the chain simulator')
+
+    def _send_raw_transaction(self, raw, block_number):
+        from eth_account import Account
+        raw_bytes = bytes.fromhex(raw[2:] if raw.startswith('0x') else raw)
+        sender = Account.recover_transaction(raw_bytes)
+        tx_hash = '0x' + hashlib.sha3_256(raw_bytes).hexdigest()
+        with self._lock:
+            self._nonces[sender.lower()] = self._nonces.get(sender.lower(), 0) + 1
+            if not self.block_time:
+                self._mined += 1
+            included = block_number + 1
+            self._receipts[tx_hash] = {
+                'transactionHash': tx_hash,
+                'transactionIndex': '0x0',
+                'blockHash': self._block_hash(included),
+                'blockNumber': hex(included),
+                'from': sender,
+                'to': None,
+                'cumulativeGasUsed': hex(TRANSFER_GAS),
+                'gasUsed': hex(TRANSFER_GAS),
+                'effectiveGasPrice': hex(self.gas_price(included)),
+                'contractAddress': None,
+                'logs': [],
+                'logsBloom': '0x' + '00' * 256,
+                'status': '0x1',
+                'type': '0x0'
+            }
+        return tx_hash
+
+    def _block_hash(self, block_number):
+        return '0x' + hashlib.sha3_256(f'{self.network_id}:{block_number}'.encode()).hexdigest()
+
+    def _block(self, block_number):
+        return {
+            'number': hex(block_number),
+            'hash': self._block_hash(block_number),
+            'parentHash': self._block_hash(block_number - 1),
+            'timestamp': hex(int(time.time())),
+            'gasLimit': hex(30_000_000),
+            'gasUsed': '0x0',
+            'baseFeePerGas': hex(self.gas_price(block_number)),
+            'miner': '0x' + '00' * 20,
+            'difficulty': '0x0',
+            'transactions': []
+        }
+
+class SimulatedProvider(BaseProvider):
+    def __init__(self, rpc_url, chain_id):
+        """Initialize web3 provider answering from the in-process simulator for a sim:// URL"""
+        super().__init__()
+        self.chain = get_simulated_chain(rpc_url)
+        self.metrics_chain_id = chain_id
+        self._request_id = 0
+
+    def make_request(self, method, params):
+        started = time.perf_counter()
+        self._request_id += 1
+        try:
+            result = self.chain.request(method, params or [])
+            return {'jsonrpc': '2.0', 'id': self._request_id, 'result': result}
+        except ValueError as e:
+            FAILURES.inc(component='rpc', operation=method)
+            return {'jsonrpc': '2.0', 'id': self._request_id, 'error': {'code': -32000, 'message': str(e)}}
+        finally:
+            RPC_LATENCY.observe(time.perf_counter() - started, chain_id=self.metrics_chain_id, method=method)
+
+    def is_connected(self, show_traceback=False):
+        return True
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from metrics import CACHE_REQUESTS
+
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'avalanche-ai-agent' / 'compilations'
+
+class CompilationCache:
+    def __init__(self, cache_dir=None, max_bytes=256 * 1024 * 1024, memory_entries=256):
+        """Initialize on-disk compilation cache with size-bounded LRU eviction"""
+        self.cache_dir = Path(cache_dir or os.environ.get('COMPILATION_CACHE_DIR') or DEFAULT_CACHE_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Disk index ordered from least to most recently used
+        self._index = OrderedDict()
+        self._total_bytes = 0
+        entries = []
+        for path in self.cache_dir.glob('*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def make_key(source_code, contract_name, solc_version, settings=None):
+        """Hash everything that determines the compiler output"""
+        payload = json.dumps({
+            'source': source_code,
+            'contract': contract_name,
+            'solc_version': str(solc_version),
+            'settings': settings or {}
+        }, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        """Return a cached artifact, or None on a miss"""
+        with self._lock:
+            artifact = self._memory.get(key)
+            if artifact is not None:
+                self._memory.move_to_end(key)
+                if key in self._index:
+                    self._index.move_to_end(key)
+                CACHE_REQUESTS.inc(cache='compilation', result='hit')
+                return artifact
+
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                artifact = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            CACHE_REQUESTS.inc(cache='compilation', result='miss')
+            return None
+        CACHE_REQUESTS.inc(cache='compilation', result='hit')
+
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+            else:
+                # Written by another process sharing the cache directory
+                size = path.stat().st_size
+                self._index[key] = size
+                self._total_bytes += size
+            self._remember(key, artifact)
+        return artifact
+
+    def put(self, key, artifact):
+        """Store an artifact on disk and in memory, evicting least recently used entries"""
+        body = json.dumps(artifact, separators=(',', ':'))
+        path = self._path(key)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing compilation cache entry: {str(e)}")
+            return
+
+        with self._lock:
+            self._total_bytes -= self._index.pop(key, 0)
+            self._index[key] = len(body)
+            self._total_bytes += len(body)
+            self._remember(key, artifact)
+            self._evict()
+
+    def _remember(self, key, artifact):
+        """Keep an artifact in the in-memory LRU"""
+        self._memory[key] = artifact
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            self._memory.pop(key, None)
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def _path(self, key):
+        return self.cache_dir / f'{key}.json'
+
+    @staticmethod
+    def artifact_hash(abi, bytecode):
+        """Hash compiled output so identical artifacts share one database row"""
+        payload = json.dumps({'abi': abi, 'bytecode': bytecode}, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode()).hexdigest()
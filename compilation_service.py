@@ -0,0 +1,159 @@
+import json
+import multiprocessing
+import os
+import subprocess
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+OUTPUT_SELECTION = [
+    'abi',
+    'evm.bytecode.object',
+    'evm.deployedBytecode.object',
+    'evm.deployedBytecode.immutableReferences'
+]
+
+class CompilationQueueFull(Exception):
+    pass
+
+class CompilationTimeout(Exception):
+    pass
+
+def _run_standard_json(solc_binary, standard_input, timeout):
+    """Run one solc --standard-json invocation in a pool worker"""
+    try:
+        process = subprocess.run(
+            [solc_binary, '--standard-json'],
+            input=json.dumps(standard_input),
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        raise CompilationTimeout(f"solc exceeded {timeout}s")
+    if not process.stdout:
+        raise Exception(f"Error compiling contract: {process.stderr.strip()}")
+    return json.loads(process.stdout)
+
+class CompilationService:
+    def __init__(self, toolchain, max_workers=None, max_pending=32, timeout=60):
+        """Initialize compilation service backed by a bounded process pool"""
+        self.toolchain = toolchain
+        self.max_workers = max_workers or int(os.environ.get('COMPILE_MAX_WORKERS', os.cpu_count() or 1))
+        self.timeout = timeout
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._jobs = {}
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def build_standard_input(sources, optimizer=None, evm_version=None):
+        """Build solc standard-JSON input for one or more source files"""
+        settings = {'outputSelection': {'*': {'*': OUTPUT_SELECTION}}}
+        if optimizer:
+            settings['optimizer'] = {
+                'enabled': bool(optimizer.get('enabled', True)),
+                'runs': int(optimizer.get('runs', 200))
+            }
+        if evm_version:
+            settings['evmVersion'] = evm_version
+        return {
+            'language': 'Solidity',
+            'sources': {name: {'content': content} for name, content in sources.items()},
+            'settings': settings
+        }
+
+    def submit(self, sources, optimizer=None, evm_version=None, version=None):
+        """Queue a compile job and return its id, or raise CompilationQueueFull"""
+        if not self._pending.acquire(blocking=False):
+            raise CompilationQueueFull("Too many compile jobs in progress")
+
+        try:
+            solc_binary = str(self.toolchain.resolve(version))
+            standard_input = self.build_standard_input(sources, optimizer, evm_version)
+            future = self._get_pool().submit(_run_standard_json, solc_binary, standard_input, self.timeout)
+        except Exception:
+            self._pending.release()
+            raise
+
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = future
+        future.add_done_callback(lambda _: self._pending.release())
+        return job_id
+
+    def result(self, job_id, timeout=None):
+        """Wait for a job and return {'file:Contract': artifact} for every compiled contract"""
+        with self._lock:
+            future = self._jobs.get(job_id)
+        if future is None:
+            raise KeyError(f"Unknown compile job {job_id}")
+
+        try:
+            output = future.result(timeout=timeout or self.timeout + 5)
+        except FutureTimeoutError:
+            # A running job can't be cancelled; it frees its pending slot when the
+            # worker's own solc timeout ends it, but is no longer tracked here
+            future.cancel()
+            self._forget(job_id)
+            raise CompilationTimeout(f"Compile job {job_id} timed out")
+        finally:
+            if future.done():
+                self._forget(job_id)
+        return self.parse_output(output)
+
+    def cancel(self, job_id):
+        """Cancel a job that has not started running yet"""
+        with self._lock:
+            future = self._jobs.get(job_id)
+        if future and future.cancel():
+            self._forget(job_id)
+            return True
+        return False
+
+    def compile(self, sources, optimizer=None, evm_version=None, version=None):
+        """Submit a compile job and wait for its artifacts"""
+        return self.result(self.submit(sources, optimizer, evm_version, version))
+
+    def shutdown(self):
+        """Stop the worker pool, cancelling queued jobs"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def parse_output(output):
+        """Raise on compiler errors, otherwise flatten contracts into artifacts"""
+        errors = [e for e in output.get('errors', []) if e.get('severity') == 'error']
+        if errors:
+            messages = '; '.join(e.get('formattedMessage') or e.get('message', '') for e in errors)
+            raise Exception(f"Error compiling contract: {messages}")
+
+        artifacts = {}
+        for file_name, contracts in output.get('contracts', {}).items():
+            for contract_name, contract in contracts.items():
+                evm = contract.get('evm', {})
+                deployed = evm.get('deployedBytecode', {})
+                artifacts[f'{file_name}:{contract_name}'] = {
+                    'abi': contract.get('abi', []),
+                    'bytecode': evm.get('bytecode', {}).get('object', ''),
+                    'deployed_bytecode': deployed.get('object', ''),
+                    'immutable_references': deployed.get('immutableReferences', {})
+                }
+        return artifacts
+
+    def _get_pool(self):
+        """Create the process pool on first use"""
+        with self._lock:
+            if self._pool is None:
+                # spawn avoids forking a multi-threaded web server
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+
+    def _forget(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
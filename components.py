@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+
+class LazyComponent:
+    def __init__(self, app, name, factory):
+        """Initialize a component that is built on first attribute access
+
+        Attribute access is forwarded to the built object, so a LazyComponent
+        can stand in for the component itself in module globals. Its own
+        attributes are private so they never shadow the component's.
+        """
+        self._app = app
+        self._name = name
+        self._factory = factory
+        self._init_seconds = None
+        self._error = None
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def _resolve(self):
+        """Return the component, building it (and its imports) on first use"""
+        if self._instance is not None:
+            return self._instance
+        with self._lock:
+            if self._instance is None:
+                started = time.perf_counter()
+                try:
+                    with self._app.app_context():
+                        instance = self._factory()
+                except Exception as e:
+                    self._error = str(e)
+                    raise
+                self._init_seconds = time.perf_counter() - started
+                self._error = None
+                self._instance = instance
+                if os.environ.get('STARTUP_PROFILE') == '1':
+                    print(f"Initialized {self._name} in {self._init_seconds:.3f}s")
+        return self._instance
+
+    def __getattr__(self, attribute):
+        if attribute.startswith('_'):
+            raise AttributeError(attribute)
+        return getattr(self._resolve(), attribute)
+
+    def __bool__(self):
+        return True
+
+def unwrap(component):
+    """Return the built object behind a LazyComponent, or the object itself"""
+    if isinstance(component, LazyComponent):
+        return component._resolve()
+    return component
+
+class ComponentRegistry:
+    def __init__(self, app):
+        """Initialize registry of lazily built application components"""
+        self.app = app
+        self._components = {}
+        self._warming = None
+
+    def register(self, name, factory):
+        component = LazyComponent(self.app, name, factory)
+        self._components[name] = component
+        return component
+
+    def warm(self):
+        """Build every component now; returns whether all of them succeeded"""
+        ok = True
+        for component in self._components.values():
+            try:
+                component._resolve()
+            except Exception as e:
+                print(f"Error initializing {component._name}: {str(e)}")
+                ok = False
+        return ok
+
+    def warm_in_background(self):
+        """Build components on a background thread so the server can accept requests meanwhile"""
+        if self._warming is None:
+            self._warming = threading.Thread(target=self.warm, name='component-warmup', daemon=True)
+            self._warming.start()
+
+    def status(self):
+        """Report which components are built, how long each took, and any build error"""
+        return {
+            name: {
+                'warm': component._instance is not None,
+                'init_seconds': round(component._init_seconds, 4) if component._init_seconds is not None else None,
+                'error': component._error
+            } for name, component in self._components.items()
+        }
+
+    def all_warm(self):
+        return all(component._instance is not None for component in self._components.values())
@@ -1,53 +1,105 @@
-from pathlib import Path
-import json
-import solcx
-from web3 import Web3
-from base_models import db, Chain
+from sqlalchemy.exc import IntegrityError
+from base_models import db, Chain, Contract, ContractArtifact
+from chain_context import ChainRegistry
+from compilation_cache import CompilationCache
+from solc_toolchain import SolcToolchain, DEFAULT_SOLC_VERSION
+from compilation_service import CompilationService
+from bytecode_verifier import BytecodeVerifier
 from datetime import datetime
 
+SOLC_VERSION = DEFAULT_SOLC_VERSION
+
 class ContractManager:
-    def __init__(self, wallet_manager):
-        """Initialize contract manager with wallet manager"""
+    def __init__(self, wallet_manager, simulation_engine=None, chain_registry=None, compilation_cache=None, toolchain=None, compilation_service=None, bytecode_verifier=None):
+        """Initialize contract manager; the solc toolchain and compile pool start lazily on first compile"""
         self.wallet_manager = wallet_manager
-        self.w3 = Web3(Web3.HTTPProvider(self.wallet_manager.chain.rpc_url))
-        self._ensure_solc()
+        self.simulation_engine = simulation_engine
+        self.chain_registry = chain_registry or ChainRegistry(wallet_manager)
+        self.compilation_cache = compilation_cache or CompilationCache()
+        self.toolchain = toolchain or SolcToolchain(SOLC_VERSION)
+        self.compilation_service = compilation_service or CompilationService(self.toolchain)
+        self.bytecode_verifier = bytecode_verifier or BytecodeVerifier()
+
+    def _resolve_context(self, context):
+        """Use the given chain context, or the wallet manager's default chain"""
+        return context or self.chain_registry.get(self.wallet_manager.chain_id)
         
-    def _ensure_solc(self):
-        """Ensure Solidity compiler is installed"""
-        try:
-            solcx.install_solc(version='0.8.20')
-            solcx.set_solc_version('0.8.20')
-        except Exception as e:
-            print(f"Error installing solc: {str(e)}")
-            raise
-            
-    def compile_contract(self, source_code: str, contract_name: str):
-        """Compile a Solidity contract"""
+    def compile_contract(self, source_code: str, contract_name: str, sources: dict = None, optimizer: dict = None):
+        """Compile a Solidity contract, reusing cached output for identical inputs
+
+        sources maps file names to source text for multi-file projects; every
+        contract in the invocation is cached, not just the one requested.
+        """
+        sources = sources or {f'{contract_name}.sol': source_code}
+        settings = {'optimizer': optimizer} if optimizer else {}
+        cache_key = CompilationCache.make_key(sources, contract_name, SOLC_VERSION, settings)
+        cached = self.compilation_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
-            compiled_sol = solcx.compile_source(
-                source_code,
-                output_values=['abi', 'bin'],
-                solc_version='0.8.20'
-            )
-            contract_id = f'<stdin>:{contract_name}'
-            return {
-                'abi': compiled_sol[contract_id]['abi'],
-                'bytecode': compiled_sol[contract_id]['bin']
-            }
+            artifacts = self.compilation_service.compile(sources, optimizer=optimizer, version=SOLC_VERSION)
         except Exception as e:
             print(f"Error compiling contract: {str(e)}")
             raise
+
+        by_name = {}
+        for contract_id, artifact in artifacts.items():
+            artifact['artifact_hash'] = CompilationCache.artifact_hash(artifact['abi'], artifact['bytecode'])
+            by_name.setdefault(contract_id.rsplit(':', 1)[1], []).append(artifact)
+
+        for name, matches in by_name.items():
+            if len(matches) == 1:
+                self.compilation_cache.put(
+                    CompilationCache.make_key(sources, name, SOLC_VERSION, settings),
+                    matches[0]
+                )
+
+        if contract_name not in by_name:
+            raise Exception(f"Error compiling contract: {contract_name} not found in compiler output")
+        return by_name[contract_name][0]
+
+    def store_artifact(self, compiled_contract: dict):
+        """Get or create the shared database row for a compiled artifact"""
+        artifact_hash = compiled_contract.get('artifact_hash') or CompilationCache.artifact_hash(
+            compiled_contract['abi'], compiled_contract['bytecode']
+        )
+        artifact = ContractArtifact.query.filter_by(artifact_hash=artifact_hash).first()
+        if artifact:
+            return artifact
+
+        artifact = ContractArtifact(
+            artifact_hash=artifact_hash,
+            abi=compiled_contract['abi'],
+            bytecode=compiled_contract['bytecode'],
+            deployed_bytecode=compiled_contract.get('deployed_bytecode'),
+            immutable_references=compiled_contract.get('immutable_references')
+        )
+        try:
+            with db.session.begin_nested():
+                db.session.add(artifact)
+        except IntegrityError:
+            # Another request stored the same artifact first
+            artifact = ContractArtifact.query.filter_by(artifact_hash=artifact_hash).first()
+        return artifact
             
-    def deploy_contract(self, compiled_contract: dict, constructor_args=None):
-        """Deploy a compiled contract"""
+    def deploy_contract(self, compiled_contract: dict, constructor_args=None, context=None, on_submitted=None):
+        """Deploy a compiled contract on the given chain context
+
+        on_submitted, if given, is called with the transaction hash as soon as
+        the transaction is broadcast, before waiting for the receipt.
+        """
         try:
+            context = self._resolve_context(context)
+            w3 = context.w3
+
             # Get wallet
-            wallet = self.wallet_manager.get_wallet()
+            wallet = context.signer.get_account()
             if not wallet:
                 raise Exception("No wallet configured")
                 
             # Create contract deployment transaction
-            contract = self.w3.eth.contract(
+            contract = w3.eth.contract(
                 abi=compiled_contract['abi'],
                 bytecode=compiled_contract['bytecode']
             )
@@ -59,22 +111,28 @@ class ContractManager:
             # Estimate gas for deployment
             deploy_txn = contract.constructor(*constructor_args).build_transaction({
                 'from': wallet.address,
-                'nonce': self.w3.eth.get_transaction_count(wallet.address),
+                'nonce': w3.eth.get_transaction_count(wallet.address),
                 'gas': 2000000,  # Will be estimated
-                'gasPrice': self.w3.eth.gas_price
+                'gasPrice': context.fee_oracle.gas_price(),
+                'chainId': context.network_id
             })
             
-            # Update gas estimate
-            deploy_txn['gas'] = self.w3.eth.estimate_gas(deploy_txn)
-            
-            # Sign transaction
-            signed_txn = self.wallet_manager.sign_transaction(deploy_txn)
+            # Dry-run the constructor before signing, falling back to the node estimate
+            simulation = self.simulate_deployment(deploy_txn, context)
+            if simulation and not simulation.success:
+                raise Exception(f"Deployment would revert: {simulation.revert_reason}")
+            if simulation:
+                deploy_txn['gas'] = simulation.gas_used
+            else:
+                deploy_txn['gas'] = w3.eth.estimate_gas(deploy_txn)
             
-            # Send transaction
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            # Sign and send transaction with the next free nonce
+            tx_hash = context.signer.send_transaction(w3, deploy_txn)
+            if on_submitted:
+                on_submitted(tx_hash.hex())
             
             # Wait for transaction receipt
-            tx_receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
             
             return {
                 'contract_address': tx_receipt['contractAddress'],
@@ -86,18 +144,83 @@ class ContractManager:
             print(f"Error deploying contract: {str(e)}")
             raise
             
-    def verify_contract(self, contract_address: str, compiled_contract: dict):
-        """Verify deployed contract code"""
-        try:
-            deployed_bytecode = self.w3.eth.get_code(Web3.to_checksum_address(contract_address))
-            expected_bytecode = compiled_contract['bytecode']
-            
-            # Remove metadata hash from comparison (last 43 bytes)
-            deployed_code = deployed_bytecode.hex()[:-86]
-            expected_code = expected_bytecode[:-86]
+    def simulate_deployment(self, deploy_txn, context=None):
+        """Dry-run a contract creation in the in-process EVM, or return None without an engine"""
+        if not self.simulation_engine:
+            return None
+        context = self._resolve_context(context)
+        return self.simulation_engine.simulate(
+            {
+                'from': deploy_txn.get('from'),
+                'value': deploy_txn.get('value', 0),
+                'data': deploy_txn['data']
+            },
+            w3=context.w3,
+            chain_key=context.chain_id
+        )
             
-            return deployed_code == expected_code
+    def verify_contract(self, contract_address: str, compiled_contract: dict, context=None):
+        """Verify deployed contract code on the given chain context"""
+        try:
+            context = self._resolve_context(context)
+            return self.bytecode_verifier.verify(context, contract_address, compiled_contract)
             
         except Exception as e:
             print(f"Error verifying contract: {str(e)}")
             return False
+
+    def run_deploy_job(self, contract_id: int, compiled_contract: dict, constructor_args=None, context=None):
+        """Deploy a contract and record the outcome on its own Contract row"""
+        contract = db.session.get(Contract, contract_id)
+        if not contract:
+            raise Exception(f"Contract {contract_id} not found")
+
+        def record_submission(tx_hash):
+            contract.transaction_hash = tx_hash
+            db.session.commit()
+
+        deployment = self.deploy_contract(compiled_contract, constructor_args, context, record_submission)
+        contract.address = deployment['contract_address']
+        contract.transaction_hash = deployment['transaction_hash']
+        contract.deployed_at = datetime.utcnow()
+        db.session.commit()
+        return {
+            'contract_id': contract_id,
+            'contract_address': deployment['contract_address'],
+            'transaction_hash': deployment['transaction_hash']
+        }
+
+    def run_verify_job(self, contract_id: int, contract_address: str, compiled_contract: dict, context=None):
+        """Verify deployed code and mark the Contract row verified on a match"""
+        is_verified = self.verify_contract(contract_address, compiled_contract, context)
+        if is_verified and contract_id:
+            contract = db.session.get(Contract, contract_id)
+            if contract:
+                contract.verified = True
+                db.session.commit()
+        return {'contract_id': contract_id, 'contract_address': contract_address, 'verified': is_verified}
+
+    def run_batch_verify_job(self, items):
+        """Verify many (contract_id, context, address, compiled) items and mark matches verified"""
+        results = self.bytecode_verifier.verify_many([item[1:] for item in items])
+        for (contract_id, *_), result in zip(items, results):
+            result['contract_id'] = contract_id
+            if result['verified'] and contract_id:
+                contract = db.session.get(Contract, contract_id)
+                if contract:
+                    contract.verified = True
+        db.session.commit()
+        return {'results': results, 'verified': sum(1 for r in results if r['verified']), 'total': len(results)}
+
+    @staticmethod
+    def artifact_for(contract):
+        """Rebuild a compiled-contract dict from a Contract row and its artifact"""
+        artifact = db.session.get(ContractArtifact, contract.artifact_id) if contract.artifact_id else None
+        if artifact:
+            return {
+                'abi': artifact.abi,
+                'bytecode': artifact.bytecode,
+                'deployed_bytecode': artifact.deployed_bytecode,
+                'immutable_references': artifact.immutable_references
+            }
+        return {'abi': contract.abi, 'bytecode': contract.bytecode}
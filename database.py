@@ -0,0 +1,130 @@
+import contextvars
+import os
+import secrets
+import time
+from contextlib import contextmanager
+from flask import Flask, current_app, has_request_context, session as client_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_BIND = 'replica'
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+_replica_used = contextvars.ContextVar('replica_used', default=False)
+
+def engine_options(url):
+    """Pool, health check and timeout settings for one engine, from DB_* environment variables"""
+    options = {
+        # Test connections on checkout, so ones dropped by a database restart or failover are replaced
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1',
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE_SECONDS', 1800))
+    }
+    if url.startswith('sqlite'):
+        return options
+    options.update({
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT_SECONDS', 30))
+    })
+    statement_timeout = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 0))
+    if statement_timeout and url.startswith('postgresql'):
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+    return options
+
+def database_config():
+    """Flask-SQLAlchemy settings for the primary and, if DATABASE_REPLICA_URL is set, a read replica"""
+    url = os.environ.get('DATABASE_URL')
+    config = {
+        'SQLALCHEMY_DATABASE_URI': url,
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options(url or ''),
+        'READ_YOUR_WRITES_SECONDS': float(os.environ.get('DB_READ_YOUR_WRITES_SECONDS', 5)),
+        'REPLICA_MAX_LAG_SECONDS': float(os.environ.get('DB_REPLICA_MAX_LAG_SECONDS', 10))
+    }
+    replica_url = os.environ.get('DATABASE_REPLICA_URL')
+    if replica_url:
+        config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: {'url': replica_url, **engine_options(replica_url)}}
+    return config
+
+def create_app():
+    """Create and configure Flask application"""
+    from base_models import init_db
+    app = Flask(__name__)
+    app.config.update(database_config())
+    # Signs session cookies only; without SECRET_KEY they don't survive a restart or span workers
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
+    init_db(app)
+    return app
+
+class RoutingSession(Session):
+    """Session that sends reads inside replica_reads() to the replica and everything else to the primary"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        writes = self._flushing or (clause is not None and (
+            getattr(clause, 'is_dml', False) or getattr(clause, '_for_update_arg', None) is not None
+        ))
+        if bind is None and not writes and _replica_reads.get():
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                _replica_used.set(True)
+                return engine
+        if writes:
+            self.info['wrote'] = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _remember_write(session):
+    # Read-your-writes: the client's next reads stay on the primary for a while
+    if session.info.pop('wrote', False) and has_request_context():
+        client_session['db_wrote_at'] = time.time()
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_write(session):
+    session.info.pop('wrote', None)
+
+def _wrote_recently():
+    if not has_request_context() or 'db_wrote_at' not in client_session:
+        return False
+    return time.time() - client_session['db_wrote_at'] < current_app.config.get('READ_YOUR_WRITES_SECONDS', 0)
+
+@contextmanager
+def replica_reads():
+    """Send reads in this block (or decorated function) to the read replica, when one is configured
+
+    Writes, flushes and SELECT ... FOR UPDATE still go to the primary. A
+    client that wrote within READ_YOUR_WRITES_SECONDS keeps reading from
+    the primary, so replication lag never hides its own changes.
+    """
+    if REPLICA_BIND not in current_app.config.get('SQLALCHEMY_BINDS', {}) or _wrote_recently():
+        yield
+        return
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+def build_noting_replica(build):
+    """Call build(), returning its result and whether any of its reads were served by the replica"""
+    token = _replica_used.set(False)
+    try:
+        result = build()
+        return result, _replica_used.get()
+    finally:
+        _replica_used.reset(token)
+
+def database_health():
+    """Check every engine with SELECT 1, reporting its status and connection pool usage"""
+    from base_models import db
+    engines = {'primary': db.engine}
+    if REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        engines['replica'] = db.engines[REPLICA_BIND]
+    health = {}
+    for name, engine in engines.items():
+        try:
+            with engine.connect() as connection:
+                connection.execute(db.text('SELECT 1'))
+            health[name] = {'status': 'ok', 'pool': engine.pool.status()}
+        except Exception as e:
+            health[name] = {'status': str(e), 'pool': engine.pool.status()}
+    return health
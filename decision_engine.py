@@ -1,15 +1,24 @@
+import os
 import requests
+import time
 from datetime import datetime
 from base_models import AIDecision, db
 from memory_manager import MemoryManager
+from metrics import DECISION_API_LATENCY, FAILURES
+from tracing import tracer
 
 class DecisionEngine:
     def __init__(self):
-        self.brianknows_api_key = "YOUR_BRIANKNOWS_API_KEY"
-        self.api_url = "https://api.brianknows.ai/v1/decide"
+        self.brianknows_api_key = os.environ.get('BRIANKNOWS_API_KEY', "YOUR_BRIANKNOWS_API_KEY")
+        self.api_url = os.environ.get('DECISION_API_URL', "https://api.brianknows.ai/v1/decide")
         self.memory_manager = MemoryManager()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Register a callback invoked with each decision after it is recorded"""
+        self._listeners.append(callback)
         
-    def make_decision(self, chain_data):
+    def make_decision(self, chain_data, context=None):
         """Make investment decision based on chain data and past memories"""
         try:
             # Get relevant transaction patterns
@@ -19,16 +28,22 @@ class DecisionEngine:
             # Enhance decision request with historical data
             decision_request = self._prepare_decision_request(chain_data, patterns, preferences)
             
-            response = requests.post(
-                self.api_url,
-                headers={
-                    "Authorization": f"Bearer {self.brianknows_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json=decision_request
-            )
-            
-            decision_data = response.json()
+            started = time.perf_counter()
+            try:
+                with tracer.span('decision_api'):
+                    response = requests.post(
+                        self.api_url,
+                        headers={
+                            "Authorization": f"Bearer {self.brianknows_api_key}",
+                            "Content-Type": "application/json"
+                        },
+                        json=decision_request
+                    )
+                    decision_data = response.json()
+            except Exception:
+                DECISION_API_LATENCY.observe(time.perf_counter() - started, outcome='error')
+                raise
+            DECISION_API_LATENCY.observe(time.perf_counter() - started, outcome='success')
             
             # Create AI decision record
             decision = AIDecision(
@@ -39,27 +54,53 @@ class DecisionEngine:
             db.session.add(decision)
             db.session.commit()
             
+            # A decision may approve several actions in one cycle
+            transaction_data = decision_data.get('transaction_data')
+            actions = decision_data.get('actions') or ([transaction_data] if transaction_data else [])
+            self._notify({
+                'id': decision.id,
+                'decision_type': decision.decision_type,
+                'confidence': decision.confidence,
+                'reasoning': decision.reasoning,
+                'should_execute': decision_data['should_execute'],
+                'actions': len(actions),
+                'chain_id': context.chain_id if context else None,
+                'timestamp': decision.timestamp
+            })
+            
             # Store the decision pattern if it's a new type
             if decision_data['should_execute']:
-                pattern_key = f"{decision_data['type']}_{datetime.utcnow().strftime('%Y%m')}"
-                self.memory_manager.store_transaction_pattern(
-                    pattern_key,
-                    {
-                        'type': decision_data['type'],
-                        'conditions': chain_data,
-                        'outcome': decision_data['transaction_data']
-                    }
-                )
+                for action in actions:
+                    action_type = action.get('type', decision_data['type'])
+                    pattern_key = f"{action_type}_{datetime.utcnow().strftime('%Y%m')}"
+                    self.memory_manager.store_transaction_pattern(
+                        pattern_key,
+                        {
+                            'type': action_type,
+                            'conditions': chain_data,
+                            'outcome': action
+                        }
+                    )
             
             return Decision(
                 should_execute=decision_data['should_execute'],
-                transaction_data=decision_data['transaction_data']
+                transaction_data=transaction_data or (actions[0] if actions else None),
+                actions=actions,
+                decision_id=decision.id
             )
             
         except Exception as e:
             print(f"Error making decision: {str(e)}")
+            FAILURES.inc(component='decision_engine', operation='make_decision')
             return Decision(should_execute=False, transaction_data=None)
             
+    def _notify(self, record):
+        for listener in self._listeners:
+            try:
+                listener(record)
+            except Exception as e:
+                print(f"Error in decision listener: {str(e)}")
+            
     def _prepare_decision_request(self, chain_data, patterns=None, preferences=None):
         """Prepare the decision request with historical context"""
         from base_models import RiskParameter
@@ -109,6 +150,10 @@ class DecisionEngine:
         }
 
 class Decision:
-    def __init__(self, should_execute, transaction_data):
+    def __init__(self, should_execute, transaction_data, actions=None, decision_id=None):
         self.should_execute = should_execute
+        self.decision_id = decision_id
         self.transaction_data = transaction_data
+        if actions is None:
+            actions = [transaction_data] if transaction_data else []
+        self.actions = actions
@@ -0,0 +1,254 @@
+import itertools
+import json
+import threading
+import uuid
+from collections import deque
+from datetime import date, datetime, timedelta
+
+# Identifies this process's rows in the stream event table
+PROCESS_ID = uuid.uuid4().hex
+
+class Subscription:
+    def __init__(self, max_buffer):
+        """Initialize one client's bounded event buffer"""
+        self.events = deque(maxlen=max_buffer)
+        self.overflowed = False
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def push(self, event):
+        with self.condition:
+            if len(self.events) == self.events.maxlen:
+                # A slow client loses the oldest events and is told to resync
+                self.overflowed = True
+            self.events.append(event)
+            self.condition.notify()
+
+    def drain(self, timeout):
+        """Wait up to timeout for events and return them, oldest first"""
+        with self.condition:
+            if not self.events and not self.closed:
+                self.condition.wait(timeout)
+            events = list(self.events)
+            self.events.clear()
+            overflowed, self.overflowed = self.overflowed, False
+        return events, overflowed
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+class EventBroadcaster:
+    def __init__(self, max_buffer=256, max_clients=100, heartbeat_interval=15.0):
+        """Initialize in-process broadcaster that fans events out to SSE clients"""
+        self.max_buffer = max_buffer
+        self.max_clients = max_clients
+        self.heartbeat_interval = heartbeat_interval
+        self._ids = itertools.count(1)
+        self._history = deque(maxlen=max_buffer)
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event_type, data):
+        """Send an event to every connected client"""
+        with self._lock:
+            event = (next(self._ids), event_type, json.dumps(data, default=self._serialize))
+            self._history.append(event)
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.push(event)
+
+    def subscribe(self, last_event_id=None):
+        """Register a client, replaying buffered events after last_event_id"""
+        subscription = Subscription(self.max_buffer)
+        with self._lock:
+            if len(self._subscriptions) >= self.max_clients:
+                return None
+            if last_event_id is not None:
+                for event in self._history:
+                    if event[0] > last_event_id:
+                        subscription.push(event)
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+        subscription.close()
+
+    def client_count(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+    def stream(self, subscription):
+        """Yield Server-Sent Events for a subscription until the client disconnects"""
+        try:
+            yield 'retry: 5000\n\n'
+            while not subscription.closed:
+                events, overflowed = subscription.drain(self.heartbeat_interval)
+                if overflowed:
+                    yield 'event: resync\ndata: {}\n\n'
+                if not events:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+                for event_id, event_type, data in events:
+                    yield f'id: {event_id}\nevent: {event_type}\ndata: {data}\n\n'
+        finally:
+            self.unsubscribe(subscription)
+
+    def close_all(self):
+        """Disconnect every client, e.g. on shutdown"""
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, set()
+        for subscription in subscriptions:
+            subscription.close()
+
+    @staticmethod
+    def _serialize(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return str(value)
+
+def record_stream_event(event_type, data):
+    """Store an event for the database feeds of other processes, e.g. web processes when cycles run in an agent worker
+
+    Written on its own connection, so it never commits the caller's session.
+    """
+    from base_models import StreamEvent, db
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(db.insert(StreamEvent).values(
+                event_type=event_type,
+                data=json.loads(json.dumps(data, default=EventBroadcaster._serialize)),
+                source=PROCESS_ID,
+                created_at=datetime.utcnow()
+            ))
+    except Exception as e:
+        print(f"Error recording {event_type} stream event: {str(e)}")
+
+class DatabaseEventFeed:
+    def __init__(self, app, broadcaster, interval=2.0, batch_size=500, stream_retention=timedelta(hours=1)):
+        """Initialize feed that tails new ledger rows, decisions, snapshots and stream events into a broadcaster
+
+        Cycles may run in a separate agent process, so web processes learn
+        about new rows from the database rather than in-process listeners.
+        """
+        self.app = app
+        self.broadcaster = broadcaster
+        self.interval = interval
+        self.batch_size = batch_size
+        self.stream_retention = stream_retention
+        self._last_pruned = None
+        self._listeners = []
+        self._last_ids = {}
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def add_listener(self, callback):
+        """Register a callback invoked with (kind, rows) for each batch of newly seen rows"""
+        self._listeners.append(callback)
+
+    def start(self):
+        if self._thread:
+            return
+        with self.app.app_context():
+            from base_models import AIDecision, PortfolioSnapshot, StreamEvent, Transaction, db
+            # Only rows written from now on are pushed
+            self._last_ids['transaction'] = db.session.query(db.func.max(Transaction.id)).scalar() or 0
+            self._last_ids['decision'] = db.session.query(db.func.max(AIDecision.id)).scalar() or 0
+            self._last_ids['portfolio'] = db.session.query(db.func.max(PortfolioSnapshot.id)).scalar() or 0
+            self._last_ids['stream'] = db.session.query(db.func.max(StreamEvent.id)).scalar() or 0
+        self._thread = threading.Thread(target=self._run, name='event-feed', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    self.poll()
+            except Exception as e:
+                print(f"Error polling event feed: {str(e)}")
+
+    def poll(self):
+        """Publish ledger rows, decisions, portfolio snapshots and stream events added since the last poll"""
+        from base_models import AIDecision, Chain, PortfolioSnapshot, StreamEvent, Transaction, db
+
+        events = StreamEvent.query.filter(StreamEvent.id > self._last_ids['stream']) \
+            .order_by(StreamEvent.id).limit(self.batch_size).all()
+        if events:
+            self._last_ids['stream'] = events[-1].id
+            for event in events:
+                # Events from this process were already published by its own listeners
+                if event.source != PROCESS_ID:
+                    self.broadcaster.publish(event.event_type, event.data)
+        now = datetime.utcnow()
+        if self._last_pruned is None or now - self._last_pruned > self.stream_retention / 4:
+            StreamEvent.query.filter(StreamEvent.created_at < now - self.stream_retention).delete()
+            db.session.commit()
+            self._last_pruned = now
+
+        rows = Transaction.query.filter(Transaction.id > self._last_ids['transaction']) \
+            .order_by(Transaction.id).limit(self.batch_size).all()
+        if rows:
+            self._last_ids['transaction'] = rows[-1].id
+            batch = [{
+                'id': tx.id,
+                'hash': tx.hash,
+                'type': tx.type,
+                'amount': tx.amount,
+                'status': tx.status,
+                'gas_used': tx.gas_used,
+                'chain_id': tx.chain_id,
+                'timestamp': tx.timestamp
+            } for tx in rows]
+            for row in batch:
+                self.broadcaster.publish('transaction', row)
+            self._notify('transaction', batch)
+
+        decisions = AIDecision.query.filter(AIDecision.id > self._last_ids['decision']) \
+            .order_by(AIDecision.id).limit(self.batch_size).all()
+        if decisions:
+            self._last_ids['decision'] = decisions[-1].id
+            for decision in decisions:
+                self.broadcaster.publish('decision', {
+                    'id': decision.id,
+                    'decision_type': decision.decision_type,
+                    'confidence': decision.confidence,
+                    'reasoning': decision.reasoning,
+                    'timestamp': decision.timestamp
+                })
+            self._notify('decision', decisions)
+
+        snapshots = PortfolioSnapshot.query.filter(PortfolioSnapshot.id > self._last_ids['portfolio']) \
+            .order_by(PortfolioSnapshot.id).limit(self.batch_size).all()
+        if snapshots:
+            self._last_ids['portfolio'] = snapshots[-1].id
+            chains = {chain.id: chain for chain in Chain.query.all()}
+            for snapshot in snapshots:
+                chain = chains.get(snapshot.chain_id)
+                if chain:
+                    self.broadcaster.publish('balance', {
+                        'chain_id': chain.id,
+                        'name': chain.name,
+                        'symbol': chain.symbol,
+                        'network_id': chain.network_id,
+                        'balance': snapshot.balance
+                    })
+                elif snapshot.chain_id is None:
+                    self.broadcaster.publish('portfolio', {
+                        'balance': snapshot.balance,
+                        'usd_value': snapshot.usd_value,
+                        'timestamp': snapshot.timestamp
+                    })
+            self._notify('portfolio', snapshots)
+
+    def _notify(self, kind, rows):
+        for listener in self._listeners:
+            try:
+                listener(kind, rows)
+            except Exception as e:
+                print(f"Error in event feed listener: {str(e)}")
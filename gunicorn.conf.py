@@ -0,0 +1,13 @@
+"""Gunicorn settings for the web tier, loaded automatically by `gunicorn wsgi:app`
+
+Each /api/events client holds a thread for as long as it stays connected,
+so sync workers would let a few dashboards block the API. Threaded workers
+share WEB_THREADS with the app, which caps event streams below it.
+"""
+import os
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 32))
+# Streams send a keepalive every 15s; don't let the worker timeout cut them off
+timeout = 60
@@ -1,15 +1,4 @@
-from base_models import Chain, db, init_db
-from flask import Flask
-import os
-
-def create_app():
-    """Create and configure Flask application"""
-    app = Flask(__name__)
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SECRET_KEY'] = os.environ.get('WALLET_ENCRYPTION_KEY', 'dev-key')
-    init_db(app)
-    return app
+from base_models import Chain, db
 
 def initialize_default_chains():
     """Initialize default blockchain networks"""
@@ -49,6 +38,7 @@ def initialize_default_chains():
         raise
 
 if __name__ == "__main__":
+    from database import create_app
     app = create_app()
     with app.app_context():
         initialize_default_chains()
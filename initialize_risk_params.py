@@ -1,14 +1,4 @@
 from base_models import RiskParameter, db
-from flask import Flask
-import os
-
-def create_app():
-    """Create and configure Flask application"""
-    app = Flask(__name__)
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SECRET_KEY'] = os.environ.get('WALLET_ENCRYPTION_KEY', 'dev-key')
-    return app
 
 def initialize_risk_parameters():
     """Initialize default risk parameters"""
@@ -73,6 +63,7 @@ def initialize_risk_parameters():
         raise
 
 if __name__ == "__main__":
+    from database import create_app
     app = create_app()
     with app.app_context():
         initialize_risk_parameters()
@@ -0,0 +1,95 @@
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from base_models import Job, db
+
+class JobManager:
+    def __init__(self, app, max_workers=None, stale_after=3600):
+        """Initialize job manager that runs long contract operations on worker threads"""
+        self.app = app
+        self.max_workers = max_workers or int(os.environ.get('JOB_MAX_WORKERS', 4))
+        self.stale_after = stale_after
+        self._listeners = []
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job-worker')
+        self._fail_interrupted()
+
+    def add_listener(self, callback):
+        """Register a callback invoked with each job status change"""
+        self._listeners.append(callback)
+
+    def submit(self, job_type, func, *args, contract_id=None, **kwargs):
+        """Persist a queued job, schedule func(*args, **kwargs) and return the job id"""
+        job = Job(id=uuid.uuid4().hex, job_type=job_type, status='queued', contract_id=contract_id)
+        db.session.add(job)
+        db.session.commit()
+        self._notify({'id': job.id, 'type': job_type, 'status': 'queued', 'contract_id': contract_id})
+        self._pool.submit(self._run, job.id, func, args, kwargs)
+        return job.id
+
+    def get_status(self, job_id):
+        """Return a job's status, result and error, or None if it does not exist"""
+        job = db.session.get(Job, job_id)
+        if not job:
+            return None
+        return {
+            'id': job.id,
+            'type': job.job_type,
+            'status': job.status,
+            'contract_id': job.contract_id,
+            'result': job.result,
+            'error': job.error,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None
+        }
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and optionally wait for running ones"""
+        self._pool.shutdown(wait=wait)
+
+    def _run(self, job_id, func, args, kwargs):
+        """Execute one job inside an app context and record its outcome"""
+        with self.app.app_context():
+            self._update(job_id, status='running', started_at=datetime.utcnow())
+            try:
+                result = func(*args, **kwargs)
+                self._update(job_id, status='succeeded', result=result, finished_at=datetime.utcnow())
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error running job {job_id}: {str(e)}")
+                self._update(job_id, status='failed', error=str(e), finished_at=datetime.utcnow())
+            finally:
+                db.session.remove()
+
+    def _update(self, job_id, **fields):
+        try:
+            Job.query.filter_by(id=job_id).update(fields)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error updating job {job_id}: {str(e)}")
+            return
+        self._notify({'id': job_id, **fields})
+
+    def _notify(self, event):
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"Error in job listener: {str(e)}")
+
+    def _fail_interrupted(self):
+        """Mark jobs abandoned by a previous process as failed"""
+        # Only old jobs: other web processes may still be running recent ones
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        with self.app.app_context():
+            try:
+                Job.query.filter(Job.status.in_(['queued', 'running']), Job.created_at < cutoff).update(
+                    {'status': 'failed', 'error': 'Interrupted by restart', 'finished_at': datetime.utcnow()},
+                    synchronize_session=False
+                )
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error recovering interrupted jobs: {str(e)}")
@@ -0,0 +1,154 @@
+import atexit
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from sqlalchemy.exc import OperationalError
+from base_models import Transaction, db
+
+class LedgerWriter:
+    def __init__(self, app, batch_size=100, flush_interval=1.0, max_queue_size=10000, put_timeout=0.05, rollups=None,
+                 retry_attempts=5, retry_delay=0.5):
+        """Initialize ledger writer that batches transaction records on a background thread"""
+        self.app = app
+        self.retry_attempts = retry_attempts
+        self.retry_delay = retry_delay
+        self.rollups = rollups
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._listeners = []
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='ledger-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    @staticmethod
+    def new_failed_hash():
+        """Generate a unique placeholder hash for a failed transaction attempt"""
+        return 'failed_' + uuid.uuid4().hex
+
+    def add_listener(self, callback):
+        """Register a callback invoked with each batch of rows after it is committed"""
+        self._listeners.append(callback)
+
+    def record(self, **row):
+        """Queue a transaction record for the next batched insert"""
+        row.setdefault('timestamp', datetime.utcnow())
+        if self._stopped.is_set():
+            self._write_batch([row])
+            return
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            # Back-pressure: the writer is saturated, so persist this row inline
+            # rather than dropping it from the ledger
+            print("Ledger queue full, writing transaction record synchronously")
+            self._write_batch([row])
+
+    def pending(self):
+        """Return the number of records waiting to be flushed"""
+        return self._queue.qsize()
+
+    def stop(self, timeout=10.0):
+        """Stop the background thread after flushing every queued record"""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._thread.join(timeout)
+        self._flush_all()
+
+    def _run(self):
+        """Collect queued records into batches until stopped"""
+        while not self._stopped.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._write_batch(batch)
+
+    def _collect_batch(self):
+        """Block for the first record, then gather up to batch_size within flush_interval"""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush_all(self):
+        """Drain the queue synchronously, used on shutdown"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._write_batch(batch)
+                batch = []
+        if batch:
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        """Insert a batch of transaction records in a single statement
+
+        Outages (OperationalError) are retried with backoff. Any other error
+        means some row is bad, so the rows are retried one at a time and only
+        the ones that fail are dropped.
+        """
+        for attempt in range(self.retry_attempts + 1):
+            try:
+                with self.app.app_context():
+                    db.session.execute(db.insert(Transaction), batch)
+                    if self.rollups:
+                        self._apply_rollups(batch)
+                    db.session.commit()
+                break
+            except OperationalError as e:
+                self._rollback()
+                if attempt == self.retry_attempts:
+                    print(f"Error writing ledger batch of {len(batch)} records, giving up after {attempt + 1} attempts: {str(e)}")
+                    return False
+                print(f"Error writing ledger batch of {len(batch)} records, retrying: {str(e)}")
+                time.sleep(self.retry_delay * 2 ** attempt)
+            except Exception as e:
+                self._rollback()
+                if len(batch) == 1:
+                    print(f"Error writing ledger record {batch[0].get('hash')}, dropping it: {str(e)}")
+                    return False
+                print(f"Error writing ledger batch of {len(batch)} records, writing them one at a time: {str(e)}")
+                results = [self._write_batch([row]) for row in batch]
+                return all(results)
+
+        for listener in self._listeners:
+            try:
+                listener(batch)
+            except Exception as e:
+                print(f"Error in ledger listener: {str(e)}")
+        return True
+
+    def _rollback(self):
+        try:
+            with self.app.app_context():
+                db.session.rollback()
+        except Exception:
+            pass
+
+    def _apply_rollups(self, batch):
+        """Fold the batch into analytics in a savepoint, so a rollup failure never loses ledger rows"""
+        try:
+            with db.session.begin_nested():
+                self.rollups.apply_transactions(batch)
+        except Exception as e:
+            # Committed with the ledger rows when it succeeds; AnalyticsRollups.rebuild() repairs gaps
+            print(f"Error updating transaction rollups for {len(batch)} records: {str(e)}")
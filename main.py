@@ -1,23 +1,18 @@
 import os
 import sys
-from flask import Flask
-from base_models import db, init_db
+import time
+from database import create_app
 from initialize_chains import initialize_default_chains
 
-def create_app():
-    """Create and configure Flask application"""
-    app = Flask(__name__)
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SECRET_KEY'] = os.environ.get('WALLET_ENCRYPTION_KEY', 'dev-key')
-    init_db(app)
-    return app
-
 def initialize_wallet(app):
     """Initialize wallet if one doesn't exist"""
     try:
-        from wallet_manager import WalletManager
+        from base_models import WalletConfig
         with app.app_context():
+            # Only pull in web3 and eth_account when a wallet actually has to be created
+            if WalletConfig.query.first():
+                return True
+            from wallet_manager import WalletManager
             wallet_manager = WalletManager()
             if not wallet_manager.get_wallet():
                 address = wallet_manager.create_wallet()
@@ -28,11 +23,48 @@ def initialize_wallet(app):
         print(f"Error initializing wallet: {str(e)}", file=sys.stderr)
         return False
 
-def init_components(app):
+def init_components(app, lazy=None):
     """Initialize all components"""
     from app import init_app_components
     with app.app_context():
-        return init_app_components()
+        return init_app_components(lazy)
+
+def bootstrap(seed=True, lazy=None):
+    """Create the app and initialize components, raising if anything fails
+
+    seed creates default chains, risk parameters and the wallet when they
+    are missing; web workers skip it so they don't race each other. lazy
+    defers building heavy components to first use (LAZY_INIT=1).
+    Phase timings are kept in app.config['STARTUP_PROFILE'] and printed
+    when the STARTUP_PROFILE environment variable is 1.
+    """
+    started = time.perf_counter()
+    app = create_app()
+    profile = app.config['STARTUP_PROFILE'] = {'create_app': time.perf_counter() - started}
+    with app.app_context():
+        if seed:
+            phase_started = time.perf_counter()
+            # Initialize chains
+            initialize_default_chains()
+            
+            # Initialize risk parameters
+            from initialize_risk_params import initialize_risk_parameters
+            initialize_risk_parameters()
+            
+            # Initialize wallet
+            if not initialize_wallet(app):
+                raise RuntimeError("Failed to initialize wallet")
+            profile['seed'] = time.perf_counter() - phase_started
+        
+        # Initialize components
+        phase_started = time.perf_counter()
+        if not init_components(app, lazy):
+            raise RuntimeError("Failed to initialize components")
+        profile['init_components'] = time.perf_counter() - phase_started
+    profile['total'] = time.perf_counter() - started
+    if os.environ.get('STARTUP_PROFILE') == '1':
+        print("Startup profile: " + ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in profile.items()))
+    return app
 
 if __name__ == "__main__":
     # Ensure required environment variables are set
@@ -45,29 +77,18 @@ if __name__ == "__main__":
     
     try:
         # Create and configure Flask app
-        app = create_app()
-        
-        with app.app_context():
-            # Initialize chains
-            initialize_default_chains()
-            
-            # Initialize risk parameters
-            from initialize_risk_params import initialize_risk_parameters
-            initialize_risk_parameters()
-            
-            # Initialize wallet
-            if not initialize_wallet(app):
-                print("Failed to initialize wallet", file=sys.stderr)
-                sys.exit(1)
-            
-            # Initialize components
-            if not init_components(app):
-                print("Failed to initialize components", file=sys.stderr)
-                sys.exit(1)
+        app = bootstrap()
         
         # Import routes after initialization
-        from app import configure_routes
+        from app import configure_routes, start_web_services
         configure_routes(app)
+        start_web_services(app)
+        
+        # Single-process setups run the agent here; it still takes the leader
+        # lease, so a separate agent_worker.py process can run alongside safely
+        if os.environ.get('AGENT_EMBEDDED', '1') == '1':
+            from agent_worker import AgentWorker
+            AgentWorker(app).start()
         
         # Set default port to 5000 and bind to all interfaces
         port = int(os.environ.get("PORT", 5000))
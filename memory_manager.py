@@ -2,6 +2,7 @@ from datetime import datetime
 from sqlalchemy import desc
 from base_models import Memory, db
 import json
+from metrics import FAILURES
 
 class MemoryManager:
     def __init__(self):
@@ -37,11 +38,13 @@ class MemoryManager:
                 return True
         except ValueError as e:
             print(f"Validation error while storing memory: {str(e)}")
+            FAILURES.inc(component='memory_manager', operation='store')
             return False
         except Exception as e:
             if 'current_app' in locals():
                 db.session.rollback()
             print(f"Error storing memory: {str(e)}")
+            FAILURES.inc(component='memory_manager', operation='store')
             return False
 
     def retrieve_memory(self, memory_type: str, key: str = None, limit: int = 10):
@@ -63,6 +66,7 @@ class MemoryManager:
                 return [{'key': m.key, 'value': m.value, 'confidence': m.confidence} for m in memories]
         except Exception as e:
             print(f"Error retrieving memory: {str(e)}")
+            FAILURES.inc(component='memory_manager', operation='retrieve')
             return None
 
     def update_pattern_confidence(self, memory_type: str, key: str, success: bool):
@@ -113,6 +117,7 @@ class MemoryManager:
             if 'current_app' in locals():
                 db.session.rollback()
             print(f"Error updating pattern confidence: {str(e)}")
+            FAILURES.inc(component='memory_manager', operation='update_confidence')
             return False
 
     def store_transaction_pattern(self, pattern_key: str, pattern_data: dict):
@@ -156,4 +161,5 @@ class MemoryManager:
         except Exception as e:
             db.session.rollback()
             print(f"Error cleaning up memories: {str(e)}")
+            FAILURES.inc(component='memory_manager', operation='cleanup')
             return False
@@ -0,0 +1,231 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from fast DB queries up to slow RPC/API calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        """Initialize a monotonically increasing counter, one series per label combination"""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {value}')
+        return lines
+
+class Gauge(Counter):
+    def set(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f'# TYPE {self.name} gauge'
+        return lines
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """Initialize a histogram of observed durations, one series per label combination"""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (plus +Inf), sum, count; made cumulative on render
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block, including when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, [("le", le)])} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {total}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        """Initialize an in-process registry rendered in the Prometheus text format"""
+        self._metrics = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, documentation, labelnames=()):
+        metric = Gauge(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+registry = MetricsRegistry()
+
+def serve_metrics(port, host='0.0.0.0'):
+    """Serve the registry at /metrics on its own port, for processes without a web server
+
+    Returns the server, already running on a daemon thread; call shutdown() to stop it.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
+
+RPC_LATENCY = registry.histogram(
+    'agent_rpc_request_seconds', 'JSON-RPC request latency by chain and method', ('chain_id', 'method')
+)
+DECISION_API_LATENCY = registry.histogram(
+    'agent_decision_api_seconds', 'Decision API request latency', ('outcome',)
+)
+PRICE_FETCH_LATENCY = registry.histogram(
+    'agent_price_fetch_seconds', 'Market price API request latency', ('outcome',)
+)
+DB_QUERY_LATENCY = registry.histogram(
+    'agent_db_query_seconds', 'Database statement execution time by statement type', ('operation',)
+)
+DB_COMMIT_LATENCY = registry.histogram(
+    'agent_db_commit_seconds', 'Database session commit time, including the final flush'
+)
+CYCLE_STAGE_LATENCY = registry.histogram(
+    'agent_cycle_stage_seconds', 'AI cycle stage durations', ('stage',)
+)
+CACHE_REQUESTS = registry.counter(
+    'agent_cache_requests_total', 'Cache lookups by cache and result (hit or miss)', ('cache', 'result')
+)
+FAILURES = registry.counter(
+    'agent_failures_total', 'Handled failures by component and operation', ('component', 'operation')
+)
+TRANSACTIONS_REJECTED = registry.counter(
+    'agent_transactions_rejected_total', 'Transactions rejected before signing', ('reason',)
+)
+SCHEDULER_SKIPS = registry.counter(
+    'agent_chain_cycles_skipped_total', 'Due chain cycles not started: overlap, budget or coalesced', ('reason',)
+)
+CHAIN_INTERVAL = registry.gauge(
+    'agent_chain_interval_seconds', 'Current adaptive cycle interval per chain', ('chain_id',)
+)
+
+_DB_OPERATIONS = {'SELECT', 'INSERT', 'UPDATE', 'DELETE'}
+_db_instrumented = False
+
+def instrument_database():
+    """Time every SQL statement and session commit through SQLAlchemy events"""
+    global _db_instrumented
+    if _db_instrumented:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.orm import Session
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['query_started'].pop()
+        operation = statement.lstrip()[:6].upper()
+        DB_QUERY_LATENCY.observe(
+            time.perf_counter() - started,
+            operation=operation if operation in _DB_OPERATIONS else 'OTHER'
+        )
+
+    @event.listens_for(Engine, 'handle_error')
+    def handle_error(exception_context):
+        # A failed statement never reaches after_cursor_execute
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('query_started'):
+            connection.info['query_started'].pop()
+
+    @event.listens_for(Session, 'before_commit')
+    def before_commit(session):
+        session.info['commit_started'] = time.perf_counter()
+
+    @event.listens_for(Session, 'after_commit')
+    def after_commit(session):
+        started = session.info.pop('commit_started', None)
+        if started is not None:
+            DB_COMMIT_LATENCY.observe(time.perf_counter() - started)
+
+    @event.listens_for(Session, 'after_rollback')
+    def after_rollback(session):
+        session.info.pop('commit_started', None)
+
+    _db_instrumented = True
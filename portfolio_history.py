@@ -0,0 +1,134 @@
+from datetime import datetime, timezone
+from base_models import PortfolioSnapshot, db
+
+# Buckets fetched from SQL per output point; LTTB picks among them for display
+OVERSAMPLING = 4
+
+class PortfolioHistory:
+    def __init__(self, rollups=None):
+        """Initialize portfolio history, optionally maintaining analytics rollups on record"""
+        self.rollups = rollups
+
+    def record(self, snapshots, timestamp=None):
+        """Store one cycle's per-chain snapshots plus an all-chains total row"""
+        timestamp = timestamp or datetime.utcnow()
+        snapshots = [snapshot for snapshot in snapshots if snapshot]
+        if not snapshots:
+            return
+        try:
+            for snapshot in snapshots:
+                db.session.add(PortfolioSnapshot(timestamp=timestamp, **snapshot))
+            usd_values = [s['usd_value'] for s in snapshots if s.get('usd_value') is not None]
+            total = {
+                'chain_id': None,
+                'balance': sum(s['balance'] for s in snapshots),
+                'usd_value': sum(usd_values) if usd_values else None
+            }
+            db.session.add(PortfolioSnapshot(timestamp=timestamp, **total))
+            if self.rollups:
+                self.rollups.apply_snapshots(snapshots + [total], timestamp)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error recording portfolio snapshot: {str(e)}")
+
+    def series(self, since, until, points=300, chain_id=None, field='usd_value'):
+        """Downsample snapshots in [since, until) to about `points` values
+
+        Returns min/max/avg buckets aggregated in SQL, and an LTTB series
+        picked from finer buckets that keeps the visual shape for charts.
+        """
+        column = getattr(PortfolioSnapshot, field)
+        span = max((until - since).total_seconds(), 1.0)
+        width = span / (points * OVERSAMPLING)
+        start = self._epoch_of(since)
+        offset = (self._epoch(PortfolioSnapshot.timestamp) - start) / width
+        # Offsets are never negative, so SQLite's truncating cast acts as floor
+        bucket = db.cast(offset, db.Integer) if db.engine.dialect.name == 'sqlite' else db.func.floor(offset)
+
+        query = db.session.query(
+            bucket.label('bucket'),
+            db.func.min(column),
+            db.func.max(column),
+            db.func.avg(column),
+            db.func.count(column)
+        ).filter(
+            PortfolioSnapshot.timestamp >= since,
+            PortfolioSnapshot.timestamp < until,
+            column.isnot(None)
+        )
+        if chain_id is None:
+            query = query.filter(PortfolioSnapshot.chain_id.is_(None))
+        else:
+            query = query.filter(PortfolioSnapshot.chain_id == chain_id)
+        rows = query.group_by('bucket').order_by('bucket').all()
+
+        # (time, min, max, avg, count) per fine bucket
+        fine = [(
+            start + (int(row[0]) + 0.5) * width,
+            float(row[1]), float(row[2]), float(row[3]), int(row[4])
+        ) for row in rows]
+
+        buckets = {}
+        for t, low, high, avg, count in fine:
+            key = int((t - start) / (width * OVERSAMPLING))
+            if key in buckets:
+                b = buckets[key]
+                b['avg'] = (b['avg'] * b['count'] + avg * count) / (b['count'] + count)
+                b['min'], b['max'], b['count'] = min(b['min'], low), max(b['max'], high), b['count'] + count
+            else:
+                buckets[key] = {
+                    'timestamp': self._iso(start + key * width * OVERSAMPLING),
+                    'min': low, 'max': high, 'avg': avg, 'count': count
+                }
+
+        display = self.lttb([(t, avg) for t, _, _, avg, _ in fine], points)
+        return {
+            'buckets': [buckets[key] for key in sorted(buckets)],
+            'series': [{'timestamp': self._iso(t), 'value': value} for t, value in display]
+        }
+
+    @staticmethod
+    def lttb(data, threshold):
+        """Largest-Triangle-Three-Buckets downsampling of (x, y) points"""
+        if threshold >= len(data) or threshold < 3:
+            return list(data)
+
+        sampled = [data[0]]
+        every = (len(data) - 2) / (threshold - 2)
+        a = 0
+        for i in range(threshold - 2):
+            # Average of the next bucket is the third triangle vertex
+            next_start = int((i + 1) * every) + 1
+            next_end = min(int((i + 2) * every) + 1, len(data))
+            next_bucket = data[next_start:next_end]
+            avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+            avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+
+            start = int(i * every) + 1
+            end = int((i + 1) * every) + 1
+            ax, ay = data[a]
+            best, best_area = start, -1.0
+            for j in range(start, end):
+                area = abs((ax - avg_x) * (data[j][1] - ay) - (ax - data[j][0]) * (avg_y - ay))
+                if area > best_area:
+                    best, best_area = j, area
+            sampled.append(data[best])
+            a = best
+        sampled.append(data[-1])
+        return sampled
+
+    @staticmethod
+    def _epoch(column):
+        """SQL expression for a naive UTC timestamp column as epoch seconds"""
+        if db.engine.dialect.name == 'sqlite':
+            return (db.func.julianday(column) - 2440587.5) * 86400.0
+        return db.func.extract('epoch', column)
+
+    @staticmethod
+    def _epoch_of(value):
+        return value.replace(tzinfo=timezone.utc).timestamp()
+
+    @staticmethod
+    def _iso(epoch_seconds):
+        return datetime.fromtimestamp(epoch_seconds, timezone.utc).replace(tzinfo=None).isoformat()
@@ -0,0 +1,68 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, request
+from database import build_noting_replica
+from metrics import CACHE_REQUESTS
+
+class ResponseCache:
+    def __init__(self, max_entries=512):
+        """Initialize cache of serialized JSON responses, versioned per namespace"""
+        self.max_entries = max_entries
+        self._versions = {}
+        self._invalidated_at = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidate(self, namespace):
+        """Bump a namespace's version so its cached responses are rebuilt"""
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            self._invalidated_at[namespace] = time.monotonic()
+
+    def respond(self, namespace, build, ttl=60, cache_control='no-cache', key=None):
+        """Serve build()'s JSON from cache, answering a matching If-None-Match with 304
+
+        ttl bounds staleness when another process changed the data, since
+        invalidation only reaches this process's cache. Invalidations come
+        from writes to the primary, so a response built from the read replica
+        within REPLICA_MAX_LAG_SECONDS of one may predate the write and is
+        served without being cached.
+        """
+        cache_key = (namespace, key if key is not None else request.full_path)
+        now = time.monotonic()
+        with self._lock:
+            version = self._versions.get(namespace, 0)
+            entry = self._entries.get(cache_key)
+            if entry and entry[0] == version and entry[3] > now:
+                self._entries.move_to_end(cache_key)
+            else:
+                entry = None
+
+        CACHE_REQUESTS.inc(cache='response', result='miss' if entry is None else 'hit')
+        if entry is None:
+            result, from_replica = build_noting_replica(build)
+            body = current_app.json.dumps(result)
+            etag = hashlib.sha256(body.encode()).hexdigest()[:32]
+            entry = (version, body, etag, now + ttl)
+            with self._lock:
+                # Skip storing if the data changed while we were building it,
+                # or if the replica may not have caught up with the last change
+                lagging = from_replica and now - self._invalidated_at.get(namespace, float('-inf')) < (
+                    current_app.config.get('REPLICA_MAX_LAG_SECONDS', 0)
+                )
+                if self._versions.get(namespace, 0) == version and not lagging:
+                    self._entries[cache_key] = entry
+                    self._entries.move_to_end(cache_key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+
+        _, body, etag, _ = entry
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        return response
@@ -0,0 +1,82 @@
+"""Bring tables created by older versions up to the current models
+
+db.create_all() only creates missing tables; it never changes existing
+ones. Each upgrade here checks the live schema first, so running them on
+every startup is safe and a no-op once applied.
+"""
+from base_models import db
+
+def upgrade_schema():
+    """Apply every pending upgrade to the current database"""
+    inspector = db.inspect(db.engine)
+    if inspector.has_table('contract'):
+        _add_column('contract', 'artifact_id', 'INTEGER REFERENCES contract_artifact(id)')
+        # Compile rows exist before any deploy, and reference a shared artifact;
+        # a deploy is recorded before its transaction is mined
+        _drop_not_null('contract', ['abi', 'bytecode', 'address', 'transaction_hash'])
+    if inspector.has_table('transaction'):
+        # Keyset pagination and filtered history reads on existing ledgers
+        _create_indexes('transaction')
+
+def _columns(table):
+    return {column['name']: column for column in db.inspect(db.engine).get_columns(table)}
+
+def _add_column(table, column, ddl):
+    if column in _columns(table):
+        return
+    with db.engine.begin() as connection:
+        connection.execute(db.text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+    print(f"Added column {table}.{column}")
+
+def _create_indexes(table):
+    """Create the model's indexes missing from an existing table"""
+    existing = {index['name'] for index in db.inspect(db.engine).get_indexes(table)}
+    for index in db.metadata.tables[table].indexes:
+        if index.name in existing:
+            continue
+        # Builds the index in one pass, blocking writes to the table until done
+        index.create(db.engine, checkfirst=True)
+        print(f"Created index {index.name}")
+
+def _drop_not_null(table, columns):
+    columns = [name for name in columns if not _columns(table)[name]['nullable']]
+    if not columns:
+        return
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        _rebuild_sqlite_table(table)
+    elif dialect == 'postgresql':
+        with db.engine.begin() as connection:
+            for column in columns:
+                connection.execute(db.text(f'ALTER TABLE {table} ALTER COLUMN {column} DROP NOT NULL'))
+    else:
+        raise RuntimeError(
+            f"Cannot make {table}.{', '.join(columns)} nullable on {dialect}; alter these columns by hand"
+        )
+    print(f"Made {table}.{', '.join(columns)} nullable")
+
+def _rebuild_sqlite_table(table):
+    """Recreate a table from its model, since SQLite cannot alter column constraints in place"""
+    from sqlalchemy.schema import CreateTable
+    model_table = db.metadata.tables[table]
+    staging = f'_{table}_upgrade'
+    create = str(CreateTable(model_table).compile(dialect=db.engine.dialect)).replace(
+        f'CREATE TABLE {table} ', f'CREATE TABLE {staging} ', 1
+    )
+    shared = [name for name in _columns(table) if name in model_table.columns]
+    column_list = ', '.join(shared)
+    with db.engine.connect() as connection:
+        # Must be set outside a transaction; other tables' foreign keys keep
+        # pointing at the table name, which the rebuilt table takes over
+        foreign_keys = connection.exec_driver_sql('PRAGMA foreign_keys').scalar()
+        connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+        connection.commit()
+        with connection.begin():
+            connection.execute(db.text(create))
+            connection.execute(db.text(
+                f'INSERT INTO {staging} ({column_list}) SELECT {column_list} FROM {table}'
+            ))
+            connection.execute(db.text(f'DROP TABLE {table}'))
+            connection.execute(db.text(f'ALTER TABLE {staging} RENAME TO {table}'))
+        connection.exec_driver_sql(f'PRAGMA foreign_keys={int(foreign_keys)}')
+        connection.commit()
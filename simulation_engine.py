@@ -0,0 +1,197 @@
+import threading
+from collections import OrderedDict
+from eth_abi import decode as abi_decode
+from web3 import Web3
+
+ERROR_SELECTOR = bytes.fromhex('08c379a0')  # Error(string)
+PANIC_SELECTOR = bytes.fromhex('4e487b71')  # Panic(uint256)
+OFFLINE_SENDER = '0x00000000000000000000000000000000000000a1'
+OFFLINE_BALANCE = 10 ** 30
+
+class SimulationResult:
+    def __init__(self, success, gas_used=None, revert_reason=None, block_number=None, verified_live=False):
+        self.success = success
+        self.gas_used = gas_used
+        self.revert_reason = revert_reason
+        self.block_number = block_number
+        self.verified_live = verified_live
+
+    def to_dict(self):
+        return {
+            'success': self.success,
+            'gas_used': self.gas_used,
+            'revert_reason': self.revert_reason,
+            'block_number': self.block_number,
+            'verified_live': self.verified_live
+        }
+
+class SimulationEngine:
+    def __init__(self, cache_size=1024):
+        """Initialize dry-run engine backed by an in-process EVM (eth-tester / py-evm)"""
+        try:
+            from eth_tester import EthereumTester, PyEVMBackend
+            from eth_tester.exceptions import TransactionFailed
+        except ImportError:
+            raise ImportError("Simulation requires eth-tester[py-evm]; install the 'simulation' extra")
+
+        self._tester_cls = EthereumTester
+        self._backend_cls = PyEVMBackend
+        self._failure_cls = TransactionFailed
+        self.cache_size = cache_size
+        self._results = OrderedDict()
+        self._code = {}
+        self._lock = threading.Lock()
+
+    def simulate(self, transaction, w3=None, chain_key=None):
+        """Dry-run a transaction or contract creation and return gas and revert reason
+
+        When w3 is given the sender balance and target code are seeded from the
+        live chain and results are cached per block; without it the run is fully
+        offline against a funded sender.
+        """
+        block_number = self._get_block_number(w3)
+        call = self._normalize(transaction)
+        cache_key = (chain_key, block_number, call['from'], call.get('to'), call['value'], call['data'])
+
+        with self._lock:
+            cached = self._results.get(cache_key)
+            if cached is not None:
+                self._results.move_to_end(cache_key)
+                return cached
+
+        result = self._execute(call, w3, chain_key, block_number)
+
+        with self._lock:
+            self._results[cache_key] = result
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return result
+
+    def clear_cache(self):
+        """Drop cached simulation results and seeded contract code"""
+        with self._lock:
+            self._results.clear()
+            self._code.clear()
+
+    def _execute(self, call, w3, chain_key, block_number):
+        """Run the call in a freshly seeded in-process EVM
+
+        Contract storage is not mirrored into the local EVM, so for a call to
+        deployed code the node's estimate decides success and gas (never less
+        than the local run); the local run only supplies the revert reason.
+        """
+        tester = self._tester_cls(self._backend_cls(genesis_state=self._genesis_state(call, w3, chain_key)))
+        local_gas = None
+        try:
+            local_gas = tester.estimate_gas(call)
+            reason = None
+        except self._failure_cls as e:
+            reason = self.decode_revert_reason(e)
+        except Exception as e:
+            reason = str(e)
+
+        if w3 and call.get('to') and self._get_code(call['to'], w3, chain_key):
+            try:
+                live_call = {k: v for k, v in call.items() if k != 'gas'}
+                gas = max(w3.eth.estimate_gas(live_call), local_gas or 0)
+                return SimulationResult(True, gas_used=gas, block_number=block_number, verified_live=True)
+            except Exception as e:
+                reason = self.decode_revert_reason(e) or reason or str(e)
+        elif local_gas is not None:
+            return SimulationResult(True, gas_used=local_gas, block_number=block_number)
+        return SimulationResult(False, revert_reason=reason, block_number=block_number)
+
+    def _genesis_state(self, call, w3, chain_key):
+        """Seed the sender balance and target contract code"""
+        state = {}
+        sender = call['from']
+        balance = OFFLINE_BALANCE
+        if w3 and sender != OFFLINE_SENDER:
+            try:
+                balance = w3.eth.get_balance(sender)
+            except Exception as e:
+                print(f"Error seeding sender balance for simulation: {str(e)}")
+        state[sender] = balance, b''
+
+        if call.get('to'):
+            code = self._get_code(call['to'], w3, chain_key) if w3 else b''
+            state[call['to']] = 0, code
+
+        return {
+            bytes.fromhex(address[2:]): {'balance': balance, 'nonce': 0, 'code': code, 'storage': {}}
+            for address, (balance, code) in state.items()
+        }
+
+    def _get_code(self, address, w3, chain_key):
+        """Fetch deployed code once per (chain, address)"""
+        key = (chain_key, address)
+        code = self._code.get(key)
+        if code is None:
+            try:
+                code = bytes(w3.eth.get_code(Web3.to_checksum_address(address)))
+            except Exception as e:
+                print(f"Error fetching code for simulation: {str(e)}")
+                return b''
+            if code:
+                self._code[key] = code
+        return code
+
+    @staticmethod
+    def _get_block_number(w3):
+        """Return the live block number, or None when running offline"""
+        if not w3:
+            return None
+        try:
+            return w3.eth.block_number
+        except Exception:
+            return None
+
+    @staticmethod
+    def _normalize(transaction):
+        """Build an eth-tester call dict from web3-style transaction params"""
+        data = transaction.get('data') or '0x'
+        if isinstance(data, (bytes, bytearray)):
+            data = '0x' + bytes(data).hex()
+        elif not data.startswith('0x'):
+            data = '0x' + data
+
+        call = {
+            'from': Web3.to_checksum_address(transaction.get('from') or OFFLINE_SENDER),
+            'value': int(transaction.get('value', 0)),
+            'data': data
+        }
+        if transaction.get('to'):
+            call['to'] = Web3.to_checksum_address(transaction['to'])
+        return call
+
+    @staticmethod
+    def decode_revert_reason(error):
+        """Extract a readable reason from Error(string), Panic(uint256) or raw revert data"""
+        payload = error
+        while isinstance(payload, Exception):
+            if not payload.args:
+                return str(payload)
+            payload = payload.args[0]
+
+        if isinstance(payload, str):
+            if not payload.startswith('0x'):
+                return payload
+            try:
+                payload = bytes.fromhex(payload[2:])
+            except ValueError:
+                return payload
+
+        if not isinstance(payload, (bytes, bytearray)):
+            return str(payload)
+        payload = bytes(payload)
+        if payload[:4] == ERROR_SELECTOR:
+            try:
+                return abi_decode(['string'], payload[4:])[0]
+            except Exception:
+                pass
+        if payload[:4] == PANIC_SELECTOR:
+            try:
+                return f"Panic(0x{abi_decode(['uint256'], payload[4:])[0]:02x})"
+            except Exception:
+                pass
+        return '0x' + payload.hex() if payload else 'execution reverted'
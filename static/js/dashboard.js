@@ -1,54 +1,88 @@
 // Update wallet balances for all chains
 async function updateWalletBalances() {
     try {
-        // Get supported chains
-        const chainsResponse = await fetch('/api/wallet/chains');
-        const chains = await chainsResponse.json();
+        // Balances for every chain arrive in a single response
+        const balancesResponse = await fetch('/api/wallet/balances');
+        const balances = await balancesResponse.json();
         
         // Create or update balance elements for each chain
         const balanceContainer = document.getElementById('wallet-balances');
+        if (!balanceContainer) return;
         balanceContainer.innerHTML = ''; // Clear existing balances
         
-        for (const chain of chains) {
-            const balanceResponse = await fetch(`/api/wallet/balance/${chain.id}`);
-            const balanceData = await balanceResponse.json();
-            
-            const balanceElement = document.createElement('div');
-            balanceElement.className = 'mb-3';
-            balanceElement.innerHTML = `
-                <h6 class="text-muted">${chain.name}</h6>
-                <h3 class="mb-0">${parseFloat(balanceData.balance).toFixed(4)}</h3>
-                <small class="text-muted">${chain.symbol}</small>
-            `;
-            balanceContainer.appendChild(balanceElement);
+        for (const chain of balances) {
+            renderBalance(chain);
         }
     } catch (error) {
         console.error('Error updating balances:', error);
     }
 }
 
+// Create or update the balance element for one chain
+function renderBalance(chain) {
+    const balanceContainer = document.getElementById('wallet-balances');
+    if (!balanceContainer) return;
+
+    let balanceElement = document.getElementById(`balance-${chain.chain_id}`);
+    if (!balanceElement) {
+        balanceElement = document.createElement('div');
+        balanceElement.id = `balance-${chain.chain_id}`;
+        balanceElement.className = 'mb-3';
+        balanceContainer.appendChild(balanceElement);
+    }
+    balanceElement.innerHTML = `
+        <h6 class="text-muted">${chain.name}</h6>
+        <h3 class="mb-0">${parseFloat(chain.balance).toFixed(4)}</h3>
+        <small class="text-muted">${chain.symbol}</small>
+    `;
+}
+
+const statusBadges = { success: 'success', pending: 'warning' };
+
+function renderTransactionRows(transactions) {
+    return transactions.map(tx => `
+        <tr data-hash="${tx.hash}">
+            <td>${tx.hash.substring(0, 8)}...</td>
+            <td>${tx.type}</td>
+            <td>${parseFloat(tx.amount).toFixed(4)}</td>
+            <td>
+                <span class="badge bg-${statusBadges[tx.status] || 'danger'}">
+                    ${tx.status}
+                </span>
+            </td>
+            <td>${new Date(tx.timestamp).toLocaleString()}</td>
+        </tr>
+    `).join('');
+}
+
+// Load a page of transaction history; a cursor appends the next page
+let historyCursor = null;
+async function loadTransactionHistory(append = false) {
+    const transactionsTable = document.getElementById('transactions-table');
+    if (!transactionsTable) return;
+
+    try {
+        const params = new URLSearchParams({ limit: 50 });
+        if (append && historyCursor) params.set('cursor', historyCursor);
+        const response = await fetch(`/api/transactions/history?${params}`);
+        const page = await response.json();
+
+        const rows = renderTransactionRows(page.transactions);
+        transactionsTable.innerHTML = append ? transactionsTable.innerHTML + rows : rows;
+        historyCursor = page.next_cursor;
+
+        const loadMore = document.getElementById('load-more-transactions');
+        if (loadMore) loadMore.classList.toggle('d-none', !historyCursor);
+    } catch (error) {
+        console.error('Error fetching transaction history:', error);
+    }
+}
+
 // Update recent transactions
 function updateTransactions() {
     fetch('/api/transactions/recent')
         .then(response => response.json())
         .then(transactions => {
-            const transactionsTable = document.getElementById('transactions-table');
-            if (transactionsTable) {
-                transactionsTable.innerHTML = transactions.map(tx => `
-                    <tr>
-                        <td>${tx.hash.substring(0, 8)}...</td>
-                        <td>${tx.type}</td>
-                        <td>${parseFloat(tx.amount).toFixed(4)}</td>
-                        <td>
-                            <span class="badge bg-${tx.status === 'success' ? 'success' : 'danger'}">
-                                ${tx.status}
-                            </span>
-                        </td>
-                        <td>${new Date(tx.timestamp).toLocaleString()}</td>
-                    </tr>
-                `).join('');
-            }
-
             const recentTransactions = document.getElementById('recent-transactions');
             if (recentTransactions) {
                 recentTransactions.innerHTML = transactions.slice(0, 5).map(tx => `
@@ -62,21 +96,82 @@ function updateTransactions() {
         .catch(error => console.error('Error fetching transactions:', error));
 }
 
-// Initialize performance chart
-function initializeChart() {
+// Apply a pushed transaction: update its row if shown, otherwise add it on top
+function applyTransactionEvent(tx) {
+    const transactionsTable = document.getElementById('transactions-table');
+    if (transactionsTable) {
+        const existing = transactionsTable.querySelector(`tr[data-hash="${tx.hash}"]`);
+        if (existing) {
+            existing.outerHTML = renderTransactionRows([tx]);
+        } else {
+            transactionsTable.insertAdjacentHTML('afterbegin', renderTransactionRows([tx]));
+        }
+    }
+
+    const recentTransactions = document.getElementById('recent-transactions');
+    if (recentTransactions && tx.status !== 'pending') {
+        recentTransactions.insertAdjacentHTML('afterbegin', `
+            <div class="d-flex justify-content-between align-items-center mb-2">
+                <span>${tx.type}</span>
+                <span>${parseFloat(tx.amount).toFixed(4)} AVAX</span>
+            </div>
+        `);
+        while (recentTransactions.children.length > 5) {
+            recentTransactions.lastElementChild.remove();
+        }
+    }
+}
+
+function refreshAll() {
+    updateWalletBalances();
+    updateTransactions();
+    loadTransactionHistory();
+}
+
+// Subscribe to server-pushed updates; falls back to polling without EventSource
+function connectEventStream() {
+    if (!window.EventSource) {
+        setInterval(refreshAll, 30000);
+        return;
+    }
+
+    const events = new EventSource('/api/events');
+    // Full refresh on reconnect and when the server dropped events for us
+    let connected = false;
+    events.addEventListener('open', () => {
+        if (connected) refreshAll();
+        connected = true;
+    });
+    events.addEventListener('resync', refreshAll);
+    events.addEventListener('transaction', e => applyTransactionEvent(JSON.parse(e.data)));
+    events.addEventListener('balance', e => renderBalance(JSON.parse(e.data)));
+    events.addEventListener('portfolio', e => applyPortfolioEvent(JSON.parse(e.data)));
+    events.addEventListener('decision', e => console.debug('Decision made:', JSON.parse(e.data)));
+}
+
+// Initialize performance chart from downsampled portfolio history
+let performanceChart = null;
+async function initializeChart() {
     const ctx = document.getElementById('performanceChart');
     if (!ctx) return;
 
-    new Chart(ctx, {
+    let series = [];
+    try {
+        const response = await fetch('/api/portfolio/history?points=200');
+        series = (await response.json()).series || [];
+    } catch (error) {
+        console.error('Error fetching portfolio history:', error);
+    }
+
+    performanceChart = new Chart(ctx, {
         type: 'line',
         data: {
-            labels: Array.from({length: 7}, (_, i) => 
-                new Date(Date.now() - (6-i) * 24*60*60*1000).toLocaleDateString()
-            ),
+            labels: series.map(point => new Date(point.timestamp + 'Z').toLocaleString()),
             datasets: [{
-                label: 'Portfolio Value (AVAX)',
-                data: [0, 0, 0, 0, 0, 0, 0],
+                label: 'Portfolio Value (USD)',
+                data: series.map(point => point.value),
                 borderColor: 'rgb(75, 192, 192)',
+                pointRadius: 0,
                 tension: 0.1
             }]
         },
@@ -91,15 +186,21 @@ function initializeChart() {
     });
 }
 
+// Append a pushed portfolio snapshot to the chart
+function applyPortfolioEvent(snapshot) {
+    if (!performanceChart || snapshot.usd_value === null) return;
+    performanceChart.data.labels.push(new Date(snapshot.timestamp + 'Z').toLocaleString());
+    performanceChart.data.datasets[0].data.push(snapshot.usd_value);
+    performanceChart.update();
+}
+
 // Initialize dashboard
 document.addEventListener('DOMContentLoaded', function() {
-    updateWalletBalances();
-    updateTransactions();
+    refreshAll();
     initializeChart();
+
+    const loadMore = document.getElementById('load-more-transactions');
+    if (loadMore) loadMore.addEventListener('click', () => loadTransactionHistory(true));
     
-    // Refresh data every 30 seconds
-    setInterval(() => {
-        updateWalletBalances();
-        updateTransactions();
-    }, 30000);
+    connectEventStream();
 });
@@ -0,0 +1,167 @@
+import atexit
+import contextvars
+import functools
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+class Span:
+    __slots__ = ('name', 'tags', 'start', 'end', 'error', 'children')
+
+    def __init__(self, name, tags):
+        self.name = name
+        self.tags = tags
+        self.start = time.perf_counter()
+        self.end = None
+        self.error = None
+        self.children = []
+
+    def to_dict(self, origin):
+        """Serialize the span tree with times in milliseconds relative to origin"""
+        return {
+            'name': self.name,
+            'start_ms': round((self.start - origin) * 1000, 3),
+            'duration_ms': round(((self.end or time.perf_counter()) - self.start) * 1000, 3),
+            'tags': self.tags,
+            'error': self.error,
+            'children': [child.to_dict(origin) for child in self.children]
+        }
+
+class Tracer:
+    def __init__(self, max_traces=200):
+        """Initialize tracer keeping finished traces in a bounded ring buffer until exported"""
+        self._finished = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def trace(self, name, **tags):
+        """Start a new trace whose root span covers the with-block"""
+        root = Span(name, tags)
+        started_at = datetime.utcnow()
+        token = _current_span.set(root)
+        try:
+            yield root
+        except Exception as e:
+            root.error = str(e)
+            raise
+        finally:
+            root.end = time.perf_counter()
+            _current_span.reset(token)
+            record = {
+                'trace_id': uuid.uuid4().hex,
+                'name': name,
+                'started_at': started_at,
+                'duration_ms': round((root.end - root.start) * 1000, 3),
+                'status': 'error' if root.error else 'ok',
+                'spans': root.to_dict(root.start)
+            }
+            with self._lock:
+                # The oldest unexported trace is dropped if the exporter falls behind
+                self._finished.append(record)
+
+    @contextmanager
+    def span(self, name, parent=None, **tags):
+        """Record a child of parent (default: the current span); a no-op outside a trace
+
+        Threads don't inherit the current span, so work fanned out to a pool
+        passes its parent explicitly.
+        """
+        parent = parent or _current_span.get()
+        if parent is None:
+            yield None
+            return
+        span = Span(name, tags)
+        parent.children.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = str(e)
+            raise
+        finally:
+            span.end = time.perf_counter()
+            _current_span.reset(token)
+
+    def current(self):
+        return _current_span.get()
+
+    def tag(self, **tags):
+        """Add tags to the current span, if any"""
+        span = _current_span.get()
+        if span is not None:
+            span.tags.update(tags)
+
+    def drain(self):
+        """Remove and return finished traces, oldest first"""
+        with self._lock:
+            traces = list(self._finished)
+            self._finished.clear()
+        return traces
+
+tracer = Tracer()
+
+def traced(name):
+    """Decorator recording each call as a span of the current trace"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class TraceExporter:
+    def __init__(self, app, tracer=tracer, interval=10.0, max_rows=5000):
+        """Initialize exporter that periodically writes finished traces to the cycle_trace table"""
+        self.app = app
+        self.tracer = tracer
+        self.interval = interval
+        self.max_rows = max_rows
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self.export()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.export()
+
+    def export(self):
+        """Write buffered traces and prune the table to the newest max_rows"""
+        traces = self.tracer.drain()
+        if not traces:
+            return 0
+        from base_models import CycleTrace, db
+        try:
+            with self.app.app_context():
+                db.session.execute(db.insert(CycleTrace), traces)
+                newest = db.session.query(db.func.max(CycleTrace.id)).scalar()
+                CycleTrace.query.filter(CycleTrace.id <= newest - self.max_rows).delete(synchronize_session=False)
+                db.session.commit()
+            return len(traces)
+        except Exception as e:
+            print(f"Error exporting {len(traces)} traces: {str(e)}")
+            try:
+                with self.app.app_context():
+                    db.session.rollback()
+            except Exception:
+                pass
+            return 0
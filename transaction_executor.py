@@ -1,41 +1,110 @@
+import os
+import time
 from web3 import Web3
 from base_models import Transaction, db
 from memory_manager import MemoryManager
+from ledger_writer import LedgerWriter
+from chain_context import ChainRegistry
+from chain_scanner import DEFAULT_PRICE_API_URL
+from metrics import FAILURES, PRICE_FETCH_LATENCY, TRANSACTIONS_REJECTED
+from tracing import traced, tracer
 from datetime import datetime
 
+# Headroom over the estimated gas limit for contract calls
+GAS_LIMIT_MARGIN = float(os.environ.get('GAS_LIMIT_MARGIN', 1.2))
+
+# Multicall3 is deployed at the same address on Avalanche C-Chain, Fuji and most EVM chains
+MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'
+MULTICALL3_ABI = [
+    {
+        "inputs": [{
+            "components": [
+                {"name": "target", "type": "address"},
+                {"name": "allowFailure", "type": "bool"},
+                {"name": "value", "type": "uint256"},
+                {"name": "callData", "type": "bytes"}
+            ],
+            "name": "calls",
+            "type": "tuple[]"
+        }],
+        "name": "aggregate3Value",
+        "outputs": [{
+            "components": [
+                {"name": "success", "type": "bool"},
+                {"name": "returnData", "type": "bytes"}
+            ],
+            "name": "returnData",
+            "type": "tuple[]"
+        }],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
 class TransactionExecutor:
-    def __init__(self, wallet_manager):
-        """Initialize transaction executor with wallet manager"""
+    def __init__(self, wallet_manager, ledger_writer=None, simulation_engine=None, chain_registry=None):
+        """Initialize transaction executor with wallet manager, optional ledger writer, dry-run engine and chain registry"""
         self.wallet_manager = wallet_manager
+        self.ledger_writer = ledger_writer
+        self.simulation_engine = simulation_engine
+        self.chain_registry = chain_registry or ChainRegistry(wallet_manager)
         self.memory_manager = MemoryManager()
-        self.w3 = Web3(Web3.HTTPProvider(self.wallet_manager.chain.rpc_url))
-    def switch_chain(self, chain_id):
-        """Switch to a different chain"""
-        self.wallet_manager.switch_chain(chain_id)
-        self.w3 = Web3(Web3.HTTPProvider(self.wallet_manager.chain.rpc_url))
+        self.price_api_url = os.environ.get('PRICE_API_URL', DEFAULT_PRICE_API_URL)
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Register a callback invoked with each transaction as soon as it is broadcast"""
+        self._listeners.append(callback)
+
+    def _notify_submitted(self, tx_hash, transaction_data, context):
+        """Tell listeners a transaction is pending before its receipt arrives"""
+        event = {
+            'hash': tx_hash.hex(),
+            'type': transaction_data['type'],
+            'amount': float(Web3.from_wei(transaction_data.get('value', 0), 'ether')),
+            'status': 'pending',
+            'chain_id': context.chain_id
+        }
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"Error in transaction listener: {str(e)}")
+
+    def _resolve_context(self, context):
+        """Use the given chain context, or the wallet manager's default chain"""
+        return context or self.chain_registry.get(self.wallet_manager.chain_id)
         
-    def execute_transaction(self, transaction_data):
+    def execute_transaction(self, transaction_data, context=None):
         """Execute a transaction based on AI decision with risk parameter validation"""
+        context = self._resolve_context(context)
         try:
             # Check risk parameters before execution
-            if not self._validate_risk_parameters(transaction_data):
+            if not self._validate_risk_parameters(transaction_data, context):
+                TRANSACTIONS_REJECTED.inc(reason='risk_parameters')
                 raise Exception("Transaction failed risk parameter validation")
 
+            # Dry-run before anything is signed so reverts cost no gas
+            simulation = self.simulate_transaction(transaction_data, context)
+            if simulation and not simulation.success:
+                TRANSACTIONS_REJECTED.inc(reason='simulation_revert')
+                raise Exception(f"Transaction would revert: {simulation.revert_reason}")
+
             # Prepare transaction
-            tx_params = self._prepare_transaction(transaction_data)
+            tx_params = self._prepare_transaction(transaction_data, context, simulation)
             
-            # Sign transaction
-            signed_tx = self.wallet_manager.sign_transaction(tx_params)
-            
-            # Send transaction
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            # Sign and send transaction with the next free nonce
+            with tracer.span('send_transaction'):
+                tx_hash = context.signer.send_transaction(context.w3, tx_params)
+            self._notify_submitted(tx_hash, transaction_data, context)
             
             # Wait for transaction receipt
-            tx_receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            with tracer.span('wait_for_transaction_receipt', tx_hash=tx_hash.hex()):
+                tx_receipt = context.w3.eth.wait_for_transaction_receipt(tx_hash)
             
             # Record transaction and update pattern confidence
             tx_hash_hex = tx_hash.hex()
-            self._record_transaction(tx_hash_hex, tx_receipt, transaction_data)
+            self._record_transaction(tx_hash_hex, tx_receipt, transaction_data, context)
             
             # Update pattern confidence on success
             pattern_key = f"{transaction_data['type']}_{datetime.utcnow().strftime('%Y%m')}"
@@ -45,68 +114,224 @@ class TransactionExecutor:
             
         except Exception as e:
             print(f"Error executing transaction: {str(e)}")
-            self._record_failed_transaction(str(e), transaction_data)
+            FAILURES.inc(component='transaction_executor', operation='execute_transaction')
+            self._record_failed_transaction(str(e), transaction_data, context)
             
             # Update pattern confidence on failure
             pattern_key = f"{transaction_data['type']}_{datetime.utcnow().strftime('%Y%m')}"
             self.memory_manager.update_pattern_confidence('transaction_pattern', pattern_key, False)
             return None
+
+    def execute_actions(self, actions, context=None):
+        """Execute approved actions, bundling compatible ones into one Multicall transaction"""
+        context = self._resolve_context(context)
+        approved = []
+        for action in actions:
+            if self._validate_risk_parameters(action, context):
+                approved.append(action)
+            else:
+                print("Transaction rejected: Failed risk parameter validation")
+                TRANSACTIONS_REJECTED.inc(reason='risk_parameters')
+
+        bundle = [action for action in approved if self._is_bundleable(action)]
+        if len(bundle) < 2:
+            bundle = []
+        bundled = {id(action) for action in bundle}
+        standalone = [action for action in approved if id(action) not in bundled]
+
+        tx_hashes = []
+        if bundle:
+            tx_hashes.append(self.execute_bundle(bundle, context))
+        for action in standalone:
+            tx_hashes.append(self.execute_transaction(action, context))
+        return tx_hashes
+
+    def execute_bundle(self, actions, context=None):
+        """Execute several actions as a single Multicall3 aggregate3Value call"""
+        context = self._resolve_context(context)
+        try:
+            bundle_data = {
+                'type': 'multicall',
+                'to': MULTICALL3_ADDRESS,
+                'value': sum(int(action.get('value', 0)) for action in actions),
+                'data': self._encode_bundle(actions, context)
+            }
+
+            # Combined value and exposure must pass the same checks as a single action
+            if not self._validate_risk_parameters(bundle_data, context):
+                TRANSACTIONS_REJECTED.inc(reason='risk_parameters')
+                raise Exception("Bundle failed risk parameter validation")
+
+            simulation = self.simulate_transaction(bundle_data, context)
+            if simulation and not simulation.success:
+                TRANSACTIONS_REJECTED.inc(reason='simulation_revert')
+                raise Exception(f"Bundle would revert: {simulation.revert_reason}")
+
+            tx_params = self._prepare_transaction(bundle_data, context, simulation)
+            with tracer.span('send_transaction'):
+                tx_hash = context.signer.send_transaction(context.w3, tx_params)
+            self._notify_submitted(tx_hash, bundle_data, context)
+            with tracer.span('wait_for_transaction_receipt', tx_hash=tx_hash.hex()):
+                tx_receipt = context.w3.eth.wait_for_transaction_receipt(tx_hash)
+            if tx_receipt['status'] != 1:
+                raise Exception("Bundle transaction reverted on-chain")
+
+            tx_hash_hex = tx_hash.hex()
+            self._record_bundle(tx_hash_hex, tx_receipt, actions, context)
+            for action in actions:
+                self.memory_manager.update_pattern_confidence('transaction_pattern', self._pattern_key(action), True)
+            return tx_hash_hex
+
+        except Exception as e:
+            print(f"Error executing bundle: {str(e)}")
+            FAILURES.inc(component='transaction_executor', operation='execute_bundle')
+            for action in actions:
+                self._record_failed_transaction(str(e), action, context)
+                self.memory_manager.update_pattern_confidence('transaction_pattern', self._pattern_key(action), False)
+            return None
+
+    def _is_bundleable(self, transaction_data):
+        """Check whether an action can run through Multicall3
+
+        Bundled calls execute with Multicall3 as msg.sender, so only plain value
+        transfers or actions explicitly marked batchable are merged.
+        """
+        if not transaction_data.get('to') or 'gasPrice' in transaction_data:
+            return False
+        return transaction_data.get('batchable', not transaction_data.get('data'))
+
+    def _encode_bundle(self, actions, context):
+        """Encode actions as Multicall3 aggregate3Value calldata"""
+        multicall = context.w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+        calls = []
+        for action in actions:
+            call_data = action.get('data') or '0x'
+            calls.append((
+                Web3.to_checksum_address(action['to']),
+                False,
+                int(action.get('value', 0)),
+                bytes.fromhex(call_data[2:] if call_data.startswith('0x') else call_data)
+            ))
+        return multicall.encode_abi('aggregate3Value', args=[calls])
+
+    def _record_bundle(self, tx_hash, receipt, actions, context):
+        """Record one ledger row per bundled action, sharing the bundle receipt"""
+        gas_share = receipt['gasUsed'] // len(actions)
+        for index, action in enumerate(actions):
+            self._write_ledger_row(
+                hash=tx_hash,
+                type=action['type'],
+                amount=float(Web3.from_wei(action.get('value', 0), 'ether')),
+                status='success',
+                gas_used=gas_share,
+                details={
+                    **action,
+                    'effective_gas_price': receipt.get('effectiveGasPrice'),
+                    'bundle': {'index': index, 'size': len(actions), 'total_gas_used': receipt['gasUsed']}
+                },
+                chain_id=context.chain_id
+            )
+
+    @staticmethod
+    def _pattern_key(transaction_data):
+        """Build the monthly memory key for a transaction pattern"""
+        return f"{transaction_data['type']}_{datetime.utcnow().strftime('%Y%m')}"
             
-    def _prepare_transaction(self, transaction_data):
+    @traced('simulate_transaction')
+    def simulate_transaction(self, transaction_data, context=None):
+        """Dry-run a transaction in the in-process EVM, or return None without an engine"""
+        if not self.simulation_engine:
+            return None
+        context = self._resolve_context(context)
+        return self.simulation_engine.simulate(
+            {
+                'from': context.signer.address,
+                'to': transaction_data['to'],
+                'value': transaction_data.get('value', 0),
+                'data': transaction_data.get('data', '')
+            },
+            w3=context.w3,
+            chain_key=context.chain_id
+        )
+
+    def _prepare_transaction(self, transaction_data, context, simulation=None):
         """Prepare transaction parameters"""
-        wallet = self.wallet_manager.get_wallet()
+        gas = simulation.gas_used if simulation and simulation.success else self._estimate_gas(transaction_data, context)
+        if transaction_data.get('data') or (simulation and simulation.verified_live):
+            # Contract gas depends on state that can change before the transaction is mined
+            gas = int(gas * GAS_LIMIT_MARGIN)
         
+        # The nonce is assigned by the signer when the transaction is sent
         return {
-            'nonce': self.w3.eth.get_transaction_count(wallet.address),
-            'gasPrice': self.w3.eth.gas_price,
-            'gas': self._estimate_gas(transaction_data),
+            'gasPrice': context.fee_oracle.gas_price(),
+            'gas': gas,
             'to': Web3.to_checksum_address(transaction_data['to']),
             'value': transaction_data.get('value', 0),
             'data': transaction_data.get('data', ''),
-            'chainId': self.wallet_manager.chain.network_id
+            'chainId': context.network_id
         }
         
-    def _estimate_gas(self, transaction_data):
+    def _estimate_gas(self, transaction_data, context):
         """Estimate gas for transaction"""
         try:
-            return self.w3.eth.estimate_gas({
+            return context.w3.eth.estimate_gas({
                 'to': transaction_data['to'],
                 'value': transaction_data.get('value', 0),
                 'data': transaction_data.get('data', '')
             })
-        except Exception:
-            return 21000  # Default gas limit
+        except Exception as e:
+            # Only a plain value transfer has a known gas cost; a failed estimate
+            # for a contract call means it would revert, so don't send it blind
+            if transaction_data.get('data'):
+                raise Exception(f"Gas estimation failed: {str(e)}")
+            print(f"Gas estimation failed, using transfer gas limit: {str(e)}")
+            return 21000
             
-    def _record_transaction(self, tx_hash, receipt, transaction_data):
-        """Record successful transaction in database"""
-        transaction = Transaction(
+    def _record_transaction(self, tx_hash, receipt, transaction_data, context):
+        """Record successful transaction in the ledger"""
+        self._write_ledger_row(
             hash=tx_hash,
             type=transaction_data['type'],
-            amount=self.w3.from_wei(transaction_data.get('value', 0), 'ether'),
+            amount=float(Web3.from_wei(transaction_data.get('value', 0), 'ether')),
             status='success',
             gas_used=receipt['gasUsed'],
-            details=transaction_data,
-            chain_id=self.wallet_manager.chain_id
+            details={**transaction_data, 'effective_gas_price': receipt.get('effectiveGasPrice')},
+            chain_id=context.chain_id
         )
         
-        db.session.add(transaction)
-        db.session.commit()
-        
-    def _record_failed_transaction(self, error, transaction_data):
-        """Record failed transaction in database"""
-        transaction = Transaction(
-            hash='failed_' + str(db.session.query(Transaction).count() + 1),
-            type=transaction_data['type'],
-            amount=self.w3.from_wei(transaction_data.get('value', 0), 'ether'),
+    def _record_failed_transaction(self, error, transaction_data, context):
+        """Record failed transaction in the ledger"""
+        if not transaction_data:
+            return
+        self._write_ledger_row(
+            hash=LedgerWriter.new_failed_hash(),
+            type=transaction_data.get('type', 'unknown'),
+            amount=float(Web3.from_wei(transaction_data.get('value', 0), 'ether')),
             status='failed',
             details={'error': str(error), **transaction_data},
-            chain_id=self.wallet_manager.chain_id
+            chain_id=context.chain_id
         )
-    def _validate_risk_parameters(self, transaction_data):
+
+    def _write_ledger_row(self, **row):
+        """Hand a ledger row to the background writer, or commit it directly without one"""
+        if self.ledger_writer:
+            self.ledger_writer.record(**row)
+            return
+        try:
+            db.session.add(Transaction(**row))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error recording transaction: {str(e)}")
+            FAILURES.inc(component='transaction_executor', operation='record_transaction')
+
+    @traced('validate_risk_parameters')
+    def _validate_risk_parameters(self, transaction_data, context=None):
         """Validate transaction against risk parameters"""
         from base_models import RiskParameter
         
         try:
+            context = self._resolve_context(context)
             if not transaction_data:
                 print("No transaction data provided")
                 return False
@@ -121,7 +346,7 @@ class TransactionExecutor:
             
             # Calculate transaction value in USD
             value_in_wei = transaction_data.get('value', 0)
-            value_in_eth = self.w3.from_wei(value_in_wei, 'ether')
+            value_in_eth = float(Web3.from_wei(value_in_wei, 'ether'))
             
             # Get current AVAX price with retry mechanism
             avax_price = self._get_avax_price()
@@ -132,13 +357,13 @@ class TransactionExecutor:
             transaction_value_usd = value_in_eth * avax_price
             
             # Get wallet balance
-            wallet = self.wallet_manager.get_wallet()
+            wallet = context.signer.get_account()
             if not wallet:
                 print("No wallet configured")
                 return False
                 
-            total_balance_wei = self.w3.eth.get_balance(wallet.address)
-            total_balance_usd = self.w3.from_wei(total_balance_wei, 'ether') * avax_price
+            total_balance_wei = context.w3.eth.get_balance(wallet.address)
+            total_balance_usd = float(Web3.from_wei(total_balance_wei, 'ether')) * avax_price
             
             # Check max exposure percentage
             max_exposure = risk_param_dict.get('max_exposure_percentage', 20.0)
@@ -183,29 +408,35 @@ class TransactionExecutor:
             # Validate gas price multiplier
             max_gas_multiplier = risk_param_dict.get('max_gas_multiplier', 1.5)
             try:
-                base_gas_price = self.w3.eth.gas_price
+                base_gas_price = context.fee_oracle.gas_price()
                 transaction_gas_price = transaction_data.get('gasPrice', base_gas_price)
                 if transaction_gas_price > (base_gas_price * max_gas_multiplier):
                     print(f"Gas price exceeds maximum multiplier: {max_gas_multiplier}x")
                     return False
             except Exception as e:
                 print(f"Error validating gas price: {str(e)}")
+                FAILURES.inc(component='transaction_executor', operation='validate_gas_price')
                 return False
             
             return True
             
         except Exception as e:
             print(f"Error validating risk parameters: {str(e)}")
+            FAILURES.inc(component='transaction_executor', operation='validate_risk_parameters')
             return False
             
     def _get_avax_price(self):
         """Get current AVAX price in USD"""
+        started = time.perf_counter()
         try:
             import requests
             response = requests.get(
-                'https://api.coingecko.com/api/v3/simple/price',
+                self.price_api_url,
                 params={'ids': 'avalanche-2', 'vs_currencies': 'usd'}
             )
-            return float(response.json()['avalanche-2']['usd'])
+            price = float(response.json()['avalanche-2']['usd'])
+            PRICE_FETCH_LATENCY.observe(time.perf_counter() - started, outcome='success')
+            return price
         except Exception:
+            PRICE_FETCH_LATENCY.observe(time.perf_counter() - started, outcome='error')
             return 0  # Return 0 to fail safe on price errors
@@ -2,14 +2,25 @@ from web3 import Web3
 from eth_account import Account
 from cryptography.fernet import Fernet
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from base_models import WalletConfig, db
+from chain_context import make_provider
+from metrics import CACHE_REQUESTS, FAILURES
 
 class WalletManager:
-    def __init__(self, chain_id=None):
-        """Initialize wallet manager with optional chain_id"""
+    def __init__(self, chain_id=None, signer_ttl=300, balances_ttl=10):
+        """Initialize wallet manager with optional chain_id and cache TTLs in seconds"""
+        self.signer_ttl = signer_ttl
+        self._signers = {}
+        self._signers_lock = threading.Lock()
+        self.balances_ttl = balances_ttl
+        self._balances = None
+        self._balances_lock = threading.Lock()
         self.chain_id = chain_id or self._get_default_chain_id()
         self.chain = self._get_chain_info(self.chain_id)
-        self.w3 = Web3(Web3.HTTPProvider(self.chain.rpc_url))
+        self.w3 = Web3(make_provider(self.chain.rpc_url, self.chain.id))
         
         encryption_key = os.environ.get('WALLET_ENCRYPTION_KEY')
         if not encryption_key:
@@ -46,13 +57,17 @@ class WalletManager:
             } for chain in chains]
     
     def switch_chain(self, chain_id):
-        """Switch to a different chain"""
+        """Switch the default chain used when no chain_id is passed
+
+        Shared components should take a ChainContext per call instead; this
+        mutates state visible to every thread using this manager.
+        """
         from flask import current_app
         
         with current_app.app_context():
             self.chain_id = chain_id
             self.chain = self._get_chain_info(chain_id)
-            self.w3 = Web3(Web3.HTTPProvider(self.chain.rpc_url))
+            self.w3 = Web3(make_provider(self.chain.rpc_url, self.chain.id))
             return True
         
     def _get_chain_info(self, chain_id):
@@ -63,11 +78,12 @@ class WalletManager:
             raise ValueError(f"Chain with ID {chain_id} not found")
         return chain
         
-    def create_wallet(self):
-        """Create a new wallet and store encrypted private key for the current chain"""
+    def create_wallet(self, chain_id=None):
+        """Create a new wallet and store encrypted private key for the given or current chain"""
+        chain_id = chain_id or self.chain_id
         try:
             # Check if wallet already exists for this chain
-            existing_wallet = WalletConfig.query.filter_by(chain_id=self.chain_id).first()
+            existing_wallet = WalletConfig.query.filter_by(chain_id=chain_id).first()
             if existing_wallet:
                 return existing_wallet.address
             
@@ -78,50 +94,121 @@ class WalletManager:
             wallet_config = WalletConfig(
                 address=account.address,
                 encrypted_key=encrypted_key.decode(),
-                chain_id=self.chain_id
+                chain_id=chain_id
             )
             
             db.session.add(wallet_config)
             db.session.commit()
+            self.invalidate_signer(chain_id)
             return account.address
         except Exception as e:
             db.session.rollback()
             raise Exception(f"Failed to create wallet: {str(e)}")
         
-    def get_wallet(self):
-        """Retrieve wallet configuration for the current chain"""
+    def get_wallet(self, chain_id=None):
+        """Retrieve wallet account for the given or current chain, decrypting at most once per TTL"""
+        chain_id = chain_id or self.chain_id
+        now = time.monotonic()
+        with self._signers_lock:
+            cached = self._signers.get(chain_id)
+            if cached and cached[2] > now:
+                return cached[0]
+            self._evict_signer(chain_id)
+
         try:
-            wallet_config = WalletConfig.query.filter_by(chain_id=self.chain_id).first()
+            wallet_config = WalletConfig.query.filter_by(chain_id=chain_id).first()
             if not wallet_config:
                 return None
                 
             encrypted_key = wallet_config.encrypted_key.encode()
-            private_key = self.fernet.decrypt(encrypted_key).decode()
-            return Account.from_key(private_key)
+            key_buffer = bytearray(self.fernet.decrypt(encrypted_key))
+            account = Account.from_key(key_buffer.decode())
         except Exception as e:
             print(f"Error retrieving wallet: {str(e)}")
             return None
+
+        with self._signers_lock:
+            self._evict_signer(chain_id)
+            self._signers[chain_id] = (account, key_buffer, time.monotonic() + self.signer_ttl)
+        return account
+
+    def invalidate_signer(self, chain_id=None):
+        """Drop cached signers for one chain, or all chains when chain_id is None"""
+        with self._signers_lock:
+            for cached_chain_id in list(self._signers):
+                if chain_id is None or cached_chain_id == chain_id:
+                    self._evict_signer(cached_chain_id)
+
+    def _evict_signer(self, chain_id):
+        """Remove a cached signer and zero its decrypted key buffer
+
+        Best effort only: eth_account keeps its own immutable copy of the key,
+        which is released for garbage collection rather than overwritten.
+        """
+        cached = self._signers.pop(chain_id, None)
+        if cached:
+            key_buffer = cached[1]
+            key_buffer[:] = bytes(len(key_buffer))
         
-    def get_balance(self):
-        """Get wallet AVAX balance"""
+    def get_balance(self, context=None):
+        """Get wallet AVAX balance on the given chain context, or the current chain"""
+        w3 = context.w3 if context else self.w3
         try:
-            wallet = self.get_wallet()
+            wallet = self.get_wallet(context.chain_id if context else None)
             if not wallet:
                 return 0
-            balance = self.w3.eth.get_balance(wallet.address)
-            return float(self.w3.from_wei(balance, 'ether'))
+            balance = w3.eth.get_balance(wallet.address)
+            return float(w3.from_wei(balance, 'ether'))
         except Exception as e:
             print(f"Error getting balance: {str(e)}")
+            FAILURES.inc(component='wallet_manager', operation='get_balance')
             return 0
         
-    def sign_transaction(self, transaction_data):
-        """Sign a transaction with the wallet's private key"""
-        wallet = self.get_wallet()
+    def get_all_balances(self, contexts, max_workers=8):
+        """Get wallet balances for the given chain contexts, read concurrently and cached briefly"""
+        with self._balances_lock:
+            if self._balances and self._balances[0] > time.monotonic():
+                CACHE_REQUESTS.inc(cache='balances', result='hit')
+                return self._balances[1]
+        CACHE_REQUESTS.inc(cache='balances', result='miss')
+
+        # Read addresses in the calling thread so workers only do RPC
+        addresses = {wallet.chain_id: wallet.address for wallet in WalletConfig.query.all()}
+
+        def fetch(context):
+            entry = {
+                'chain_id': context.chain_id,
+                'name': context.name,
+                'symbol': context.symbol,
+                'network_id': context.network_id,
+                'balance': 0
+            }
+            address = addresses.get(context.chain_id)
+            if not address:
+                return entry
+            try:
+                w3 = context.w3
+                entry['balance'] = float(w3.from_wei(w3.eth.get_balance(address), 'ether'))
+            except Exception as e:
+                print(f"Error getting balance for chain {context.name}: {str(e)}")
+                FAILURES.inc(component='wallet_manager', operation='get_balance')
+                entry['error'] = str(e)
+            return entry
+
+        if contexts:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(contexts))) as pool:
+                balances = list(pool.map(fetch, contexts))
+        else:
+            balances = []
+
+        with self._balances_lock:
+            self._balances = (time.monotonic() + self.balances_ttl, balances)
+        return balances
+
+    def sign_transaction(self, transaction_data, chain_id=None):
+        """Sign a transaction with the given or current chain's private key"""
+        wallet = self.get_wallet(chain_id)
         if not wallet:
             raise Exception("No wallet configured")
             
-        signed_txn = self.w3.eth.account.sign_transaction(
-            transaction_data,
-            wallet.key
-        )
-        return signed_txn
+        return wallet.sign_transaction(transaction_data)
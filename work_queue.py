@@ -0,0 +1,219 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from base_models import CycleTask, db
+from metrics import FAILURES
+
+class CycleQueue:
+    def __init__(self, lease_seconds=300, max_attempts=3, retry_seconds=5):
+        """Initialize durable queue of per-chain cycle tasks shared by every worker process
+
+        A claimed task is leased to one worker; if the worker dies the lease
+        expires and another worker retries the task, up to max_attempts.
+        The transaction step runs at most once per task: begin_execution()
+        records it before sending, and retries skip execution.
+        """
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+
+    def enqueue(self, chain_id):
+        """Queue a cycle for a chain, or return the task already pending or running for it"""
+        existing = db.session.query(CycleTask.id).filter(
+            CycleTask.chain_id == chain_id,
+            CycleTask.status.in_(('pending', 'running'))
+        ).first()
+        if existing:
+            return existing.id
+        task = CycleTask(chain_id=chain_id, status='pending', available_at=datetime.utcnow())
+        db.session.add(task)
+        db.session.commit()
+        return task.id
+
+    def claim(self, worker, limit):
+        """Lease up to limit available tasks to worker, returning (task_id, chain_id) pairs
+
+        Candidates are read with FOR UPDATE SKIP LOCKED so concurrent workers
+        on PostgreSQL never wait on each other's rows; the conditional update
+        keeps claims exclusive on databases that ignore row locks (SQLite).
+        """
+        now = datetime.utcnow()
+        try:
+            # Tasks whose worker vanished during their last attempt are given up on
+            CycleTask.query.filter(
+                CycleTask.status == 'running',
+                CycleTask.lease_expires_at < now,
+                CycleTask.attempts >= self.max_attempts
+            ).update({'status': 'failed', 'error': 'Lease expired', 'finished_at': now}, synchronize_session=False)
+
+            claimable = db.or_(
+                db.and_(CycleTask.status == 'pending', CycleTask.available_at <= now),
+                db.and_(CycleTask.status == 'running', CycleTask.lease_expires_at < now)
+            )
+            candidates = db.session.query(CycleTask.id, CycleTask.chain_id).filter(claimable).order_by(
+                CycleTask.available_at, CycleTask.id
+            ).limit(limit).with_for_update(skip_locked=True).all()
+
+            claimed = []
+            for task_id, chain_id in candidates:
+                updated = CycleTask.query.filter(CycleTask.id == task_id, claimable).update({
+                    'status': 'running',
+                    'worker': worker,
+                    'attempts': CycleTask.attempts + 1,
+                    'lease_expires_at': now + timedelta(seconds=self.lease_seconds)
+                }, synchronize_session=False)
+                if updated:
+                    claimed.append((task_id, chain_id))
+            db.session.commit()
+            return claimed
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error claiming cycle tasks: {str(e)}")
+            return []
+
+    def begin_execution(self, task_id, worker):
+        """Record that the transaction step is starting; False if it already ran or the lease was lost"""
+        now = datetime.utcnow()
+        try:
+            updated = CycleTask.query.filter(
+                CycleTask.id == task_id,
+                CycleTask.worker == worker,
+                CycleTask.status == 'running',
+                CycleTask.lease_expires_at >= now,
+                CycleTask.execution_started_at.is_(None)
+            ).update({
+                'execution_started_at': now,
+                'lease_expires_at': now + timedelta(seconds=self.lease_seconds)
+            }, synchronize_session=False)
+            db.session.commit()
+            return bool(updated)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error starting execution for cycle task {task_id}: {str(e)}")
+            return False
+
+    def complete(self, task_id, worker, result):
+        """Store a task's result; False if another worker has taken it over"""
+        return self._finish(task_id, worker, {
+            'status': 'done', 'result': result, 'error': None, 'finished_at': datetime.utcnow()
+        })
+
+    def fail(self, task_id, worker, error):
+        """Schedule a retry with exponential backoff, or fail the task after max_attempts"""
+        task = db.session.get(CycleTask, task_id)
+        if task is None:
+            return False
+        if task.attempts >= self.max_attempts:
+            fields = {'status': 'failed', 'error': error, 'finished_at': datetime.utcnow()}
+        else:
+            fields = {
+                'status': 'pending',
+                'error': error,
+                'worker': None,
+                'lease_expires_at': None,
+                'available_at': datetime.utcnow() + timedelta(seconds=self.retry_seconds * 2 ** (task.attempts - 1))
+            }
+        return self._finish(task_id, worker, fields)
+
+    def _finish(self, task_id, worker, fields):
+        try:
+            updated = CycleTask.query.filter(
+                CycleTask.id == task_id,
+                CycleTask.worker == worker,
+                CycleTask.status == 'running'
+            ).update(fields, synchronize_session=False)
+            db.session.commit()
+            return bool(updated)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error updating cycle task {task_id}: {str(e)}")
+            return False
+
+    def finished(self, task_ids):
+        """(task_id, result) for tasks among task_ids that are done (result) or failed (None)"""
+        rows = db.session.query(CycleTask.id, CycleTask.status, CycleTask.result).filter(
+            CycleTask.id.in_(task_ids),
+            CycleTask.status.in_(('done', 'failed'))
+        ).all()
+        db.session.commit()
+        return [(row.id, row.result if row.status == 'done' else None) for row in rows]
+
+    def prune(self, older_than):
+        """Delete tasks finished before older_than"""
+        try:
+            deleted = CycleTask.query.filter(
+                CycleTask.status.in_(('done', 'failed')),
+                CycleTask.finished_at < older_than
+            ).delete(synchronize_session=False)
+            db.session.commit()
+            return deleted
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error pruning cycle tasks: {str(e)}")
+            return 0
+
+class CycleWorker:
+    def __init__(self, app, queue, worker_id, threads=4, poll_interval=1.0):
+        """Initialize worker that claims cycle tasks from the queue and runs them on its threads"""
+        self.app = app
+        self.queue = queue
+        self.worker_id = worker_id
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='cycle-worker')
+        self._thread = None
+
+    def start(self):
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name='cycle-queue-poller', daemon=True)
+        self._thread.start()
+
+    def stop(self, wait=False):
+        self._stopped.set()
+        self._pool.shutdown(wait=wait)
+
+    def _run(self):
+        while not self._stopped.wait(self.poll_interval):
+            self.poll()
+
+    def poll(self):
+        """Claim as many tasks as there are idle threads; returns how many were claimed"""
+        with self._lock:
+            free = self.threads - self._in_flight
+        if free <= 0:
+            return 0
+        with self.app.app_context():
+            tasks = self.queue.claim(self.worker_id, free)
+        for task_id, chain_id in tasks:
+            with self._lock:
+                self._in_flight += 1
+            self._pool.submit(self._execute, task_id, chain_id)
+        return len(tasks)
+
+    def _execute(self, task_id, chain_id):
+        from chain_scheduler import run_observed_cycle
+        import app as app_module
+        with self.app.app_context():
+            try:
+                context = app_module.chain_registry.get(chain_id)
+                result = run_observed_cycle(
+                    self.app, context,
+                    execution_guard=lambda: self.queue.begin_execution(task_id, self.worker_id)
+                )
+                if result is None:
+                    self.queue.fail(task_id, self.worker_id, 'Chain cycle failed')
+                else:
+                    self.queue.complete(task_id, self.worker_id, result)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error running cycle task {task_id}: {str(e)}")
+                FAILURES.inc(component='cycle_worker', operation='run_task')
+                self.queue.fail(task_id, self.worker_id, str(e))
+            finally:
+                db.session.remove()
+                with self._lock:
+                    self._in_flight -= 1
@@ -0,0 +1,13 @@
+"""WSGI entry point for the web tier, e.g. `gunicorn wsgi:app`
+
+Needs a threaded or gevent worker class, since every /api/events client
+holds a worker thread: gunicorn.conf.py selects gthread with WEB_THREADS
+threads, and event streams are capped below that. AI cycles are not run
+here; start `python agent_worker.py` separately.
+"""
+from main import bootstrap
+from app import configure_routes, start_web_services
+
+app = bootstrap(seed=False)
+configure_routes(app)
+start_web_services(app)